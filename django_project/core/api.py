@@ -35,7 +35,7 @@ class DjangoSettingAPI(APIView):
 class FilteredAPI(object):
     """Return User list."""
 
-    ignored_fields = ['page', 'page_size', 'q']
+    ignored_fields = ['page', 'page_size', 'q', 'cursor', 'count']
     default_query_filter = []
 
     def filter_query(self, request, query, fields: list = None):
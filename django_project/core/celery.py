@@ -35,5 +35,39 @@ app.conf.beat_schedule = {
     'check_instance': {
         'task': 'check_instances',
         'schedule': crontab(minute='*'),
+        # Skip the sweep that is still queued when the next one is due
+        'options': {'expires': 55}
+    },
+    'poll_jenkins_activities': {
+        'task': 'poll_jenkins_activities',
+        'schedule': crontab(minute='*'),
+        'options': {'expires': 55}
+    },
+    'process_pending_webhook_events': {
+        'task': 'process_pending_webhook_events',
+        'schedule': crontab(minute='*'),
+        'options': {'expires': 55}
+    },
+    'reconcile_sales_order_payments': {
+        'task': 'reconcile_sales_order_payments',
+        'schedule': crontab(minute='*/5'),
+    },
+    'generate_pending_invoices': {
+        'task': 'generate_pending_invoices',
+        'schedule': crontab(minute='*/10'),
+    },
+    'rollup_instance_probes': {
+        'task': 'rollup_instance_probes',
+        'schedule': crontab(minute='5'),
+    },
+    'sync_erp_country': {
+        'task': 'geohosting.tasks.erp.sync_erp_data',
+        'schedule': crontab(minute='*/5'),
+        'args': ('Country',)
+    },
+    'sync_erp_company': {
+        'task': 'geohosting.tasks.erp.sync_erp_data',
+        'schedule': crontab(minute='*/5'),
+        'args': ('ErpCompany',)
     }
 }
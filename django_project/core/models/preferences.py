@@ -16,7 +16,7 @@ from core.models.singleton import SingletonModel
 from geohosting.utils.erpnext import test_connection
 from geohosting.utils.paystack import test_connection as paystack_connection
 from geohosting.utils.stripe import test_connection as strip_connection
-from geohosting.utils.vault import get_token as vault_connection
+from geohosting.utils.vault import test_connection as vault_connection
 from geohosting_controller.connection import get_jenkins_crumb
 
 
@@ -1,14 +1,181 @@
+import base64
+import json
+import math
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class Pagination(PageNumberPagination):
-    """Pagination for API."""
+    """Pagination for API.
+
+    Viewsets that define `cursor_ordering` can also be paged by cursor,
+    when the request has the `cursor` parameter (empty for the first
+    page). The cursor is the position on that ordering, so every page
+    costs the same, and the count is only returned when `count=true`.
+    The ordering must be unique, e.g. ['-date', 'id'], and not null.
+    """
 
     page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+
+    cursor_ordering = None
+    model = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate by cursor when it is requested, otherwise by page."""
+        self.cursor_ordering = getattr(view, 'cursor_ordering', None)
+        if (
+                not self.cursor_ordering or
+                self.cursor_query_param not in request.query_params
+        ):
+            self.cursor_ordering = None
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_queryset_by_cursor(queryset, request)
+
+    @staticmethod
+    def _field(ordering):
+        """Return field name and if it is descending of an ordering."""
+        return ordering.lstrip('-'), ordering.startswith('-')
+
+    def encode_cursor(self, obj, reverse=False):
+        """Return cursor of the position of obj."""
+        position = [
+            getattr(obj, self._field(ordering)[0])
+            for ordering in self.cursor_ordering
+        ]
+        # Datetimes keep the microseconds, so the position is exact
+        data = json.dumps(
+            {'p': position, 'r': reverse},
+            default=lambda value: (
+                value.isoformat() if hasattr(value, 'isoformat')
+                else str(value)
+            )
+        )
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        """Return position and direction of the cursor.
+
+        The values of the position are converted by the fields of the
+        ordering, so a tampered cursor is not found.
+        """
+        if not cursor:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            position = data['p']
+            if len(position) != len(self.cursor_ordering):
+                raise ValueError()
+            position = [
+                self.model._meta.get_field(
+                    self._field(ordering)[0]
+                ).to_python(value)
+                for ordering, value in zip(self.cursor_ordering, position)
+            ]
+            return position, bool(data.get('r'))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound('Invalid cursor.')
+
+    def position_filter(self, position, reverse=False):
+        """Return filter of the rows after the position on the ordering."""
+        filters = []
+        for idx, ordering in enumerate(self.cursor_ordering):
+            field, descending = self._field(ordering)
+            lookup = 'lt' if descending != reverse else 'gt'
+            query = Q(**{f'{field}__{lookup}': position[idx]})
+            for prev_idx in range(idx):
+                prev_field = self._field(self.cursor_ordering[prev_idx])[0]
+                query &= Q(**{prev_field: position[prev_idx]})
+            filters.append(query)
+        return reduce(lambda a, b: a | b, filters)
+
+    def paginate_queryset_by_cursor(self, queryset, request):
+        """Paginate queryset from the position of the cursor."""
+        self.request = request
+        self.model = queryset.model
+        self.page = None
+        self.count = None
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        position, reverse = self.decode_cursor(
+            request.query_params.get(self.cursor_query_param)
+        )
+
+        if request.query_params.get(self.count_query_param) == 'true':
+            self.count = queryset.count()
+
+        ordering = self.cursor_ordering
+        if reverse:
+            ordering = [
+                field[1:] if field.startswith('-') else f'-{field}'
+                for field in ordering
+            ]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                self.position_filter(position, reverse)
+            )
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.results = results
+        return results
+
+    def get_cursor_link(self, obj, reverse):
+        """Return link of the page after or before obj."""
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param
+        )
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(obj, reverse)
+        )
+
+    def get_next_link(self):
+        """Return next link."""
+        if not self.cursor_ordering:
+            return super().get_next_link()
+        if not self.has_next or not self.results:
+            return None
+        return self.get_cursor_link(self.results[-1], False)
+
+    def get_previous_link(self):
+        """Return previous link."""
+        if not self.cursor_ordering:
+            return super().get_previous_link()
+        if not self.has_previous or not self.results:
+            return None
+        return self.get_cursor_link(self.results[0], True)
 
     def get_paginated_response_data(self, data):
         """Return paginated only data."""
+        if self.cursor_ordering:
+            return {
+                'count': self.count,
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+                'page': None,
+                'total_page': (
+                    math.ceil(self.count / self.page_size)
+                    if self.count is not None else None
+                ),
+                'page_size': self.page_size,
+                'results': data,
+            }
         return {
             'count': self.page.paginator.count,
             'next': self.get_next_link(),
@@ -40,6 +40,117 @@ FIXTURE_DIRS = ['geohosting_controller/fixtures']
 ERPNEXT_API_KEY = os.environ.get('ERPNEXT_API_KEY', '')
 ERPNEXT_API_SECRET = os.environ.get('ERPNEXT_API_SECRET', '')
 ERPNEXT_BASE_URL = os.environ.get('ERPNEXT_BASE_URL', '')
+# Size of the keep-alive connection pool of the ERPNext client.
+ERPNEXT_POOL_SIZE = int(os.environ.get('ERPNEXT_POOL_SIZE', 10))
+# Default timeout in seconds of each ERPNext request.
+ERPNEXT_TIMEOUT = int(os.environ.get('ERPNEXT_TIMEOUT', 30))
+# Number of rows of each page when fetching list from ERPNext.
+ERPNEXT_PAGE_LENGTH = int(os.environ.get('ERPNEXT_PAGE_LENGTH', 500))
+# Number of pages that are fetched concurrently from ERPNext.
+ERPNEXT_MAX_WORKERS = int(os.environ.get('ERPNEXT_MAX_WORKERS', 4))
+# Interval in hours of full sync that also removes rows deleted on ERPNext.
+ERPNEXT_FULL_SYNC_HOURS = int(os.environ.get('ERPNEXT_FULL_SYNC_HOURS', 24))
+
+# Size of the keep-alive connection pool of the vault client.
+VAULT_POOL_SIZE = int(os.environ.get('VAULT_POOL_SIZE', 10))
+# Timeout in seconds of each vault request.
+VAULT_TIMEOUT = int(os.environ.get('VAULT_TIMEOUT', 10))
+# Seconds that credentials are cached encrypted, 0 to disable.
+VAULT_CREDENTIAL_CACHE_TTL = int(
+    os.environ.get('VAULT_CREDENTIAL_CACHE_TTL', 60)
+)
+
+# Number of retries of posting an activity to jenkins.
+ACTIVITY_MAX_RETRIES = int(os.environ.get('ACTIVITY_MAX_RETRIES', 5))
+# Base delay in seconds of the retry, doubled on every retry.
+ACTIVITY_RETRY_BACKOFF = int(os.environ.get('ACTIVITY_RETRY_BACKOFF', 10))
+
+# Number of jenkins connections kept alive, also the concurrency of the
+# bulk trigger.
+JENKINS_POOL_SIZE = int(os.environ.get('JENKINS_POOL_SIZE', 10))
+# Connect and read timeout in seconds of each jenkins request.
+JENKINS_CONNECT_TIMEOUT = int(os.environ.get('JENKINS_CONNECT_TIMEOUT', 5))
+JENKINS_READ_TIMEOUT = int(os.environ.get('JENKINS_READ_TIMEOUT', 30))
+
+# Interval in seconds of polling a jenkins queue item that is waiting.
+JENKINS_POLL_QUEUE_INTERVAL = int(
+    os.environ.get('JENKINS_POLL_QUEUE_INTERVAL', 15)
+)
+# First interval in seconds of polling a running jenkins build, doubled
+# on every poll up to the max interval.
+JENKINS_POLL_BUILD_INTERVAL = int(
+    os.environ.get('JENKINS_POLL_BUILD_INTERVAL', 30)
+)
+JENKINS_POLL_MAX_INTERVAL = int(
+    os.environ.get('JENKINS_POLL_MAX_INTERVAL', 300)
+)
+
+# Seconds that webhook events of an app are collected before they are
+# processed together.
+WEBHOOK_BATCH_DELAY = int(os.environ.get('WEBHOOK_BATCH_DELAY', 2))
+# Number of webhook events that are loaded at a time.
+WEBHOOK_BATCH_SIZE = int(os.environ.get('WEBHOOK_BATCH_SIZE', 100))
+# Seconds after which a lock of processing webhook events expires.
+WEBHOOK_LOCK_TIMEOUT = int(os.environ.get('WEBHOOK_LOCK_TIMEOUT', 300))
+
+# Seconds that a webhook event with the same content is ignored, 0 to
+# disable.
+WEBHOOK_DEDUP_WINDOW = int(os.environ.get('WEBHOOK_DEDUP_WINDOW', 60))
+
+# Seconds that an app name is held for the user during checkout.
+APP_NAME_HOLD_SECONDS = int(os.environ.get('APP_NAME_HOLD_SECONDS', 900))
+
+# Seconds that a snapshot of the product catalogue is cached, it is
+# replaced by a new version when a product changes.
+PRODUCT_CATALOGUE_CACHE_TIMEOUT = int(
+    os.environ.get('PRODUCT_CATALOGUE_CACHE_TIMEOUT', 86400)
+)
+# Seconds that changes are collected before the catalogue is rebuilt.
+PRODUCT_CATALOGUE_REBUILD_DELAY = int(
+    os.environ.get('PRODUCT_CATALOGUE_REBUILD_DELAY', 5)
+)
+
+# Seconds that the compiled activity type mapping is kept in process.
+ACTIVITY_MAPPING_LOCAL_TTL = int(
+    os.environ.get('ACTIVITY_MAPPING_LOCAL_TTL', 60)
+)
+
+# Number of instances that are probed concurrently by the health check.
+INSTANCE_PROBE_MAX_WORKERS = int(
+    os.environ.get('INSTANCE_PROBE_MAX_WORKERS', 20)
+)
+# Timeout in seconds of each instance probe.
+INSTANCE_PROBE_TIMEOUT = int(os.environ.get('INSTANCE_PROBE_TIMEOUT', 10))
+# Interval in seconds of probing deploying and starting up instances,
+# also the first interval of stable online instances.
+INSTANCE_PROBE_MIN_INTERVAL = int(
+    os.environ.get('INSTANCE_PROBE_MIN_INTERVAL', 60)
+)
+# Ceiling in seconds of the backoff of stable online instances.
+INSTANCE_PROBE_MAX_INTERVAL = int(
+    os.environ.get('INSTANCE_PROBE_MAX_INTERVAL', 3600)
+)
+# Base interval in seconds of retrying offline instances, with jitter.
+INSTANCE_PROBE_OFFLINE_INTERVAL = int(
+    os.environ.get('INSTANCE_PROBE_OFFLINE_INTERVAL', 300)
+)
+# Seconds before the next probe is due that an instance is already probed,
+# about half of the interval of the sweeps, so no sweep is skipped.
+INSTANCE_PROBE_SCHEDULE_SLACK = int(
+    os.environ.get('INSTANCE_PROBE_SCHEDULE_SLACK', 30)
+)
+# Days that the raw probe results are kept, after being rolled up.
+INSTANCE_PROBE_RETENTION_DAYS = int(
+    os.environ.get('INSTANCE_PROBE_RETENTION_DAYS', 7)
+)
+# Number of instances in each shard of the health check.
+INSTANCE_SWEEP_SHARD_SIZE = int(
+    os.environ.get('INSTANCE_SWEEP_SHARD_SIZE', 100)
+)
+# Time budget in seconds of a health check sweep.
+INSTANCE_SWEEP_TIME_BUDGET = int(
+    os.environ.get('INSTANCE_SWEEP_TIME_BUDGET', 50)
+)
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -82,6 +193,7 @@ CELERY_BROKER_URL = CELERY_BROKER_REDIS_URL
 # --------------------------------------
 STRIPE_PUBLISHABLE_KEY = os.environ.get('STRIPE_PUBLISHABLE_KEY', '')
 STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY', '')
+STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET', '')
 
 # --------------------------------------
 # PAYSTACK
@@ -89,6 +201,31 @@ STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY', '')
 PAYSTACK_PUBLISHABLE_KEY = os.environ.get('PAYSTACK_PUBLISHABLE_KEY', '')
 PAYSTACK_SECRET_KEY = os.environ.get('PAYSTACK_SECRET_KEY', '')
 
+# Orders waiting payment that are younger than the days are reconciled
+# with the payment gateway, as fallback of the gateway webhooks.
+PAYMENT_RECONCILE_MAX_AGE_DAYS = int(
+    os.environ.get('PAYMENT_RECONCILE_MAX_AGE_DAYS', 7)
+)
+# Number of orders that are reconciled on each run.
+PAYMENT_RECONCILE_BATCH_SIZE = int(
+    os.environ.get('PAYMENT_RECONCILE_BATCH_SIZE', 100)
+)
+# Number of concurrent calls to the payment gateway.
+PAYMENT_RECONCILE_MAX_WORKERS = int(
+    os.environ.get('PAYMENT_RECONCILE_MAX_WORKERS', 10)
+)
+
+# Number of invoices that are downloaded from erpnext at the same time,
+# across the workers.
+INVOICE_MAX_CONCURRENCY = int(os.environ.get('INVOICE_MAX_CONCURRENCY', 4))
+# Retries of an invoice download and the base of its backoff in seconds.
+INVOICE_MAX_RETRIES = int(os.environ.get('INVOICE_MAX_RETRIES', 5))
+INVOICE_RETRY_BACKOFF = int(os.environ.get('INVOICE_RETRY_BACKOFF', 30))
+# Seconds that a download slot is held when the worker dies.
+INVOICE_SLOT_TIMEOUT = int(os.environ.get('INVOICE_SLOT_TIMEOUT', 300))
+# Number of pending invoices that are queued on each sweep.
+INVOICE_BATCH_SIZE = int(os.environ.get('INVOICE_BATCH_SIZE', 100))
+
 STORAGES = {
     "default": {
         "BACKEND": "django.core.files.storage.FileSystemStorage",
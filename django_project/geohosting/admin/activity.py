@@ -15,7 +15,8 @@ class ActivityAdmin(admin.ModelAdmin):
     list_filter = ('instance', 'status')
     readonly_fields = (
         'activity_type', 'instance', 'triggered_at', 'triggered_by',
-        'client_data', 'post_data', 'note', 'jenkins_queue_url'
+        'app_name', 'client_data', 'post_data', 'note', 'jenkins_queue_url',
+        'jenkins_build_url', 'jenkins_result', 'next_poll_at', 'polls'
     )
 
     def has_add_permission(*args, **kwargs):
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from geohosting.models.erp import ErpRequestLog
+from geohosting.models.erp import ErpFile, ErpRequestLog, ErpSyncState
 from geohosting.models.erp_company import ErpCompany
 
 
@@ -11,6 +11,22 @@ class ErpRequestLogAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(ErpSyncState)
+class ErpSyncStateAdmin(admin.ModelAdmin):
+    list_display = (
+        'model_name', 'last_modified', 'last_synced_at',
+        'last_full_synced_at'
+    )
+
+
+@admin.register(ErpFile)
+class ErpFileAdmin(admin.ModelAdmin):
+    list_display = (
+        'source_path', 'path', 'content_hash', 'updated_at'
+    )
+    search_fields = ('source_path', 'path')
+
+
 @admin.register(ErpCompany)
 class ErpCompanyAdmin(admin.ModelAdmin):
     change_list_template = 'admin/erp_change_list.html'
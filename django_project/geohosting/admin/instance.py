@@ -2,15 +2,25 @@ from django.contrib import admin
 from django.utils.safestring import mark_safe
 
 from geohosting.admin.log import LogTrackerObjectAdmin
-from geohosting.models import Instance
+from geohosting.models import (
+    AppName, Instance, InstanceSweep, InstanceUptime
+)
 
 
 def send_credentials(modeladmin, request, queryset):
     """Send credentials."""
+    queryset = queryset.select_related('price__package_group')
+    Instance.prefetch_credentials(queryset)
     for config in queryset:
         config.send_credentials()
 
 
+def refresh_credentials(modeladmin, request, queryset):
+    """Remove cached credentials, e.g. after rotating them."""
+    for config in queryset.select_related('price__package_group'):
+        config.invalidate_credentials()
+
+
 def check_instance(modeladmin, request, queryset):
     """Send instance."""
     for config in queryset:
@@ -32,7 +42,10 @@ class InstanceAdmin(LogTrackerObjectAdmin):
         'created_at', 'logs', 'webhooks', 'link'
     )
     list_filter = ('status',)
-    actions = (send_credentials, check_instance, cancel_subscription)
+    actions = (
+        send_credentials, refresh_credentials, check_instance,
+        cancel_subscription
+    )
 
     def has_add_permission(*args, **kwargs):
         return False
@@ -61,3 +74,38 @@ class InstanceAdmin(LogTrackerObjectAdmin):
         return mark_safe(
             f'<a href="{instance.url}" target="_blank">link</a>'
         )
+
+
+@admin.register(InstanceSweep)
+class InstanceSweepAdmin(admin.ModelAdmin):
+    """Instance sweep admin."""
+
+    list_display = (
+        'started_at', 'duration', 'shards', 'total', 'probed', 'changed',
+        'coverage', 'error'
+    )
+
+    def has_add_permission(*args, **kwargs):
+        return False
+
+
+@admin.register(InstanceUptime)
+class InstanceUptimeAdmin(admin.ModelAdmin):
+    """Instance uptime admin."""
+
+    list_display = (
+        'instance', 'period', 'start', 'probes', 'uptime', 'latency_p95'
+    )
+    list_filter = ('period',)
+    search_fields = ('instance__name',)
+
+    def has_add_permission(*args, **kwargs):
+        return False
+
+
+@admin.register(AppName)
+class AppNameAdmin(admin.ModelAdmin):
+    """App name admin."""
+
+    list_display = ('name', 'held_by', 'expires_at')
+    search_fields = ('name',)
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.utils.safestring import mark_safe
 
 from geohosting.models import WebhookEvent
+from geohosting.tasks.webhook import queue_webhook_events
 
 
 def clean_webhook_event(modeladmin, request, queryset):
@@ -9,23 +10,34 @@ def clean_webhook_event(modeladmin, request, queryset):
     WebhookEvent.objects.filter(activity__isnull=True).delete()
 
 
+@admin.action(description='Replay failed events')
+def replay_webhook_event(modeladmin, request, queryset):
+    """Replay failed webhook events from the data."""
+    app_names = set()
+    for event in queryset.filter(
+            note__isnull=False, processed_at__isnull=False
+    ).order_by('id'):
+        event.replay()
+        app_names.add(event.app_name)
+    for app_name in app_names:
+        queue_webhook_events(app_name)
+
+
 @admin.register(WebhookEvent)
 class WebhookEventAdmin(admin.ModelAdmin):
     """WebhookEvent admin."""
 
     list_display = (
         'triggered_at', 'data', 'sync_status', 'note',
-        'activity_link', 'instance_link'
+        'activity_link', 'instance_link', 'processed_at'
     )
-    search_fields = ('data__app_name',)
-    actions = (clean_webhook_event,)
+    search_fields = ('app_name',)
+    list_filter = ('status',)
+    actions = (clean_webhook_event, replay_webhook_event)
 
     def sync_status(self, obj: WebhookEvent):
         """Return logs."""
-        try:
-            return obj.data['Status']
-        except KeyError:
-            return ''
+        return obj.status or ''
 
     def activity_link(self, obj: WebhookEvent):
         """Return activity l."""
@@ -41,6 +41,7 @@ class MyAgreementViewSet(
     default_query_filter = ['name__icontains']
     permission_classes = [IsAuthenticated]
     serializer_class = SalesOrderAgreementSerializer
+    cursor_ordering = ['-created_at', 'id']
 
     def get_queryset(self):
         """Return instances for the authenticated user."""
@@ -13,7 +13,7 @@ from geohosting.models import Package
 from geohosting.models.agreement import AgreementDetail, SalesOrderAgreement
 from geohosting.models.company import Company
 from geohosting.models.sales_order import SalesOrder
-from geohosting.validators import name_validator, app_name_validator
+from geohosting.validators import app_name_hold_validator, name_validator
 
 
 class CheckoutAPI(PaymentAPI):
@@ -30,7 +30,7 @@ class CheckoutAPI(PaymentAPI):
             else:
                 company = None
             name_validator(app_name)
-            app_name_validator(app_name)
+            app_name_hold_validator(app_name, request.user)
         except (ValueError, ValidationError) as e:
             return HttpResponseBadRequest(e)
         package = get_object_or_404(Package, pk=pk)
@@ -24,7 +24,10 @@ class ERPApiView(APIView):
             class_name = request.GET.get('class-name')
             if class_name:
                 apps.get_model('geohosting', class_name)
-                sync_erp_data.delay(class_name)
+                # The deleted rows are only removed when it is asked
+                sync_erp_data.delay(
+                    class_name, full=request.GET.get('full') == 'true'
+                )
 
                 messages.add_message(
                     request,
@@ -1,4 +1,8 @@
+from datetime import datetime, time, timedelta, timezone
+
 from django.http import HttpResponseBadRequest
+from django.utils.dateparse import parse_date
+from django.utils.timezone import now
 from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
@@ -9,7 +13,7 @@ from geohosting.forms.activity.delete_instance import (
     DeletingInstanceForm
 )
 from geohosting.models import (
-    Instance, InstanceStatus
+    Instance, InstanceStatus, InstanceUptime
 )
 from geohosting.serializer.instance import InstanceSerializer
 
@@ -27,12 +31,17 @@ class InstanceViewSet(
     serializer_class = InstanceSerializer
     permission_classes = [IsAuthenticated]
     default_query_filter = ['name__icontains']
+    cursor_ordering = ['name', 'id']
+    # Date range of uptime
+    ignored_fields = FilteredAPI.ignored_fields + ['from', 'to']
 
     def get_queryset(self):
         """Return instances for the authenticated user."""
         query = Instance.objects.filter(owner=self.request.user).order_by(
             'name'
         )
+        if self.action in ['list', 'retrieve']:
+            query = InstanceSerializer.prefetch(query)
         return self.filter_query(self.request, query)
 
     def list(self, request, *args, **kwargs):
@@ -57,6 +66,33 @@ class InstanceViewSet(
         }
         return Response(credentials)
 
+    @action(detail=True, methods=["get"])
+    def uptime(self, request, pk=None):
+        """Return uptime and p95 latency of instance.
+
+        Query parameters `from` and `to` are the dates of the range,
+        default to the last 30 days.
+        """
+        instance = self.get_object()
+        try:
+            end = parse_date(request.GET.get('to', '')) or now().date()
+            start = parse_date(request.GET.get('from', '')) or (
+                end - timedelta(days=30)
+            )
+        except ValueError as e:
+            return HttpResponseBadRequest(f'{e}')
+        if start > end:
+            return HttpResponseBadRequest('from is after to')
+        return Response(
+            InstanceUptime.summary(
+                instance,
+                datetime.combine(start, time.min, tzinfo=timezone.utc),
+                datetime.combine(
+                    end + timedelta(days=1), time.min, tzinfo=timezone.utc
+                )
+            )
+        )
+
     def destroy(self, request, *args, **kwargs):
         """Destroy an instance."""
         instance = self.get_object()
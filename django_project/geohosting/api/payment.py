@@ -1,9 +1,19 @@
 """Payment API."""
 
+import hashlib
+import hmac
+import json
+
 import stripe
 from django.conf import settings
-from django.http import HttpResponseServerError, JsonResponse
+from django.http import (
+    HttpResponse, HttpResponseBadRequest, HttpResponseServerError,
+    JsonResponse
+)
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from paystackapi.paystack import Paystack
 from paystackapi.plan import Plan
 from paystackapi.transaction import Transaction
@@ -124,3 +134,99 @@ class PaymentPaystackSessionAPI:
             plan=plan['plan_code']
         )['data']
         return transaction['reference'], transaction['access_code']
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class PaymentWebhookView(View):
+    """Webhook of payment gateway.
+
+    The signature is verified and the payment is verified again with the
+    gateway on background, before the order is moved forward. The webhook
+    is not available without the signing secret.
+    """
+
+    payment_method = None
+
+    @property
+    def secret(self):
+        """Return signing secret of the events."""
+        raise NotImplementedError
+
+    def payment_id(self, request):
+        """Return payment id of a successful payment event, or None.
+
+        Raises:
+            ValueError: When the signature is not valid.
+        """
+        raise NotImplementedError
+
+    def post(self, request):
+        """Receive event of payment gateway."""
+        from geohosting.tasks.payment import sales_order_payment_succeeded
+        if not self.secret:
+            return HttpResponse(
+                'Webhook is not configured', status=503
+            )
+        try:
+            payment_id = self.payment_id(request)
+        except Exception as e:
+            return HttpResponseBadRequest(f'{e}')
+        if payment_id:
+            sales_order_payment_succeeded.delay(
+                self.payment_method, payment_id
+            )
+        return HttpResponse()
+
+
+class StripeWebhookView(PaymentWebhookView):
+    """Webhook of stripe."""
+
+    payment_method = SalesOrderPaymentMethod.STRIPE
+    EVENTS = [
+        'checkout.session.completed',
+        'checkout.session.async_payment_succeeded'
+    ]
+
+    @property
+    def secret(self):
+        """Return signing secret of the events."""
+        return settings.STRIPE_WEBHOOK_SECRET
+
+    def payment_id(self, request):
+        """Return checkout session id of a paid checkout."""
+        event = stripe.Webhook.construct_event(
+            request.body, request.headers.get('Stripe-Signature', ''),
+            self.secret
+        )
+        if event['type'] not in self.EVENTS:
+            return None
+        session = event['data']['object']
+        if session.get('payment_status') != 'paid':
+            return None
+        return session['id']
+
+
+class PaystackWebhookView(PaymentWebhookView):
+    """Webhook of paystack."""
+
+    payment_method = SalesOrderPaymentMethod.PAYSTACK
+
+    @property
+    def secret(self):
+        """Return signing secret of the events."""
+        return settings.PAYSTACK_SECRET_KEY
+
+    def payment_id(self, request):
+        """Return reference of a successful charge."""
+        signature = hmac.new(
+            self.secret.encode(), request.body,
+            hashlib.sha512
+        ).hexdigest()
+        if not hmac.compare_digest(
+                signature, request.headers.get('X-Paystack-Signature', '')
+        ):
+            raise ValueError('Invalid signature')
+        event = json.loads(request.body)
+        if event.get('event') != 'charge.success':
+            return None
+        return event['data']['reference']
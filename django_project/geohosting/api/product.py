@@ -1,11 +1,14 @@
-from rest_framework import mixins, viewsets
+from django.utils.http import parse_etags
+from rest_framework import mixins, status, viewsets
 from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
 
 from geohosting.models import Product
 from geohosting.permissions import IsAdminOrReadOnly
 from geohosting.serializer.product import (
-    ProductDetailSerializer, ProductListSerializer
+    ProductDetailSerializer, ProductListSerializer, product_prefetches
 )
+from geohosting.utils.product_catalogue import get_snapshot
 
 
 class ProductViewSet(
@@ -24,6 +27,13 @@ class ProductViewSet(
             return ProductDetailSerializer
         return ProductListSerializer
 
+    def get_queryset(self):
+        """Return products, with the relations of the detail."""
+        query = super().get_queryset()
+        if self.action == 'retrieve':
+            query = query.prefetch_related(*product_prefetches())
+        return query
+
     def get_serializer(self, *args, **kwargs):
         currency = self.request.query_params.get('currency')
         kwargs['context'] = self.get_serializer_context()
@@ -39,7 +49,43 @@ class ProductViewSet(
             return super().get_object()
         else:
             try:
-                return Product.objects.get(
+                return self.get_queryset().get(
                     name__iexact=lookup_value)
             except Product.DoesNotExist:
                 raise NotFound('Product not found')
+
+    def catalogue_response(self, request, snapshot, data):
+        """Return response of the catalogue, 304 when etag matches."""
+        etag = snapshot['etag']
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        elif isinstance(data, Response):
+            response = data
+        else:
+            response = Response(data)
+        response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """Return products from the cached catalogue."""
+        snapshot = get_snapshot()
+        page = self.paginate_queryset(snapshot['list'])
+        if page is not None:
+            data = self.get_paginated_response(page)
+        else:
+            data = snapshot['list']
+        return self.catalogue_response(request, snapshot, data)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return product by id or name from the cached catalogue."""
+        snapshot = get_snapshot(
+            self.request.query_params.get('currency', '')
+        )
+        lookup_value = self.kwargs.get(self.lookup_field)
+        if not lookup_value.isdigit():
+            lookup_value = snapshot['names'].get(lookup_value.lower())
+        try:
+            data = snapshot['products'][lookup_value]
+        except KeyError:
+            raise NotFound('Product not found')
+        return self.catalogue_response(request, snapshot, data)
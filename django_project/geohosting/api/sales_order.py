@@ -15,7 +15,9 @@ from geohosting.models.sales_order import SalesOrder
 from geohosting.serializer.sales_order import (
     SalesOrderSerializer, SalesOrderDetailSerializer
 )
-from geohosting.validators import app_name_validator, name_validator
+from geohosting.validators import (
+    app_name_hold_validator, app_name_validator, name_validator
+)
 
 
 class SalesOrderSetView(
@@ -31,6 +33,7 @@ class SalesOrderSetView(
 
     permission_classes = (IsAuthenticated,)
     default_query_filter = []
+    cursor_ordering = ['-date', 'id']
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -45,14 +48,10 @@ class SalesOrderSetView(
             query = query.filter(
                 Q(erpnext_code__icontains=q) | Q(app_name__icontains=q)
             )
+        if self.action in ['list', 'retrieve']:
+            query = self.get_serializer_class().prefetch(query)
         return self.filter_query(self.request, query).order_by('-date')
 
-    def get_object(self):
-        """Get object."""
-        obj = super().get_object()
-        obj.update_payment_status()
-        return obj
-
 
 class SalesOrderPaymentAPI(PaymentAPI):
     """API checkout session."""
@@ -62,7 +61,7 @@ class SalesOrderPaymentAPI(PaymentAPI):
         try:
             app_name = request.data['app_name']
             name_validator(app_name)
-            app_name_validator(app_name)
+            app_name_hold_validator(app_name, request.user)
         except (ValueError, ValidationError) as e:
             return HttpResponseBadRequest(e)
         order = get_object_or_404(SalesOrder, pk=pk)
@@ -101,7 +100,7 @@ class CheckAppNameAPI(APIView):
         try:
             app_name = request.data['app_name']
             name_validator(app_name)
-            app_name_validator(app_name)
+            app_name_validator(app_name, request.user)
             return Response('OK')
         except (ValueError, ValidationError) as e:
             return HttpResponseBadRequest(e)
@@ -26,6 +26,7 @@ class TicketSetView(
 
     serializer_class = TicketSerializer
     default_query_filter = ['subject__icontains']
+    cursor_ordering = ['-updated_at', 'id']
 
     def get_queryset(self):
         """Return querysets."""
@@ -3,106 +3,51 @@ GeoHosting Controller.
 
 .. note:: Webhooks.
 """
-import json
-import re
-
-from django.http import HttpResponseBadRequest, HttpResponseServerError
+from django.http import HttpResponseBadRequest
+from django.utils import timezone
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from geohosting.models import Activity, ActivityStatus, Instance, Package
-from geohosting.models.instance import InstanceStatus
-from geohosting.models.webhook import WebhookStatus, WebhookEvent
+from geohosting.models.webhook import WebhookEvent
 
 
 class WebhookView(APIView):
-    """Webhook receiver."""
+    """Webhook receiver.
+
+    The event is only validated and saved, it is processed on background.
+    Duplicated events within the dedup window are not saved.
+    """
 
     permission_classes = (IsAuthenticated, IsAdminUser)
-    ARGO_CD = 'argocd'
 
     def post(self, request):
-        """Create new instance."""
+        """Receive webhook event."""
+        from geohosting.tasks.webhook import queue_webhook_events
         data = request.data
-        webhook = WebhookEvent.objects.create(data=data)
+        webhook = WebhookEvent(data=data)
         try:
-            status = data.get('Status', data.get('status'))
-            if status is None:
-                raise KeyError(
-                    "Neither 'Status' nor 'status' key found in data"
-                )
-            status = status.lower()
-
-            source = data.get('Source', data.get('source'))
-            if source is None:
-                raise KeyError(
-                    "Neither 'Source' nor 'source' key found in data"
-                )
-            source = source.lower()
-
-            # Don't do anything if it is still running
-            if status in [WebhookStatus.RUNNING]:
-                return Response()
-            if source != self.ARGO_CD:
-                return Response()
-
-            app_name = re.sub(
-                r'^(devops-|gsh-)', '', data['app_name']
-            )
-            webhook.app_name = app_name
-            webhook.save()
-            instance = Instance.objects.exclude(
-                status=InstanceStatus.DELETED
-            ).get(name=app_name)
-
-            # Get the activity
-            activity = Activity.objects.filter(
-                instance=instance, status=ActivityStatus.BUILD_ARGO
-            ).first()
-            if not activity:
-                activity = Activity.objects.filter(
-                    instance=instance, status=ActivityStatus.ERROR
-                ).last()
-            if not activity:
-                raise Activity.DoesNotExist()
-            webhook.activity = activity
-            webhook.save()
-
-            # If error
-            if status in [
-                WebhookStatus.ERROR, WebhookStatus.FAILED,
-                WebhookStatus.OUT_OF_SYNC, WebhookStatus.UNKNOWN
-            ]:
-                activity.note = data.get('Message', 'Error on Argo CD')
-                activity.update_status(ActivityStatus.ERROR)
-                return Response()
-
-            # If it is synced
-            if status not in [
-                WebhookStatus.SUCCESS, WebhookStatus.SUCCEEDED,
-                WebhookStatus.SYNCED, WebhookStatus.DELETED
-            ]:
-                raise KeyError('Status does not found')
-
-            # This is for deployment
-            if activity.is_deletion and status != WebhookStatus.DELETED:
-                return Response()
-            activity.note = json.dumps(data)
-            activity.update_status(ActivityStatus.SUCCESS)
-            activity.save()
-
-        except (
-                KeyError, Instance.DoesNotExist, Activity.DoesNotExist,
-                Package.DoesNotExist
-        ) as e:
+            _, _, webhook.app_name = WebhookEvent.parse(data)
+        except KeyError as e:
             webhook.note = f'{e}'
+            webhook.processed_at = timezone.now()
             webhook.save()
             return HttpResponseBadRequest(f'{e}')
-        except Exception as e:
-            print(e)
-            webhook.note = f'{e}'
-            webhook.save()
-            return HttpResponseServerError(f'{e}')
 
+        if webhook.needs_processing:
+            # Retried or re-sent notification is only processed once
+            webhook.fingerprint = WebhookEvent.make_fingerprint(data)
+            if not WebhookEvent.claim_fingerprint(webhook.fingerprint):
+                return Response()
+        else:
+            webhook.processed_at = timezone.now()
+        try:
+            webhook.save()
+        except Exception:
+            # The retried notification is received again
+            if webhook.fingerprint:
+                WebhookEvent.release_fingerprint(webhook.fingerprint)
+            raise
+        if not webhook.processed_at:
+            queue_webhook_events(webhook.app_name)
         return Response()
@@ -46,30 +46,21 @@ class CreateInstanceForm(forms.ModelForm):
         model = Activity
         fields = ['app_name', 'package', 'region', 'sales_order']
 
-    def _post_data(self):
+    def _post_data(self, package, product_cluster):
         """Refactor data."""
         activity = self.instance
         if (
                 activity.activity_type.identifier == self.activity_identifier
         ):
-            data = activity.client_data
-            try:
-                app_name = data['app_name']
-                package_id = data['package_id']
-                package = Package.objects.get(id=package_id)
-                product_cluster_id = data['product_cluster_id']
-                product_cluster = ProductCluster.objects.get(
-                    id=product_cluster_id
-                )
-                data = {
-                    'cluster': product_cluster.cluster.code,
-                    'environment': product_cluster.environment,
-                    'package': package.package_group.package_code,
-                    'app_name': app_name
-                }
-                return activity.activity_type.mapping_data(data)
-            except ProductCluster.DoesNotExist:
+            if not product_cluster:
                 raise NoClusterException()
+            data = {
+                'cluster': product_cluster.cluster.code,
+                'environment': product_cluster.environment,
+                'package': package.package_group.package_code,
+                'app_name': activity.client_data['app_name']
+            }
+            return activity.activity_type.mapping_data(data)
         raise ActivityType.DoesNotExist()
 
     def clean(self):
@@ -84,10 +75,10 @@ class CreateInstanceForm(forms.ModelForm):
                 raise Exception('No package group code')
 
             # Check activity
-            self.instance.activity_type_id = ActivityType.objects.get(
+            self.instance.activity_type = ActivityType.objects.get(
                 identifier=self.activity_identifier,
                 product=package.product
-            ).id
+            )
             self.instance.triggered_by = self.user
 
             # Check product cluster
@@ -107,7 +98,9 @@ class CreateInstanceForm(forms.ModelForm):
             self.instance.client_data = data
 
             # Get post data
-            self.instance.post_data = self._post_data()
+            self.instance.post_data = self._post_data(
+                package, product_cluster
+            )
         except AttributeError:
             raise forms.ValidationError('User is missing.')
         except ProductCluster.DoesNotExist:
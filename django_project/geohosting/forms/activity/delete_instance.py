@@ -22,21 +22,20 @@ class DeletingInstanceForm(forms.ModelForm):
     """
 
     activity_identifier = ActivityTypeTerm.DELETE_INSTANCE.value
-    application = forms.ModelChoiceField(queryset=Instance.objects.all())
+    application = forms.ModelChoiceField(
+        queryset=Instance.objects.select_related('cluster', 'price__product')
+    )
 
     class Meta:  # noqa: D106
         model = Activity
         fields = ['application']
 
-    def _post_data(self, application):
+    def _post_data(self, application, product_cluster):
         """Refactor data."""
         activity = self.instance
         if (
                 activity.activity_type.identifier == self.activity_identifier
         ):
-            product_cluster = application.price.product.get_product_cluster(
-                Region.default_region()
-            )
             data = {
                 'cluster': application.cluster.code,
                 'environment': product_cluster.environment,
@@ -65,10 +64,10 @@ class DeletingInstanceForm(forms.ModelForm):
                 raise Exception('Instance is already being deleted.')
 
             product = application.price.product
-            self.instance.activity_type_id = ActivityType.objects.get(
+            self.instance.activity_type = ActivityType.objects.get(
                 identifier=self.activity_identifier,
                 product=product
-            ).id
+            )
             self.instance.instance = application
             self.instance.triggered_by = self.user
 
@@ -86,7 +85,9 @@ class DeletingInstanceForm(forms.ModelForm):
             self.instance.client_data = data
 
             # Get post data
-            self.instance.post_data = self._post_data(application)
+            self.instance.post_data = self._post_data(
+                application, product_cluster
+            )
         except AttributeError:
             raise forms.ValidationError('User is missing.')
         except ActivityType.DoesNotExist:
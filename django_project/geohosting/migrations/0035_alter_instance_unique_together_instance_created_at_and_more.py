@@ -2,12 +2,29 @@
 
 from django.db import migrations, models
 import django.db.models.deletion
-from geohosting.models.activity import Activity
 
 
 def run(apps, schema_editor):
-    for activity in Activity.objects.all():
-        activity.save()
+    """Fill instance dates and the instance of sales orders."""
+    Activity = apps.get_model('geohosting', 'Activity')
+    Instance = apps.get_model('geohosting', 'Instance')
+    SalesOrder = apps.get_model('geohosting', 'SalesOrder')
+    activities = Activity.objects.filter(
+        instance__isnull=False
+    ).select_related('instance').only(
+        'id', 'triggered_at', 'instance_id', 'sales_order_id',
+        'instance__created_at'
+    )
+    for activity in activities:
+        if not activity.instance.created_at:
+            Instance.objects.filter(id=activity.instance_id).update(
+                created_at=activity.triggered_at,
+                modified_at=activity.triggered_at
+            )
+        if activity.sales_order_id:
+            SalesOrder.objects.filter(id=activity.sales_order_id).update(
+                instance_id=activity.instance_id
+            )
 
 
 class Migration(migrations.Migration):
@@ -1,13 +1,12 @@
 # Generated by Django 4.2.15 on 2025-03-14 11:02
 
 from django.db import migrations, models
-from geohosting.models.instance import Instance, InstanceStatus
+
 
 def run(apps, schema_editor):
-    Instance.objects.filter(status='Terminating').update(
-        status=InstanceStatus.DELETING)
-    Instance.objects.filter(status='Terminated').update(
-        status=InstanceStatus.DELETED)
+    Instance = apps.get_model('geohosting', 'Instance')
+    Instance.objects.filter(status='Terminating').update(status='Deleting')
+    Instance.objects.filter(status='Terminated').update(status='Deleted')
 
 
 class Migration(migrations.Migration):
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.15 on 2026-10-18 16:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geohosting', '0037_webhookevent_activity_webhookevent_app_name_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ErpSyncState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=256, unique=True)),
+                ('last_modified', models.CharField(blank=True, help_text='The latest modified time of the rows on erp that have been synced.', max_length=64, null=True)),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+                ('last_full_synced_at', models.DateTimeField(blank=True, help_text='Last time all rows are fetched and the rows deleted on erp are removed.', null=True)),
+            ],
+        ),
+    ]
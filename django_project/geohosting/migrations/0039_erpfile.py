@@ -0,0 +1,25 @@
+# Generated by Django 4.2.15 on 2026-10-18 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geohosting', '0038_erpsyncstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ErpFile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_path', models.CharField(help_text='Path of the file on erp.', max_length=512, unique=True)),
+                ('path', models.CharField(help_text='Path of the file on the storage.', max_length=512)),
+                ('content_hash', models.CharField(db_index=True, help_text='SHA256 of the content of file.', max_length=64)),
+                ('etag', models.CharField(blank=True, max_length=256, null=True)),
+                ('last_modified', models.CharField(blank=True, max_length=256, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.15 on 2026-10-18 16:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geohosting', '0039_erpfile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstanceSweep',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('shards', models.IntegerField(default=0)),
+                ('total', models.IntegerField(default=0, help_text='Number of instances that should be checked.')),
+                ('probed', models.IntegerField(default=0)),
+                ('changed', models.IntegerField(default=0)),
+                ('stragglers', models.JSONField(blank=True, default=list, help_text='Instance ids that were not checked within the budget.')),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.15 on 2026-10-18 16:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geohosting', '0040_instancesweep'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='instance',
+            name='next_probe_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Time when the server is checked next.', null=True),
+        ),
+        migrations.AddField(
+            model_name='instance',
+            name='probe_streak',
+            field=models.PositiveIntegerField(default=0, help_text='Number of checks since the status changed.'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.15 on 2026-10-18 16:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geohosting', '0041_instance_next_probe_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstanceUptime',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'hour'), ('day', 'day')], max_length=8)),
+                ('start', models.DateTimeField()),
+                ('probes', models.PositiveIntegerField(default=0)),
+                ('online_probes', models.PositiveIntegerField(default=0)),
+                ('latency_avg', models.FloatField(blank=True, help_text='Average latency in milliseconds.', null=True)),
+                ('latency_p95', models.FloatField(blank=True, help_text='95th percentile of latency in milliseconds.', null=True)),
+                ('instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='geohosting.instance')),
+            ],
+            options={
+                'ordering': ['start'],
+                'unique_together': {('instance', 'period', 'start')},
+            },
+        ),
+        migrations.CreateModel(
+            name='InstanceProbe',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('probed_at', models.DateTimeField()),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('latency', models.FloatField(blank=True, help_text='Latency in milliseconds.', null=True)),
+                ('online', models.BooleanField(default=False)),
+                ('instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='geohosting.instance')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['probed_at'], name='geohosting__probed__8d881e_idx')],
+            },
+        ),
+    ]
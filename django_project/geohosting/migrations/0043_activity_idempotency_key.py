@@ -0,0 +1,35 @@
+# Generated by Django 4.2.15 on 2026-10-18 16:19
+
+from django.db import migrations, models
+import uuid
+
+
+def generate_idempotency_key(apps, schema_editor):
+    """Generate unique key for existing activities."""
+    Activity = apps.get_model('geohosting', 'Activity')
+    for activity in Activity.objects.all():
+        activity.idempotency_key = uuid.uuid4()
+        activity.save(update_fields=['idempotency_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geohosting', '0042_instance_uptime'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of attempts to post the activity to jenkins.'),
+        ),
+        migrations.AddField(
+            model_name='activity',
+            name='idempotency_key',
+            field=models.UUIDField(editable=False, help_text='Key of the activity run, it is run once.', null=True),
+        ),
+        migrations.RunPython(
+            generate_idempotency_key, migrations.RunPython.noop
+        ),
+    ]
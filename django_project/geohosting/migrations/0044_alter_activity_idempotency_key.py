@@ -0,0 +1,19 @@
+# Generated by Django 4.2.15 on 2026-10-18 16:19
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geohosting', '0043_activity_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activity',
+            name='idempotency_key',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, help_text='Key of the activity run, it is run once.', unique=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.15 on 2026-10-18 16:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geohosting', '0044_alter_activity_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='jenkins_build_url',
+            field=models.CharField(blank=True, editable=False, max_length=256, null=True),
+        ),
+        migrations.AddField(
+            model_name='activity',
+            name='jenkins_result',
+            field=models.CharField(blank=True, editable=False, help_text='Result of the jenkins build or the queue item.', max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='activity',
+            name='next_poll_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, help_text='When the jenkins build is polled next.', null=True),
+        ),
+        migrations.AddField(
+            model_name='activity',
+            name='polls',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of polls of the jenkins queue item or build.'),
+        ),
+    ]
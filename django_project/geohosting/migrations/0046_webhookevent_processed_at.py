@@ -0,0 +1,28 @@
+# Generated by Django 4.2.15 on 2026-10-18 16:31
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_processed(apps, schema_editor):
+    """Mark existing events processed, they were processed on receive."""
+    WebhookEvent = apps.get_model('geohosting', 'WebhookEvent')
+    WebhookEvent.objects.update(processed_at=F('triggered_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geohosting', '0045_activity_jenkins_poll'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookevent',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(
+            mark_processed, migrations.RunPython.noop
+        ),
+    ]
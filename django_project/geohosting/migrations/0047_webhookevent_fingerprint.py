@@ -0,0 +1,18 @@
+# Generated by Django 4.2.15 on 2026-10-18 16:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geohosting', '0046_webhookevent_processed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookevent',
+            name='fingerprint',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Hash of app name, status, source and revision.', max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.15 on 2026-10-18 16:34
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def backfill(apps, schema_editor):
+    """Backfill app name of activities and status of webhook events."""
+    Activity = apps.get_model('geohosting', 'Activity')
+    WebhookEvent = apps.get_model('geohosting', 'WebhookEvent')
+
+    activities = []
+    for activity in Activity.objects.only('client_data').iterator(
+            chunk_size=BATCH_SIZE
+    ):
+        if isinstance(activity.client_data, dict):
+            activity.app_name = activity.client_data.get('app_name')
+            activities.append(activity)
+        if len(activities) >= BATCH_SIZE:
+            Activity.objects.bulk_update(activities, ['app_name'])
+            activities = []
+    Activity.objects.bulk_update(activities, ['app_name'])
+
+    events = []
+    for event in WebhookEvent.objects.only('data').iterator(
+            chunk_size=BATCH_SIZE
+    ):
+        if isinstance(event.data, dict):
+            status = event.data.get('Status', event.data.get('status'))
+            if isinstance(status, str):
+                event.status = status.lower()
+                events.append(event)
+        if len(events) >= BATCH_SIZE:
+            WebhookEvent.objects.bulk_update(events, ['status'])
+            events = []
+    WebhookEvent.objects.bulk_update(events, ['status'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geohosting', '0047_webhookevent_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='app_name',
+            field=models.CharField(blank=True, db_index=True, help_text='App name of the client data, kept in sync on save.', max_length=256, null=True),
+        ),
+        migrations.AddField(
+            model_name='webhookevent',
+            name='status',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Lower case status of the data, kept in sync on save.', max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
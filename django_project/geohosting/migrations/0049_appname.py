@@ -0,0 +1,50 @@
+# Generated by Django 4.2.15 on 2026-10-18 16:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def take_app_names(apps, schema_editor):
+    """Take names of instances and running activities."""
+    AppName = apps.get_model('geohosting', 'AppName')
+    Instance = apps.get_model('geohosting', 'Instance')
+    Activity = apps.get_model('geohosting', 'Activity')
+    names = set(
+        Instance.objects.exclude(status='Deleted').values_list(
+            'name', flat=True
+        )
+    )
+    names |= set(
+        Activity.objects.filter(app_name__isnull=False).exclude(
+            status__in=['ERROR', 'SUCCESS']
+        ).values_list('app_name', flat=True)
+    )
+    AppName.objects.bulk_create(
+        [AppName(name=name) for name in names if name],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('geohosting', '0048_denormalized_lookup_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppName',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=256, unique=True)),
+                ('expires_at', models.DateTimeField(blank=True, help_text='When the hold expires, empty when the name is taken.', null=True)),
+                ('held_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('name',),
+            },
+        ),
+        migrations.RunPython(take_app_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.15 on 2026-10-18 17:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geohosting', '0049_appname'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='posting_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When the activity started to be posted to jenkins, it is cleared when the result of the post is saved.', null=True),
+        ),
+    ]
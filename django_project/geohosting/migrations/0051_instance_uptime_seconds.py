@@ -0,0 +1,41 @@
+# Generated by Django 4.2.15 on 2026-10-18 17:07
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def weight_rollups(apps, schema_editor):
+    """Weight existing rollups equally, by the default minimum interval."""
+    InstanceUptime = apps.get_model('geohosting', 'InstanceUptime')
+    InstanceUptime.objects.update(
+        observed_seconds=F('probes') * 60,
+        online_seconds=F('online_probes') * 60
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geohosting', '0050_activity_posting_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='instanceprobe',
+            name='interval',
+            field=models.FloatField(blank=True, help_text='Seconds until the next probe is scheduled, that are covered by this probe.', null=True),
+        ),
+        migrations.AddField(
+            model_name='instanceuptime',
+            name='observed_seconds',
+            field=models.FloatField(default=0, help_text='Seconds that are covered by the probes.'),
+        ),
+        migrations.AddField(
+            model_name='instanceuptime',
+            name='online_seconds',
+            field=models.FloatField(default=0, help_text='Seconds that are covered by the online probes.'),
+        ),
+        migrations.RunPython(
+            weight_rollups, migrations.RunPython.noop
+        ),
+    ]
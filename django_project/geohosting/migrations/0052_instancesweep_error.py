@@ -0,0 +1,18 @@
+# Generated by Django 4.2.15 on 2026-10-18 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geohosting', '0051_instance_uptime_seconds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='instancesweep',
+            name='error',
+            field=models.TextField(blank=True, help_text='Error when the sweep is failed.', null=True),
+        ),
+    ]
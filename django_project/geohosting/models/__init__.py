@@ -7,12 +7,14 @@ GeoHosting.
 
 from geohosting.models.activity import *
 from geohosting.models.agreement import *
+from geohosting.models.app_name import *
 from geohosting.models.cluster import *
 from geohosting.models.company import *
 from geohosting.models.country import *
 from geohosting.models.erp import *
 from geohosting.models.erp_company import *
 from geohosting.models.instance import *
+from geohosting.models.instance_uptime import *
 from geohosting.models.log import *
 from geohosting.models.package import *
 from geohosting.models.product import *
@@ -6,11 +6,17 @@ GeoHosting.
 """
 
 import re
+import threading
+import time
+import uuid
 
+import requests
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
 from django.db.models import Q
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
 
@@ -21,12 +27,16 @@ from geohosting.models.product import Product, ProductCluster
 from geohosting.validators import regex_name, regex_name_error
 from geohosting_controller.connection import request_post
 from geohosting_controller.exceptions import (
-    ConnectionErrorException, ActivityException
+    ActivityException, ActivityRetryException
 )
 from geohosting_controller.variables import ActivityTypeTerm
 
 User = get_user_model()
 
+# Compiled mappings of activity type in process, by id
+_mappings = {}
+_mappings_lock = threading.Lock()
+
 
 class ActivityType(models.Model):
     """Activity type contains URL."""
@@ -59,18 +69,52 @@ class ActivityType(models.Model):
         verbose_name = 'Jenkins Activity Type'
         unique_together = ('identifier', 'product')
 
+    @staticmethod
+    def mapping_cache_key(activity_type_id):
+        """Return cache key of the mapping."""
+        return f'activity-type-mapping:{activity_type_id}'
+
+    @staticmethod
+    def invalidate_mapping(activity_type_id):
+        """Remove the compiled mapping from the caches."""
+        with _mappings_lock:
+            _mappings.pop(activity_type_id, None)
+        cache.delete(ActivityType.mapping_cache_key(activity_type_id))
+
+    @property
+    def mapping(self) -> dict:
+        """Return compiled mapping of geohosting key to jenkins key.
+
+        It is loaded in one query and cached in process and in the cache.
+        """
+        now = time.monotonic()
+        with _mappings_lock:
+            compiled = _mappings.get(self.id)
+        if compiled and compiled[0] > now:
+            return compiled[1]
+
+        key = ActivityType.mapping_cache_key(self.id)
+        mapping = cache.get(key)
+        if mapping is None:
+            mapping = dict(
+                ActivityTypeMapping.objects.filter(
+                    activity_type_id=self.id
+                ).values_list('geohosting_key', 'jenkins_key')
+            )
+            cache.set(key, mapping, timeout=None)
+        with _mappings_lock:
+            _mappings[self.id] = (
+                now + settings.ACTIVITY_MAPPING_LOCAL_TTL, mapping
+            )
+        return mapping
+
     def mapping_data(self, data: dict):
         """Map data."""
-        new_data = {}
-        for key, value in data.items():
-            try:
-                jenkins_key = self.activitytypemapping_set.get(
-                    geohosting_key=key
-                ).jenkins_key
-                new_data[jenkins_key] = value
-            except ActivityTypeMapping.DoesNotExist:
-                pass
-        return new_data
+        mapping = self.mapping
+        return {
+            mapping[key]: value for key, value in data.items()
+            if key in mapping
+        }
 
 
 class ActivityTypeMapping(models.Model):
@@ -95,6 +139,14 @@ class ActivityStatus:
     SUCCESS = 'SUCCESS'
     ERROR = 'ERROR'
 
+    # Statuses that can be reached from a status
+    TRANSITIONS = {
+        RUNNING: [BUILD_ARGO, ERROR],
+        BUILD_ARGO: [SUCCESS, ERROR],
+        SUCCESS: [],
+        ERROR: []
+    }
+
 
 class Activity(models.Model):
     """Activity of instance."""
@@ -121,6 +173,10 @@ class Activity(models.Model):
         null=True, blank=True,
         help_text='Data received from client.', editable=False
     )
+    app_name = models.CharField(
+        max_length=256, null=True, blank=True, db_index=True,
+        help_text='App name of the client data, kept in sync on save.'
+    )
     post_data = models.JSONField(
         null=True, blank=True,
         help_text='Data posted to jenkins.', editable=False
@@ -146,6 +202,38 @@ class Activity(models.Model):
         max_length=256,
         null=True, blank=True, editable=False
     )
+    jenkins_build_url = models.CharField(
+        max_length=256,
+        null=True, blank=True, editable=False
+    )
+    jenkins_result = models.CharField(
+        max_length=64,
+        null=True, blank=True, editable=False,
+        help_text='Result of the jenkins build or the queue item.'
+    )
+    next_poll_at = models.DateTimeField(
+        null=True, blank=True, editable=False, db_index=True,
+        help_text='When the jenkins build is polled next.'
+    )
+    polls = models.PositiveIntegerField(
+        default=0, editable=False,
+        help_text='Number of polls of the jenkins queue item or build.'
+    )
+    idempotency_key = models.UUIDField(
+        default=uuid.uuid4, unique=True, editable=False,
+        help_text='Key of the activity run, it is run once.'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0, editable=False,
+        help_text='Number of attempts to post the activity to jenkins.'
+    )
+    posting_at = models.DateTimeField(
+        null=True, blank=True, editable=False,
+        help_text=(
+            'When the activity started to be posted to jenkins, it is '
+            'cleared when the result of the post is saved.'
+        )
+    )
 
     # The sales order of the activity
     sales_order = models.ForeignKey(
@@ -206,6 +294,14 @@ class Activity(models.Model):
         if self.status == ActivityStatus.ERROR:
             self.error()
 
+    def transition(self, status, note=None):
+        """Change status following ActivityStatus.TRANSITIONS."""
+        if status not in ActivityStatus.TRANSITIONS[self.status]:
+            raise ActivityException(
+                f'Activity can not change from {self.status} to {status}.'
+            )
+        self.update_status(status, note)
+
     def execute(self):
         """Execute script."""
         if self.is_creation:
@@ -215,35 +311,68 @@ class Activity(models.Model):
             # Delete instance
             self.delete_instance()
 
-    def run(self):
-        """Run the activity."""
+    def post(self):
+        """Post the activity to jenkins.
+
+        It does not change the activity, so it is called outside of the
+        lock of the row.
+
+        Returns:
+            tuple: Status, note and jenkins queue url of the post.
+
+        Raises:
+            ActivityRetryException: When jenkins can not be reached or
+                returns server error, the activity stays RUNNING.
+        """
         try:
             response = request_post(
                 url=self.activity_type.url,
                 data=self.post_data
             )
-            if response.status_code != 201:
-                self.update_status(
-                    ActivityStatus.ERROR, response.content
-                )
-                raise ConnectionErrorException(
-                    response.content, response=response
-                )
-            self.jenkins_queue_url = response.headers['Location']
-            self.update_status(ActivityStatus.BUILD_ARGO)
-            self.execute()
+        except requests.exceptions.RequestException as e:
+            raise ActivityRetryException(f'{e}')
+        except Exception as e:
+            return ActivityStatus.ERROR, f'{e}', None
+
+        if response.status_code >= 500:
+            raise ActivityRetryException(
+                f'{response.status_code} - {response.text}'
+            )
+        if response.status_code != 201:
+            return ActivityStatus.ERROR, response.content, None
+        try:
+            return (
+                ActivityStatus.BUILD_ARGO, None, response.headers['Location']
+            )
+        except KeyError as e:
+            return ActivityStatus.ERROR, f'Missing header {e}', None
+
+    def posted(self, status, note=None):
+        """Run the side effects of the status after the post is saved."""
+        try:
+            self.update_status(status, note)
+            if status == ActivityStatus.BUILD_ARGO:
+                self.execute()
         except Exception as e:
-            self.update_status(
-                ActivityStatus.ERROR, f'{e}'
+            self.update_status(ActivityStatus.ERROR, f'{e}')
+
+    def dispatch(self):
+        """Run the activity on background after it is committed."""
+        from geohosting.tasks.activity import run_activity
+        transaction.on_commit(
+            lambda: run_activity.apply_async(
+                args=(self.id, str(self.idempotency_key)),
+                task_id=f'activity-{self.idempotency_key}'
             )
+        )
 
     def save(self, *args, **kwargs):
         """Override importer saved."""
         created = not self.pk
+        self.app_name = (self.client_data or {}).get('app_name')
         super(Activity, self).save(*args, **kwargs)
         if created:
-            self.update_status(ActivityStatus.RUNNING)
-            self.run()
+            self.dispatch()
         else:
             self.execute()
 
@@ -294,10 +423,25 @@ class Activity(models.Model):
             LogTracker.success(self, 'DELETING')
             self.instance.deleting()
 
+    @staticmethod
+    def due_for_poll():
+        """Return activities that are building on jenkins and due to poll.
+
+        The poll stops when the build is finished, the successful build is
+        then completed by the argo webhook.
+        """
+        return Activity.objects.filter(
+            status=ActivityStatus.BUILD_ARGO,
+            jenkins_queue_url__isnull=False,
+            jenkins_result__isnull=True
+        ).filter(
+            Q(next_poll_at__isnull=True) | Q(next_poll_at__lte=timezone.now())
+        )
+
     @staticmethod
     def running_activities(app_name):
         """Return running activities."""
-        return Activity.objects.filter(client_data__app_name=app_name).exclude(
+        return Activity.objects.filter(app_name=app_name).exclude(
             Q(status=ActivityStatus.ERROR) |
             Q(status=ActivityStatus.SUCCESS)
         )
@@ -314,3 +458,17 @@ def save_instance_to_sales_order(sender, instance, created, **kwargs):
     if instance.instance and instance.sales_order:
         instance.sales_order.instance = instance.instance
         instance.sales_order.save()
+
+
+@receiver(post_save, sender=ActivityType)
+@receiver(post_delete, sender=ActivityType)
+def invalidate_activity_type_mapping(sender, instance, **kwargs):
+    """Invalidate the compiled mapping when activity type changed."""
+    ActivityType.invalidate_mapping(instance.id)
+
+
+@receiver(post_save, sender=ActivityTypeMapping)
+@receiver(post_delete, sender=ActivityTypeMapping)
+def invalidate_activity_type_mapping_row(sender, instance, **kwargs):
+    """Invalidate the compiled mapping when the mapping changed."""
+    ActivityType.invalidate_mapping(instance.activity_type_id)
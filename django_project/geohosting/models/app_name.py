@@ -0,0 +1,119 @@
+# coding=utf-8
+"""
+GeoHosting.
+
+.. note:: Availability index of app names.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from geohosting.models.activity import Activity
+from geohosting.models.instance import Instance, InstanceStatus
+
+User = get_user_model()
+
+
+class AppName(models.Model):
+    """App name that is taken or held.
+
+    The name is taken while there is an instance that is not deleted or a
+    running activity with the name. A hold is a short reservation of a
+    user during checkout, it has expires_at.
+    """
+
+    name = models.CharField(
+        max_length=256, unique=True
+    )
+    held_by = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        null=True, blank=True
+    )
+    expires_at = models.DateTimeField(
+        null=True, blank=True,
+        help_text='When the hold expires, empty when the name is taken.'
+    )
+
+    class Meta:  # noqa
+        ordering = ('name',)
+
+    def __str__(self):
+        """Return string of app name."""
+        return self.name
+
+    @staticmethod
+    def is_available(name, user=None) -> bool:
+        """Return if the name is available.
+
+        Holds of other users are only checked when the user is given.
+        """
+        query = AppName.objects.filter(name=name)
+        if user is None:
+            query = query.filter(expires_at__isnull=True)
+        else:
+            query = query.filter(
+                Q(expires_at__isnull=True) |
+                Q(expires_at__gt=timezone.now()) & ~Q(held_by=user)
+            )
+        return not query.exists()
+
+    @staticmethod
+    def hold(name, user) -> bool:
+        """Hold the name for the user, return False when it is taken."""
+        current_time = timezone.now()
+        expires_at = current_time + timedelta(
+            seconds=settings.APP_NAME_HOLD_SECONDS
+        )
+        with transaction.atomic():
+            AppName.objects.filter(
+                name=name, expires_at__lte=current_time
+            ).delete()
+            if AppName.objects.filter(
+                    name=name, held_by=user, expires_at__isnull=False
+            ).update(expires_at=expires_at):
+                return True
+            try:
+                with transaction.atomic():
+                    AppName.objects.create(
+                        name=name, held_by=user, expires_at=expires_at
+                    )
+            except IntegrityError:
+                return False
+        return True
+
+    @staticmethod
+    def sync(name):
+        """Take or release the name following instances and activities."""
+        if not name:
+            return
+        taken = Instance.objects.filter(name=name).exclude(
+            status=InstanceStatus.DELETED
+        ).exists() or Activity.running_activities(name).exists()
+        if taken:
+            AppName.objects.update_or_create(
+                name=name, defaults={'held_by': None, 'expires_at': None}
+            )
+        else:
+            AppName.objects.filter(
+                name=name, expires_at__isnull=True
+            ).delete()
+
+
+@receiver(post_save, sender=Instance)
+@receiver(post_delete, sender=Instance)
+def sync_instance_app_name(sender, instance, **kwargs):
+    """Sync app name of instance."""
+    AppName.sync(instance.name)
+
+
+@receiver(post_save, sender=Activity)
+def sync_activity_app_name(sender, instance, **kwargs):
+    """Sync app name of activity."""
+    AppName.sync(instance.app_name)
@@ -5,6 +5,9 @@ GeoHosting.
 .. note:: Model for ERP.
 """
 
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
 from django.utils.timezone import now
 
@@ -41,3 +44,95 @@ class ErpRequestLog(models.Model):
     response_text = models.TextField(
         null=True, blank=True
     )
+
+
+class ErpSyncState(models.Model):
+    """State of syncing data from erp for a model.
+
+    It keeps the high-water mark of the modified time on erp,
+    so next sync just fetches the rows that are changed since then.
+    """
+
+    model_name = models.CharField(
+        max_length=256, unique=True
+    )
+    last_modified = models.CharField(
+        max_length=64, null=True, blank=True,
+        help_text=(
+            'The latest modified time of the rows on erp '
+            'that have been synced.'
+        )
+    )
+    last_synced_at = models.DateTimeField(
+        null=True, blank=True
+    )
+    last_full_synced_at = models.DateTimeField(
+        null=True, blank=True,
+        help_text=(
+            'Last time all rows are fetched '
+            'and the rows deleted on erp are removed.'
+        )
+    )
+
+    def __str__(self):
+        """Return model name."""
+        return self.model_name
+
+    @staticmethod
+    def for_model(model):
+        """Return state of the model."""
+        state, _ = ErpSyncState.objects.get_or_create(
+            model_name=model.__name__
+        )
+        return state
+
+    @property
+    def is_full_sync_due(self):
+        """Return if full sync is needed."""
+        if not self.last_full_synced_at:
+            return True
+        return self.last_full_synced_at + timedelta(
+            hours=settings.ERPNEXT_FULL_SYNC_HOURS
+        ) <= now()
+
+    def synced(self, last_modified, full=False):
+        """Save state after sync is succeeded."""
+        self.last_modified = last_modified
+        self.last_synced_at = now()
+        if full:
+            self.last_full_synced_at = self.last_synced_at
+        self.save()
+
+
+class ErpFile(models.Model):
+    """File that is downloaded from erp.
+
+    It is keyed by the source path and the content hash, so the same
+    content is not downloaded and saved to the storage again.
+    """
+
+    source_path = models.CharField(
+        max_length=512, unique=True,
+        help_text='Path of the file on erp.'
+    )
+    path = models.CharField(
+        max_length=512,
+        help_text='Path of the file on the storage.'
+    )
+    content_hash = models.CharField(
+        max_length=64, db_index=True,
+        help_text='SHA256 of the content of file.'
+    )
+    etag = models.CharField(
+        max_length=256, null=True, blank=True
+    )
+    last_modified = models.CharField(
+        max_length=256, null=True, blank=True
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True
+    )
+
+    def __str__(self):
+        """Return source path."""
+        return self.source_path
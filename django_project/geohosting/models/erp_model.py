@@ -7,8 +7,10 @@ GeoHosting.
 
 from django.db import models
 
+from geohosting.models.erp import ErpSyncState
+from geohosting.models.reconcile import BulkReconciler
 from geohosting.utils.erpnext import (
-    fetch_erpnext_data, post_to_erpnext, put_to_erpnext
+    ErpNextPaginator, post_to_erpnext, put_to_erpnext
 )
 
 
@@ -58,23 +60,53 @@ class ErpModel(models.Model):
         return result
 
     @classmethod
-    def sync_data(cls):
-        """Sync data from erpnext to django that has erpnext code."""
+    def sync_data(cls, full: bool = False):
+        """Sync data from erpnext to django that has erpnext code.
+
+        Only the rows that are modified since the last sync are fetched.
+        Periodically (or when full is True) all rows are fetched and
+        the rows that are deleted on erpnext are removed, only when the
+        number of rows equals the count on erpnext before and after the
+        fetch. Otherwise nothing is removed and the full sync is retried
+        on the next sync.
+        """
+        state = ErpSyncState.for_model(cls)
+        full = full or state.is_full_sync_due or not state.last_modified
+        filters = None
+        if not full:
+            filters = [['modified', '>=', state.last_modified]]
         try:
-            data = fetch_erpnext_data(cls().doc_type)
             field_names = [
                 field.name for field in cls._meta.get_fields() if
                 field.editable and not field.auto_created
                 and field.name != 'erpnext_code'
             ]
-            for _data in data:
-                cls.objects.update_or_create(
-                    erpnext_code=_data[cls.id_field_in_erpnext],
-                    defaults={
-                        key: value for key, value in _data.items() if
-                        key in field_names
-                    }
+            last_modified = state.last_modified
+            rows = {}
+            paginator = ErpNextPaginator(cls().doc_type, filters=filters)
+            for _data in paginator:
+                rows[_data[cls.id_field_in_erpnext]] = {
+                    key: value for key, value in _data.items() if
+                    key in field_names
+                }
+                modified = _data.get('modified')
+                if modified and (
+                        not last_modified or modified > last_modified
+                ):
+                    last_modified = modified
+
+            # Rows that are deleted on erpnext are removed on full sync,
+            # when no row can be missed
+            if full:
+                full = (
+                        len(rows) == paginator.total and
+                        paginator.count() == paginator.total
                 )
+            result = BulkReconciler(cls.objects.all()).reconcile(
+                rows, delete_missing=full
+            )
+            state.synced(last_modified, full=full)
+            return result
         except Exception as e:
             print(e)
             pass
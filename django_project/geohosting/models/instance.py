@@ -5,12 +5,14 @@ GeoHosting.
 .. note:: Instance model.
 """
 
-import requests
+from datetime import timedelta
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.mail import EmailMessage
 from django.db import models
 from django.template.loader import render_to_string
+from django.utils import timezone
 
 from core.models.preferences import Preferences
 from core.settings.base import FRONTEND_URL
@@ -19,7 +21,10 @@ from geohosting.models.company import Company
 from geohosting.models.log import LogTracker
 from geohosting.models.package import Package
 from geohosting.models.product import ProductCluster
-from geohosting.utils.vault import get_credentials
+from geohosting.utils.instance_probe import InstanceProber
+from geohosting.utils.vault import (
+    get_credentials, get_credentials_many, invalidate_credentials
+)
 
 User = get_user_model()
 
@@ -79,6 +84,17 @@ class Instance(models.Model):
         auto_now=True,
         null=True, blank=True
     )
+    next_probe_at = models.DateTimeField(
+        null=True, blank=True, db_index=True,
+        help_text='Time when the server is checked next.'
+    )
+    probe_streak = models.PositiveIntegerField(
+        default=0,
+        help_text='Number of checks since the status changed.'
+    )
+
+    # Credentials are sent after the online status is saved
+    credentials_pending = False
 
     def __str__(self):
         """Return activity type name."""
@@ -112,13 +128,42 @@ class Instance(models.Model):
         """Return url."""
         return f'https://{self.name}.{self.cluster.domain}'
 
-    def _change_status(self, status):
-        """Change status."""""
+    @staticmethod
+    def due_for_probe():
+        """Return instances that are due to be checked.
+
+        Instances that are due within the slack are included, so a sweep
+        that runs a bit earlier than the probe is due does not skip it.
+        Deleting and deleted instances are not probed.
+        """
+        due_at = timezone.now() + timedelta(
+            seconds=settings.INSTANCE_PROBE_SCHEDULE_SLACK
+        )
+        return Instance.objects.exclude(
+            status__in=[InstanceStatus.DELETING, InstanceStatus.DELETED]
+        ).filter(
+            models.Q(next_probe_at__isnull=True) |
+            models.Q(next_probe_at__lte=due_at)
+        )
+
+    def _change_status(self, status, commit=True):
+        """Change status.
+
+        When commit is False, the status is only changed on the object,
+        saving it and the log is left to the caller.
+        """
         if self.status == status:
             return
 
+        if not commit:
+            self.status = status
+            return
+
         LogTracker.error(self, f'Server: {status}')
         self.status = status
+        # Check the server on the next sweep
+        self.next_probe_at = None
+        self.probe_streak = 0
         self.save()
 
     def starting_up(self):
@@ -127,8 +172,13 @@ class Instance(models.Model):
             return
         self._change_status(InstanceStatus.STARTING_UP)
 
-    def online(self):
-        """Make instance online."""
+    def online(self, commit=True):
+        """Make instance online.
+
+        When commit is False, the credentials are not sent yet,
+        credentials_pending is set and sending them is left to the caller
+        after saving.
+        """
         if self.is_lock:
             return
 
@@ -138,11 +188,14 @@ class Instance(models.Model):
 
         # When starting up, send credential
         if self.status == InstanceStatus.STARTING_UP:
-            self.send_credentials()
+            if commit:
+                self.send_credentials()
+            else:
+                self.credentials_pending = True
 
-        self._change_status(InstanceStatus.ONLINE)
+        self._change_status(InstanceStatus.ONLINE, commit=commit)
 
-    def offline(self):
+    def offline(self, commit=True):
         """Make instance offline."""
         if self.status in [
             InstanceStatus.DEPLOYING,
@@ -153,7 +206,14 @@ class Instance(models.Model):
             return
         if self.is_lock:
             return
-        self._change_status(InstanceStatus.OFFLINE)
+        self._change_status(InstanceStatus.OFFLINE, commit=commit)
+
+    def apply_probe(self, result, commit=True):
+        """Change status from the result of probe."""
+        if result.is_online:
+            self.online(commit=commit)
+        else:
+            self.offline(commit=commit)
 
     def deleting(self):
         """Make instance deleting."""
@@ -171,6 +231,34 @@ class Instance(models.Model):
             self.cancel_subscription()
         except Exception as e:
             LogTracker.error(self, f'Cancel subscription : {e}')
+        try:
+            self.invalidate_credentials()
+        except Exception as e:
+            LogTracker.error(self, f'Invalidate credentials : {e}')
+
+    @property
+    def vault_url(self):
+        """Return vault url of the package group, None without group."""
+        package_group = self.price.package_group
+        if not package_group:
+            return None
+        return package_group.vault_url
+
+    def invalidate_credentials(self):
+        """Remove cached credentials, e.g. when they are rotated."""
+        vault_url = self.vault_url
+        if vault_url:
+            invalidate_credentials(vault_url, self.name)
+
+    @staticmethod
+    def prefetch_credentials(instances):
+        """Fetch credentials of instances concurrently into the cache."""
+        items = []
+        for instance in instances:
+            vault_url = instance.vault_url
+            if vault_url:
+                items.append((vault_url, instance.name))
+        get_credentials_many(items)
 
     @property
     def credentials(self):
@@ -202,29 +290,19 @@ class Instance(models.Model):
         if self.status in [InstanceStatus.DELETING]:
             if WebhookEvent.objects.filter(
                     activity__instance=self,
-                    data__Status=WebhookStatus.DELETED
+                    status=WebhookStatus.DELETED
             ).exists():
                 self.deleted()
             return
 
+        prober = InstanceProber()
         try:
-            print(self.url)
-            response = requests.head(self.url)
-            print(response.status_code)
-            if response.status_code in [200, 302]:
-                self.online()
-            else:
-                LogTracker.error(
-                    self,
-                    (
-                        f'Server - {self.url}: '
-                        f'{response.status_code} - {response.text}'
-                    )
-                )
-                self.offline()
-        except requests.exceptions.ConnectionError as e:
-            LogTracker.error(self, f'Server - {self.url}: {e}')
-            self.offline()
+            result = prober.probe(self)
+        finally:
+            prober.close()
+        if not result.is_online:
+            LogTracker.error(self, str(result))
+        self.apply_probe(result)
 
     def send_credentials(self):
         """Send credentials."""
@@ -297,3 +375,56 @@ class Instance(models.Model):
         )
         for sales_order in sales_orders:
             sales_order.cancel_subscription()
+
+
+class InstanceSweep(models.Model):
+    """Record of a sharded health check of instances."""
+
+    started_at = models.DateTimeField(
+        auto_now_add=True
+    )
+    finished_at = models.DateTimeField(
+        null=True, blank=True
+    )
+    shards = models.IntegerField(
+        default=0
+    )
+    total = models.IntegerField(
+        default=0,
+        help_text='Number of instances that should be checked.'
+    )
+    probed = models.IntegerField(
+        default=0
+    )
+    changed = models.IntegerField(
+        default=0
+    )
+    stragglers = models.JSONField(
+        default=list, blank=True,
+        help_text='Instance ids that were not checked within the budget.'
+    )
+    error = models.TextField(
+        null=True, blank=True,
+        help_text='Error when the sweep is failed.'
+    )
+
+    class Meta:  # noqa
+        ordering = ['-started_at']
+
+    def __str__(self):
+        """Return string of sweep."""
+        return f'{self.started_at}'
+
+    @property
+    def duration(self):
+        """Return duration in seconds."""
+        if not self.finished_at:
+            return None
+        return (self.finished_at - self.started_at).total_seconds()
+
+    @property
+    def coverage(self):
+        """Return fraction of instances that were checked."""
+        if not self.total:
+            return 1.0
+        return (self.total - len(self.stragglers)) / self.total
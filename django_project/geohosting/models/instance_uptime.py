@@ -0,0 +1,249 @@
+# coding=utf-8
+"""
+GeoHosting.
+
+.. note:: Instance probe time series and uptime rollups.
+"""
+
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+
+from geohosting.models.instance import Instance
+
+
+def percentile(values: list, percent: int):
+    """Return percentile of values with nearest rank."""
+    if not values:
+        return None
+    values = sorted(values)
+    rank = math.ceil(percent / 100 * len(values))
+    return values[max(rank, 1) - 1]
+
+
+class InstanceProbe(models.Model):
+    """Result of a health probe of instance.
+
+    The rows are only appended, they are rolled up into InstanceUptime
+    and purged after the retention period.
+    """
+
+    instance = models.ForeignKey(
+        Instance, on_delete=models.CASCADE
+    )
+    probed_at = models.DateTimeField()
+    status_code = models.PositiveSmallIntegerField(
+        null=True, blank=True
+    )
+    latency = models.FloatField(
+        null=True, blank=True,
+        help_text='Latency in milliseconds.'
+    )
+    online = models.BooleanField(
+        default=False
+    )
+    interval = models.FloatField(
+        null=True, blank=True,
+        help_text=(
+            'Seconds until the next probe is scheduled, '
+            'that are covered by this probe.'
+        )
+    )
+
+    class Meta:  # noqa
+        indexes = [
+            models.Index(fields=['probed_at']),
+        ]
+
+    def __str__(self):
+        """Return string of probe."""
+        return f'{self.instance} - {self.probed_at}'
+
+
+class InstanceUptime(models.Model):
+    """Uptime of instance per hour or day, rolled up from the probes."""
+
+    HOUR = 'hour'
+    DAY = 'day'
+    PERIODS = {
+        HOUR: timedelta(hours=1),
+        DAY: timedelta(days=1)
+    }
+
+    instance = models.ForeignKey(
+        Instance, on_delete=models.CASCADE
+    )
+    period = models.CharField(
+        max_length=8,
+        choices=(
+            (HOUR, HOUR),
+            (DAY, DAY)
+        )
+    )
+    start = models.DateTimeField()
+    probes = models.PositiveIntegerField(
+        default=0
+    )
+    online_probes = models.PositiveIntegerField(
+        default=0
+    )
+    observed_seconds = models.FloatField(
+        default=0,
+        help_text='Seconds that are covered by the probes.'
+    )
+    online_seconds = models.FloatField(
+        default=0,
+        help_text='Seconds that are covered by the online probes.'
+    )
+    latency_avg = models.FloatField(
+        null=True, blank=True,
+        help_text='Average latency in milliseconds.'
+    )
+    latency_p95 = models.FloatField(
+        null=True, blank=True,
+        help_text='95th percentile of latency in milliseconds.'
+    )
+
+    class Meta:  # noqa
+        unique_together = ('instance', 'period', 'start')
+        ordering = ['start']
+
+    def __str__(self):
+        """Return string of uptime."""
+        return f'{self.instance} - {self.period} - {self.start}'
+
+    @property
+    def uptime(self):
+        """Return fraction of the observed time that is online."""
+        if not self.observed_seconds:
+            return None
+        return self.online_seconds / self.observed_seconds
+
+    @staticmethod
+    def period_start(period, time):
+        """Return start of the period that contains the time."""
+        time = time.replace(minute=0, second=0, microsecond=0)
+        if period == InstanceUptime.DAY:
+            time = time.replace(hour=0)
+        return time
+
+    @staticmethod
+    def rollup(period, start) -> int:
+        """Roll up the probes of a period, can be rerun.
+
+        Each probe is weighted by the interval it covers, so the frequent
+        probes of an unstable instance do not outweigh the backed off
+        probes of a stable one. Probes without interval cover the minimum
+        interval.
+
+        Parameters:
+            period (str): Period, hour or day.
+            start (datetime): Start of the period.
+        """
+        end = start + InstanceUptime.PERIODS[period]
+        rows = {}
+        probes = InstanceProbe.objects.filter(
+            probed_at__gte=start, probed_at__lt=end
+        ).values_list('instance_id', 'online', 'latency', 'interval')
+        for instance_id, online, latency, interval in probes.iterator():
+            row = rows.setdefault(
+                instance_id, {
+                    'probes': 0, 'online': 0, 'observed_seconds': 0,
+                    'online_seconds': 0, 'latencies': []
+                }
+            )
+            if interval is None:
+                interval = settings.INSTANCE_PROBE_MIN_INTERVAL
+            row['probes'] += 1
+            row['observed_seconds'] += interval
+            if online:
+                row['online'] += 1
+                row['online_seconds'] += interval
+            if latency is not None:
+                row['latencies'].append(latency)
+
+        uptimes = []
+        for instance_id, row in rows.items():
+            latencies = row['latencies']
+            uptimes.append(
+                InstanceUptime(
+                    instance_id=instance_id,
+                    period=period,
+                    start=start,
+                    probes=row['probes'],
+                    online_probes=row['online'],
+                    observed_seconds=row['observed_seconds'],
+                    online_seconds=row['online_seconds'],
+                    latency_avg=(
+                        sum(latencies) / len(latencies)
+                        if latencies else None
+                    ),
+                    latency_p95=percentile(latencies, 95)
+                )
+            )
+        with transaction.atomic():
+            InstanceUptime.objects.filter(
+                period=period, start=start
+            ).delete()
+            InstanceUptime.objects.bulk_create(uptimes)
+        return len(uptimes)
+
+    @staticmethod
+    def summary(instance, start, end) -> dict:
+        """Return uptime and p95 latency of instance from the rollups.
+
+        Hourly rollups are used for a week or less, daily for longer.
+        The uptime is the online seconds over the observed seconds.
+        The p95 of the range is the probe weighted 95th percentile of
+        the p95 of each rollup.
+        """
+        period = InstanceUptime.HOUR
+        if end - start > timedelta(days=7):
+            period = InstanceUptime.DAY
+        rollups = list(
+            InstanceUptime.objects.filter(
+                instance=instance, period=period,
+                start__gte=start, start__lt=end
+            )
+        )
+        probes = sum(rollup.probes for rollup in rollups)
+        observed_seconds = sum(
+            rollup.observed_seconds for rollup in rollups
+        )
+        online_seconds = sum(rollup.online_seconds for rollup in rollups)
+
+        latency_p95 = None
+        weighted = sorted(
+            [
+                (rollup.latency_p95, rollup.probes) for rollup in rollups
+                if rollup.latency_p95 is not None
+            ]
+        )
+        total = sum(weight for _, weight in weighted)
+        count = 0
+        for latency, weight in weighted:
+            count += weight
+            if count >= 0.95 * total:
+                latency_p95 = latency
+                break
+
+        return {
+            'from': start,
+            'to': end,
+            'period': period,
+            'probes': probes,
+            'uptime': (
+                online_seconds / observed_seconds
+                if observed_seconds else None
+            ),
+            'latency_p95': latency_p95,
+            'series': [
+                {
+                    'start': rollup.start,
+                    'uptime': rollup.uptime,
+                    'latency_p95': rollup.latency_p95
+                } for rollup in rollups
+            ]
+        }
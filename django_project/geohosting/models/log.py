@@ -41,16 +41,21 @@ class LogTracker(models.Model):
         ordering = ['-created_at']
 
     @staticmethod
-    def _create_log(instance, log_type, note=""):
-        """Create log tracker."""
+    def build(instance, log_type, note=""):
+        """Return unsaved log tracker, e.g. for bulk create."""
         content_type = ContentType.objects.get_for_model(instance)
-        LogTracker.objects.create(
+        return LogTracker(
             content_type=content_type,
             object_id=instance.pk,
             type=log_type,
             note=note
         )
 
+    @staticmethod
+    def _create_log(instance, log_type, note=""):
+        """Create log tracker."""
+        LogTracker.build(instance, log_type, note).save()
+
     @staticmethod
     def success(instance, note=''):
         """Create log for failed process."""
@@ -9,10 +9,11 @@ import os
 
 from django.core.files.storage import default_storage
 from django.db import models
-from django.db.models.signals import pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
 from geohosting.models.cluster import Cluster
+from geohosting.models.erp import ErpFile
 from geohosting.models.fields import SVGAndImageField
 
 
@@ -186,6 +187,25 @@ def delete_old_image(sender, instance, **kwargs):
         except Product.DoesNotExist:
             return
         if old_product.image and instance.image != old_product.image:
+            # The file is shared by the erp download cache
+            if ErpFile.objects.filter(path=old_product.image.name).exists():
+                return
             old_image_path = old_product.image.path
             if os.path.exists(old_image_path):
                 default_storage.delete(old_image_path)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender='geohosting.Package')
+@receiver(post_delete, sender='geohosting.Package')
+@receiver(post_save, sender=ProductMetadata)
+@receiver(post_delete, sender=ProductMetadata)
+@receiver(post_save, sender=ProductMedia)
+@receiver(post_delete, sender=ProductMedia)
+@receiver(post_save, sender=ProductCluster)
+@receiver(post_delete, sender=ProductCluster)
+def product_catalogue_changed(sender, **kwargs):
+    """Invalidate the cached product catalogue."""
+    from geohosting.utils.product_catalogue import invalidate_catalogue
+    invalidate_catalogue()
@@ -0,0 +1,159 @@
+# coding=utf-8
+"""
+GeoHosting.
+
+.. note:: Bulk reconcile of rows coming from erp.
+"""
+
+from django.db import models, transaction
+from django.utils.timezone import now
+
+
+class ReconcileResult:
+    """Result of reconcile."""
+
+    def __init__(self, inserted=0, updated=0, unchanged=0, deleted=0):
+        """Initiate ReconcileResult."""
+        self.inserted = inserted
+        self.updated = updated
+        self.unchanged = unchanged
+        self.deleted = deleted
+
+    def __add__(self, other):
+        """Sum up two results."""
+        return ReconcileResult(
+            self.inserted + other.inserted,
+            self.updated + other.updated,
+            self.unchanged + other.unchanged,
+            self.deleted + other.deleted
+        )
+
+    def __str__(self):
+        """Return string of result."""
+        return (
+            f'inserted: {self.inserted}, updated: {self.updated}, '
+            f'unchanged: {self.unchanged}, deleted: {self.deleted}'
+        )
+
+    def as_dict(self):
+        """Return result as dictionary."""
+        return {
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'deleted': self.deleted
+        }
+
+
+class BulkReconciler:
+    """Bulk upsert rows of a queryset by a key field.
+
+    Existing rows are loaded in one query and compared with the incoming
+    rows in memory. New rows are created with bulk_create and the changed
+    rows are updated with bulk_update on just the changed fields,
+    everything in one transaction.
+
+    Save method and signals of the model are not called.
+    """
+
+    def __init__(
+            self, queryset, key_field='erpnext_code', defaults: dict = None,
+            batch_size=500
+    ):
+        """Initialize reconciler.
+
+        Parameters:
+            queryset (QuerySet): Scope of existing rows.
+            key_field (str): Field that identifies a row.
+            defaults (dict): Values for new rows, e.g. the parent.
+            batch_size (int): Batch size of bulk queries.
+        """
+        self.queryset = queryset
+        self.model = queryset.model
+        self.key_field = key_field
+        self.defaults = defaults if defaults else {}
+        self.batch_size = batch_size
+        self.auto_now_fields = [
+            field.name for field in self.model._meta.concrete_fields
+            if getattr(field, 'auto_now', False)
+        ]
+
+    def _clean(self, values: dict) -> dict:
+        """Return values that are converted by the field."""
+        output = {}
+        for key, value in values.items():
+            field = self.model._meta.get_field(key)
+            if field.is_relation:
+                if isinstance(value, models.Model):
+                    value = value.pk
+                output[field.attname] = value
+            else:
+                output[field.attname] = field.to_python(value)
+        return output
+
+    def reconcile(
+            self, rows: dict, delete_missing=False
+    ) -> ReconcileResult:
+        """Reconcile rows to the database.
+
+        Parameters:
+            rows (dict): Values of each row keyed by the key field.
+            delete_missing (bool): Delete existing rows that are not
+                in the rows.
+        """
+        result = ReconcileResult()
+        existing = {
+            getattr(obj, self.key_field): obj
+            for obj in self.queryset.exclude(
+                **{f'{self.key_field}__isnull': True}
+            )
+        }
+
+        defaults = self._clean(self.defaults)
+        to_create = []
+        to_update = {}
+        for key, values in rows.items():
+            values = self._clean(values)
+            obj = existing.get(key)
+            if obj is None:
+                data = dict(defaults)
+                data.update(values)
+                data[self.key_field] = key
+                to_create.append(self.model(**data))
+                continue
+
+            changed = []
+            for attname, value in values.items():
+                if getattr(obj, attname) != value:
+                    setattr(obj, attname, value)
+                    changed.append(attname)
+            if not changed:
+                result.unchanged += 1
+                continue
+            for field in self.auto_now_fields:
+                setattr(obj, field, now())
+                changed.append(field)
+            to_update.setdefault(tuple(sorted(changed)), []).append(obj)
+
+        with transaction.atomic():
+            if to_create:
+                self.model.objects.bulk_create(
+                    to_create, batch_size=self.batch_size
+                )
+                result.inserted = len(to_create)
+            for fields, objs in to_update.items():
+                self.model.objects.bulk_update(
+                    objs, fields, batch_size=self.batch_size
+                )
+                result.updated += len(objs)
+            if delete_missing:
+                missing = [
+                    obj.pk for key, obj in existing.items()
+                    if key not in rows
+                ]
+                if missing:
+                    _, deleted = self.model.objects.filter(
+                        pk__in=missing
+                    ).delete()
+                    result.deleted = deleted.get(self.model._meta.label, 0)
+        return result
@@ -3,7 +3,7 @@ from datetime import timedelta
 import stripe
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 from django.utils.timezone import now
 
 from geohosting.models.company import Company
@@ -302,39 +302,79 @@ class SalesOrder(ErpModel):
 
     def set_order_status(self, new: _SalesOrderStatusObject):
         """Set order status from _SalesOrderStatusObject."""
+        previous = self.sales_order_status_obj
         self.order_status = new.key
         self.save()
-
-    def update_payment_status(self):
-        """Update payment status based on the checkout detail from payment."""
         if (
-                self.sales_order_status_obj == SalesOrderStatus.WAITING_PAYMENT
-                and self.payment_id
+                previous == SalesOrderStatus.WAITING_PAYMENT and
+                new != SalesOrderStatus.WAITING_PAYMENT
         ):
+            from geohosting.tasks.invoice import queue_sales_order_invoice
+            transaction.on_commit(
+                lambda: queue_sales_order_invoice(self.id)
+            )
+
+    @property
+    def is_waiting_payment(self):
+        """Return if the order is waiting for the payment."""
+        return (
+                self.sales_order_status_obj == SalesOrderStatus.WAITING_PAYMENT
+                and bool(self.payment_id)
+        )
+
+    def payment_succeeded(self):
+        """Move the order forward when the payment is received."""
+        if self.is_waiting_payment:
+            self.set_order_status(SalesOrderStatus.WAITING_CONFIGURATION)
+
+    def update_payment_status(self):
+        """Update payment status based on the checkout detail from payment.
+
+        It calls the payment gateway, so it is not run when reading the
+        order, but by the gateway webhooks and the reconciler.
+        """
+        if self.is_waiting_payment and self.payment_gateway:
             if self.payment_gateway.payment_verification():
-                self.set_order_status(
-                    SalesOrderStatus.WAITING_CONFIGURATION
-                )
+                self.payment_succeeded()
 
     @property
     def invoice_url(self):
-        """Return invoice url when the status is not payment anymore."""
-        if self.sales_order_status_obj != SalesOrderStatus.WAITING_PAYMENT:
-            if self.invoice:
-                return self.invoice.url
-            else:
-                image_file = download_erp_file(
-                    '/api/method/frappe.utils.print_format.download_pdf'
-                    f'?doctype=Sales%20Order&name={self.erpnext_code}',
-                    folder='invoices',
-                    filename=f'{self.erpnext_code}.pdf'
-                )
-                if image_file:
-                    self.invoice = image_file
-                    self.save()
-                    return self.invoice.url
+        """Return url of the stored invoice."""
+        if self.invoice:
+            return self.invoice.url
         return None
 
+    @property
+    def invoice_pending(self):
+        """Return if the invoice is still to be generated.
+
+        Orders that are not pushed to erpnext have no invoice yet.
+        """
+        return (
+                bool(self.erpnext_code) and
+                not self.invoice and
+                self.sales_order_status_obj != SalesOrderStatus.WAITING_PAYMENT
+        )
+
+    def generate_invoice(self):
+        """Download the invoice from erpnext and store it.
+
+        Only the invoice column is updated, so the order is not pushed to
+        erpnext again.
+        """
+        if not self.erpnext_code:
+            return None
+        invoice = download_erp_file(
+            '/api/method/frappe.utils.print_format.download_pdf'
+            f'?doctype=Sales%20Order&name={self.erpnext_code}',
+            folder='invoices',
+            filename=f'{self.erpnext_code}.pdf'
+        )
+        if invoice:
+            self.invoice = invoice
+            SalesOrder.objects.filter(id=self.id).update(invoice=invoice)
+        return invoice
+
     def auto_deploy(self):
         """Change status to deployment and do deployment."""
         from geohosting.forms.activity.create_instance import (
@@ -5,7 +5,7 @@ from django.db import models
 
 from geohosting.models.erp_model import ErpModel
 from geohosting.utils.erpnext import (
-    fetch_erpnext_data, put_to_erpnext
+    ErpNextPaginator, put_to_erpnext
 )
 
 status_erp = {
@@ -81,16 +81,13 @@ class Ticket(ErpModel):
             )
 
         try:
-            erp_tickets = fetch_erpnext_data(
+            erp_tickets = ErpNextPaginator(
                 doctype="Issue", filters=filters,
                 fields=[
                     "name", "subject", "description", "status", "owner",
                     "modified"
                 ]
             )
-            if not isinstance(erp_tickets, list):
-                raise ValueError("Failed to fetch data from ERPNext")
-
             for erp_ticket in erp_tickets:
                 django_status = status_erp.get(
                     erp_ticket.get('status'), 'open'
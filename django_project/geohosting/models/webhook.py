@@ -2,13 +2,20 @@
 """
 GeoHosting.
 
-.. note:: Instance model.
+.. note:: Webhook event model.
 """
 
+import hashlib
+import json
+import re
+
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
 from django.utils import timezone
 
-from geohosting.models.activity import Activity
+from geohosting.models.activity import Activity, ActivityStatus
+from geohosting.models.instance import Instance, InstanceStatus
 
 
 class WebhookStatus:
@@ -29,9 +36,22 @@ class WebhookStatus:
     SYNCED = 'synced'
     DELETED = 'deleted'
 
+    ERRORS = [ERROR, FAILED, OUT_OF_SYNC, UNKNOWN]
+    SUCCESSES = [SUCCESS, SUCCEEDED, SYNCED, DELETED]
+
+
+class WebhookEventException(Exception):
+    """Webhook event can not be processed."""
+
 
 class WebhookEvent(models.Model):
-    """WebhookEvent model."""
+    """WebhookEvent model.
+
+    The event is saved as it is received and processed later in order of
+    the app, processed_at is empty until then.
+    """
+
+    ARGO_CD = 'argocd'
 
     triggered_at = models.DateTimeField(
         default=timezone.now,
@@ -44,10 +64,22 @@ class WebhookEvent(models.Model):
     app_name = models.CharField(
         max_length=256, null=True, blank=True
     )
+    status = models.CharField(
+        max_length=64, null=True, blank=True, editable=False,
+        db_index=True,
+        help_text='Lower case status of the data, kept in sync on save.'
+    )
     activity = models.ForeignKey(
         Activity, on_delete=models.CASCADE,
         null=True, blank=True
     )
+    processed_at = models.DateTimeField(
+        null=True, blank=True, editable=False, db_index=True
+    )
+    fingerprint = models.CharField(
+        max_length=64, null=True, blank=True, editable=False, db_index=True,
+        help_text='Hash of app name, status, source and revision.'
+    )
 
     class Meta:  # noqa
         ordering = ('-triggered_at',)
@@ -55,3 +87,158 @@ class WebhookEvent(models.Model):
     def __str__(self):
         """Return string representation."""
         return str(self.triggered_at)
+
+    def save(self, *args, **kwargs):
+        """Save the status of the data to the column."""
+        try:
+            self.status, _, _ = WebhookEvent.parse(self.data)
+        except (KeyError, AttributeError):
+            self.status = None
+        super(WebhookEvent, self).save(*args, **kwargs)
+
+    @staticmethod
+    def parse(data: dict):
+        """Return status, source and app name of the data.
+
+        Raises:
+            KeyError: When status or source is not found.
+        """
+        status = data.get('Status', data.get('status'))
+        if status is None:
+            raise KeyError(
+                "Neither 'Status' nor 'status' key found in data"
+            )
+        source = data.get('Source', data.get('source'))
+        if source is None:
+            raise KeyError(
+                "Neither 'Source' nor 'source' key found in data"
+            )
+        app_name = data.get('app_name')
+        if app_name:
+            app_name = re.sub(r'^(devops-|gsh-)', '', app_name)
+        return status.lower(), source.lower(), app_name
+
+    @staticmethod
+    def make_fingerprint(data: dict):
+        """Return fingerprint of the content of the data."""
+        status, source, app_name = WebhookEvent.parse(data)
+        revision = data.get('Revision', data.get('revision'))
+        content = json.dumps([app_name, status, source, revision])
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    @staticmethod
+    def claim_fingerprint(fingerprint) -> bool:
+        """Claim fingerprint for the dedup window.
+
+        Returns False when an event with the same fingerprint is already
+        received within the window.
+        """
+        window = settings.WEBHOOK_DEDUP_WINDOW
+        if window <= 0:
+            return True
+        return cache.add(
+            WebhookEvent._fingerprint_key(fingerprint), True, timeout=window
+        )
+
+    @staticmethod
+    def release_fingerprint(fingerprint):
+        """Release claimed fingerprint, e.g. when the event is not saved."""
+        cache.delete(WebhookEvent._fingerprint_key(fingerprint))
+
+    @staticmethod
+    def _fingerprint_key(fingerprint):
+        """Return cache key of fingerprint."""
+        return f'webhook-fingerprint:{fingerprint}'
+
+    @property
+    def needs_processing(self):
+        """Return if the event changes an activity.
+
+        Running events and events from other sources are only recorded.
+        """
+        try:
+            status, source, app_name = WebhookEvent.parse(self.data)
+        except KeyError:
+            return False
+        return (
+                status != WebhookStatus.RUNNING and
+                source == WebhookEvent.ARGO_CD
+        )
+
+    def _activity(self):
+        """Return activity of the app that is waiting for argo."""
+        if not self.app_name:
+            raise KeyError('app_name')
+        instance = Instance.objects.exclude(
+            status=InstanceStatus.DELETED
+        ).get(name=self.app_name)
+        activities = list(
+            Activity.objects.filter(
+                instance=instance,
+                status__in=[ActivityStatus.BUILD_ARGO, ActivityStatus.ERROR]
+            ).select_related('activity_type', 'instance', 'sales_order')
+        )
+        building = [
+            activity for activity in activities
+            if activity.status == ActivityStatus.BUILD_ARGO
+        ]
+        if building:
+            return building[0]
+        if activities:
+            return activities[-1]
+        raise Activity.DoesNotExist()
+
+    def _process(self):
+        """Apply the event to the activity."""
+        status, _, _ = WebhookEvent.parse(self.data)
+        activity = self.activity
+        if activity is None:
+            activity = self._activity()
+            self.activity = activity
+        elif activity.status not in [
+            ActivityStatus.BUILD_ARGO, ActivityStatus.ERROR
+        ]:
+            # Replayed event of an activity that is already finished
+            return
+
+        # If error
+        if status in WebhookStatus.ERRORS:
+            if activity.status == ActivityStatus.ERROR:
+                return
+            activity.note = self.data.get('Message', 'Error on Argo CD')
+            activity.update_status(ActivityStatus.ERROR)
+            return
+
+        # If it is synced
+        if status not in WebhookStatus.SUCCESSES:
+            raise WebhookEventException('Status does not found')
+
+        # This is for deployment
+        if activity.is_deletion and status != WebhookStatus.DELETED:
+            return
+        activity.note = json.dumps(self.data)
+        activity.update_status(ActivityStatus.SUCCESS)
+
+    def replay(self):
+        """Mark the event pending to process it again from the data.
+
+        Replaying is idempotent, the event is only applied to the activity
+        that it was resolved to, when that activity is still waiting for
+        argo or failed.
+        """
+        self.note = None
+        self.processed_at = None
+        self.save(update_fields=['note', 'processed_at'])
+
+    def process(self):
+        """Process the event and mark it processed.
+
+        The error is recorded as note of the event.
+        """
+        try:
+            if self.needs_processing:
+                self._process()
+        except Exception as e:
+            self.note = f'{e}'
+        self.processed_at = timezone.now()
+        self.save()
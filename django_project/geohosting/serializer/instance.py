@@ -3,7 +3,9 @@ from rest_framework import serializers
 from geohosting.models import Instance
 from geohosting.serializer.product import (
     ProductPackageSerializer,
-    ProductDetailSerializer
+    ProductDetailSerializer,
+    context_lookup,
+    product_prefetches
 )
 
 
@@ -18,14 +20,30 @@ class InstanceSerializer(serializers.ModelSerializer):
         model = Instance
         fields = '__all__'
 
+    @staticmethod
+    def prefetch(query):
+        """Return query with the relations that are serialized."""
+        return query.select_related(
+            'price', 'price__product', 'cluster'
+        ).prefetch_related(*product_prefetches('price__product__'))
+
     def get_url(self, obj: Instance):
         """Return url."""
         return obj.url
 
     def get_package(self, obj: Instance):
         """Return package."""
-        return ProductPackageSerializer(obj.price).data
+        return context_lookup(
+            self.context, ('package', obj.price_id),
+            lambda: ProductPackageSerializer(obj.price).data
+        )
 
     def get_product(self, obj: Instance):
         """Return product."""
-        return ProductDetailSerializer(obj.price.product).data
+        product = obj.price.product
+        return context_lookup(
+            self.context, ('product', product.id),
+            lambda: ProductDetailSerializer(
+                product, context=self.context
+            ).data
+        )
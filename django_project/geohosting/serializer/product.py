@@ -1,3 +1,4 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 
 from geohosting.models import (
@@ -5,6 +6,31 @@ from geohosting.models import (
 )
 
 
+def context_lookup(context: dict, key, default):
+    """Return value of the lookup map that is shared in the request.
+
+    The value is computed once by calling default, so repeated products,
+    packages and clusters in a page are serialized once.
+    """
+    lookup = context.setdefault('lookup', {})
+    if key not in lookup:
+        lookup[key] = default()
+    return lookup[key]
+
+
+def product_prefetches(prefix: str = '') -> list:
+    """Return prefetches of the product detail, under the relation prefix."""
+    return [
+        f'{prefix}images',
+        f'{prefix}packages',
+        f'{prefix}productmetadata_set',
+        Prefetch(
+            f'{prefix}productcluster_set',
+            queryset=ProductCluster.objects.select_related('cluster')
+        )
+    ]
+
+
 class ProductMediaSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProductMedia
@@ -48,9 +74,13 @@ class ProductDetailSerializer(serializers.ModelSerializer):
         else:
             preferred_currency_order = ['USD', 'EUR', 'ZAR']
 
+        # Packages are filtered in python, so the prefetched ones are used
+        packages = list(obj.packages.all())
         unique_packages = {}
         for currency in preferred_currency_order:
-            for package in obj.packages.filter(currency=currency):
+            for package in packages:
+                if package.currency != currency:
+                    continue
                 if package.name not in unique_packages:
                     unique_packages[package.name] = package
 
@@ -66,17 +96,18 @@ class ProductDetailSerializer(serializers.ModelSerializer):
         return ProductPackageSerializer(sorted_packages, many=True).data
 
     def get_product_meta(self, obj: Product):
-        metadata = ProductMetadata.objects.filter(product=obj)
+        metadata = obj.productmetadata_set.all()
         return ProductMetadataSerializer(metadata, many=True).data
 
     def get_domain(self, obj: Product):
-        """Return domain of product."""
-        try:
-            return obj.get_product_cluster(
-                Region.default_region()
-            ).cluster.domain
-        except ProductCluster.DoesNotExist:
-            return None
+        """Return domain of product on the default region."""
+        region = context_lookup(
+            self.context, 'default_region', Region.default_region
+        )
+        for product_cluster in obj.productcluster_set.all():
+            if product_cluster.cluster.region_id == region.id:
+                return product_cluster.cluster.domain
+        return None
 
     class Meta:
         model = Product
@@ -4,9 +4,14 @@ from geohosting.models import SalesOrder, Instance
 from geohosting.serializer.instance import InstanceSerializer
 from geohosting.serializer.product import (
     ProductPackageSerializer,
-    ProductDetailSerializer
+    ProductDetailSerializer,
+    context_lookup,
+    product_prefetches
 )
 
+INVOICE_READY = 'ready'
+INVOICE_PENDING = 'pending'
+
 
 class SalesOrderSerializer(serializers.ModelSerializer):
     """Sales order serializer."""
@@ -14,19 +19,30 @@ class SalesOrderSerializer(serializers.ModelSerializer):
     package = serializers.SerializerMethodField()
     order_status = serializers.SerializerMethodField()
     invoice_url = serializers.SerializerMethodField()
+    invoice_status = serializers.SerializerMethodField()
     company_name = serializers.SerializerMethodField()
 
     def get_package(self, obj: SalesOrder):
         """Return package."""
-        return ProductPackageSerializer(obj.package).data
+        return context_lookup(
+            self.context, ('package', obj.package_id),
+            lambda: ProductPackageSerializer(obj.package).data
+        )
 
     def get_invoice_url(self, obj: SalesOrder):
-        """Return package."""
+        """Return invoice url."""
         return obj.invoice_url
 
+    def get_invoice_status(self, obj: SalesOrder):
+        """Return status of the invoice, it is generated on background."""
+        if obj.invoice:
+            return INVOICE_READY
+        if obj.invoice_pending:
+            return INVOICE_PENDING
+        return None
+
     def get_order_status(self, obj: SalesOrder):
         """Return package."""
-        obj.update_payment_status()
         return obj.order_status
 
     def get_company_name(self, obj: SalesOrder):
@@ -36,6 +52,11 @@ class SalesOrderSerializer(serializers.ModelSerializer):
         except Exception:
             return ''
 
+    @staticmethod
+    def prefetch(query):
+        """Return query with the relations that are serialized."""
+        return query.select_related('package', 'company')
+
     class Meta:
         model = SalesOrder
         fields = '__all__'
@@ -47,22 +68,47 @@ class SalesOrderDetailSerializer(serializers.ModelSerializer):
     product = serializers.SerializerMethodField()
     package = serializers.SerializerMethodField()
     invoice_url = serializers.SerializerMethodField()
+    invoice_status = serializers.SerializerMethodField()
     instance = serializers.SerializerMethodField()
     order_status = serializers.SerializerMethodField()
     company_name = serializers.SerializerMethodField()
 
+    @staticmethod
+    def prefetch(query):
+        """Return query with the relations that are serialized."""
+        return query.select_related(
+            'package', 'package__product', 'company'
+        ).prefetch_related(*product_prefetches('package__product__'))
+
     def get_product(self, obj: SalesOrder):
         """Return product."""
-        return ProductDetailSerializer(obj.package.product).data
+        product = obj.package.product
+        return context_lookup(
+            self.context, ('product', product.id),
+            lambda: ProductDetailSerializer(
+                product, context=self.context
+            ).data
+        )
 
     def get_package(self, obj: SalesOrder):
         """Return package."""
-        return ProductPackageSerializer(obj.package).data
+        return context_lookup(
+            self.context, ('package', obj.package_id),
+            lambda: ProductPackageSerializer(obj.package).data
+        )
 
     def get_invoice_url(self, obj: SalesOrder):
-        """Return package."""
+        """Return invoice url."""
         return obj.invoice_url
 
+    def get_invoice_status(self, obj: SalesOrder):
+        """Return status of the invoice, it is generated on background."""
+        if obj.invoice:
+            return INVOICE_READY
+        if obj.invoice_pending:
+            return INVOICE_PENDING
+        return None
+
     def get_company_name(self, obj: SalesOrder):
         """Return package."""
         try:
@@ -72,18 +118,13 @@ class SalesOrderDetailSerializer(serializers.ModelSerializer):
 
     def get_instance(self, obj: SalesOrder):
         """Return package."""
-        try:
-            return InstanceSerializer(
-                Instance.objects.filter(
-                    name=obj.app_name
-                ).order_by('id').last()
-            ).data
-        except Instance.DoesNotExist:
-            return None
+        instance = InstanceSerializer.prefetch(
+            Instance.objects.filter(name=obj.app_name)
+        ).order_by('id').last()
+        return InstanceSerializer(instance, context=self.context).data
 
     def get_order_status(self, obj: SalesOrder):
         """Return package."""
-        obj.update_payment_status()
         return obj.order_status
 
     class Meta:
@@ -22,6 +22,7 @@ export interface SalesOrder {
   order_status: string,
   payment_method: string,
   invoice_url: string,
+  invoice_status: 'ready' | 'pending' | null,
   product: Product,
   package: Package,
   app_name: string,
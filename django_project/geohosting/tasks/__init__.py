@@ -1,3 +1,15 @@
+from geohosting.tasks.activity import poll_jenkins_activities, run_activity
 from geohosting.tasks.erp import sync_erp_data
 from geohosting.tasks.instances import check_instances
-from geohosting.tasks.products import fetch_products_from_erpnext_task
+from geohosting.tasks.invoice import (
+    generate_pending_invoices, generate_sales_order_invoice
+)
+from geohosting.tasks.payment import (
+    reconcile_sales_order_payments, sales_order_payment_succeeded
+)
+from geohosting.tasks.products import (
+    fetch_products_from_erpnext_task, rebuild_product_catalogue
+)
+from geohosting.tasks.webhook import (
+    process_pending_webhook_events, process_webhook_events
+)
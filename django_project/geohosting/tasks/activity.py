@@ -0,0 +1,114 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+
+from core.celery import app
+from geohosting.models.activity import Activity, ActivityStatus
+from geohosting.utils.jenkins_poller import poll_all
+from geohosting_controller.exceptions import ActivityRetryException
+
+
+@app.task(
+    bind=True, name='run_activity', acks_late=True,
+    max_retries=settings.ACTIVITY_MAX_RETRIES
+)
+def run_activity(self, activity_id, idempotency_key):
+    """Run activity on jenkins.
+
+    The row is locked only to claim the post and to save its result, the
+    post itself is outside of the transactions. A claim is marked by
+    posting_at, a redelivered task that finds the claim without result
+    does not post again, as jenkins may have accepted the first post.
+    """
+    with transaction.atomic():
+        activity = Activity.objects.select_for_update().filter(
+            id=activity_id, idempotency_key=idempotency_key
+        ).first()
+        if not activity:
+            return None
+        if (
+                activity.status != ActivityStatus.RUNNING or
+                activity.jenkins_queue_url
+        ):
+            return activity.status
+        interrupted = activity.posting_at is not None
+        if not interrupted:
+            activity.attempts += 1
+            activity.posting_at = now()
+            activity.save(update_fields=['attempts', 'posting_at'])
+
+    if interrupted:
+        activity.transition(
+            ActivityStatus.ERROR,
+            'The post to jenkins was interrupted, check the jenkins job '
+            'before running it again.'
+        )
+        return activity.status
+    if activity.attempts == 1:
+        activity.update_status(ActivityStatus.RUNNING)
+
+    retry = None
+    queue_url = None
+    try:
+        status, note, queue_url = activity.post()
+    except ActivityRetryException as e:
+        retry = e
+        status, note = ActivityStatus.RUNNING, f'{e}'
+        if self.request.retries >= self.max_retries:
+            status = ActivityStatus.ERROR
+
+    # Save the result, only when the claim is still ours
+    with transaction.atomic():
+        saved = Activity.objects.filter(
+            id=activity.id, status=ActivityStatus.RUNNING,
+            posting_at=activity.posting_at
+        ).update(
+            status=status, note=note, jenkins_queue_url=queue_url,
+            posting_at=None
+        )
+    if not saved:
+        return None
+
+    activity.jenkins_queue_url = queue_url
+    activity.posting_at = None
+    if status != ActivityStatus.RUNNING:
+        activity.posted(status, note)
+        return activity.status
+
+    raise self.retry(
+        exc=retry,
+        countdown=settings.ACTIVITY_RETRY_BACKOFF * 2 ** self.request.retries
+    )
+
+
+@app.task(name='poll_jenkins_activities')
+def poll_jenkins_activities():
+    """Poll jenkins builds of the activities in one pass.
+
+    Failed builds and cancelled queue items change the activity to ERROR,
+    the successful builds are left for the argo webhook.
+    """
+    activities = list(
+        Activity.due_for_poll().select_related(
+            'activity_type', 'instance', 'sales_order'
+        )
+    )
+    results = poll_all(activities)
+    Activity.objects.bulk_update(
+        activities,
+        ['jenkins_build_url', 'jenkins_result', 'next_poll_at', 'polls']
+    )
+
+    failed = 0
+    for result in results:
+        if not result.is_failed:
+            continue
+        with transaction.atomic():
+            activity = Activity.objects.select_for_update().get(
+                id=result.activity.id
+            )
+            # The webhook can finish the activity first
+            if activity.status == ActivityStatus.BUILD_ARGO:
+                activity.transition(ActivityStatus.ERROR, result.note)
+                failed += 1
+    return {'polled': len(results), 'failed': failed}
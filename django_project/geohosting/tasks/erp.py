@@ -3,8 +3,10 @@ from django.apps import apps
 
 
 @shared_task
-def sync_erp_data(class_name):
+def sync_erp_data(class_name, full=False):
     """Sync erp data from ERPNEXT API."""
     if class_name:
         Model = apps.get_model('geohosting', class_name)
-        Model.sync_data()
+        result = Model.sync_data(full=full)
+        if result:
+            return result.as_dict()
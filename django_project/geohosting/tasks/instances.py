@@ -1,11 +1,137 @@
+import time
+from datetime import timedelta
+
+from celery import chord
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import now
+
 from core.celery import app
-from geohosting.models import Instance, InstanceStatus
+from geohosting.models import (
+    Instance, InstanceProbe, InstanceStatus, InstanceSweep, InstanceUptime
+)
+from geohosting.utils.instance_probe import InstanceProber, finish_deleting
+
+SWEEP_LOCK_KEY = 'check_instances_sweep'
 
 
 @app.task(name='check_instances')
 def check_instances():
-    """Check instances."""
-    for instance in Instance.objects.exclude(
-            status=InstanceStatus.DELETED
-    ):
-        instance.checking_server()
+    """Check instances.
+
+    The instances that are due are split into shards by id range and
+    checked by a group of subtasks, a sweep is skipped when the previous
+    one is still running. Deleting instances are not probed, they are
+    deleted when argo reported the deletion.
+    """
+    budget = settings.INSTANCE_SWEEP_TIME_BUDGET
+    # The lock expires, in case the sweep never finished
+    if not cache.add(SWEEP_LOCK_KEY, True, timeout=budget * 2):
+        return None
+
+    try:
+        finish_deleting(
+            Instance.objects.filter(status=InstanceStatus.DELETING)
+        )
+        ids = list(
+            Instance.due_for_probe().order_by('id').values_list(
+                'id', flat=True
+            )
+        )
+        size = settings.INSTANCE_SWEEP_SHARD_SIZE
+        shards = [
+            (ids[idx], ids[min(idx + size, len(ids)) - 1])
+            for idx in range(0, len(ids), size)
+        ]
+        sweep = InstanceSweep.objects.create(
+            shards=len(shards), total=len(ids)
+        )
+        if not shards:
+            finish_instance_sweep([], sweep.id)
+            return sweep.id
+
+        deadline = time.time() + budget
+        chord(
+            check_instances_shard.s(first_id, last_id, deadline)
+            for first_id, last_id in shards
+        )(
+            finish_instance_sweep.s(sweep.id).on_error(
+                fail_instance_sweep.s(sweep.id)
+            )
+        )
+    except Exception:
+        # The sweep is not started, the next one should not wait
+        cache.delete(SWEEP_LOCK_KEY)
+        raise
+    return sweep.id
+
+
+@app.task(
+    name='check_instances_shard',
+    time_limit=settings.INSTANCE_SWEEP_TIME_BUDGET + 30
+)
+def check_instances_shard(first_id, last_id, deadline):
+    """Check instances of a shard within the deadline."""
+    instances = Instance.due_for_probe().filter(
+        id__gte=first_id, id__lte=last_id
+    ).select_related('cluster').order_by('id')
+
+    # The shard waited in the queue past the budget
+    if time.time() >= deadline:
+        return {
+            'probed': 0, 'changed': 0, 'deleting': 0,
+            'stragglers': [instance.id for instance in instances]
+        }
+
+    prober = InstanceProber()
+    try:
+        return prober.sweep(instances, deadline=deadline)
+    finally:
+        prober.close()
+
+
+@app.task(name='finish_instance_sweep')
+def finish_instance_sweep(results, sweep_id):
+    """Record the result of sweep and release the lock."""
+    sweep = InstanceSweep.objects.get(id=sweep_id)
+    sweep.finished_at = now()
+    sweep.probed = sum(result['probed'] for result in results)
+    sweep.changed = sum(result['changed'] for result in results)
+    sweep.stragglers = [
+        _id for result in results for _id in result['stragglers']
+    ]
+    sweep.save()
+    cache.delete(SWEEP_LOCK_KEY)
+    return sweep_id
+
+
+@app.task(name='fail_instance_sweep')
+def fail_instance_sweep(request, exc, traceback, sweep_id):
+    """Record the error of sweep and release the lock.
+
+    Called when a shard or the finish of the sweep is failed, so the next
+    sweep does not wait for the lock to expire.
+    """
+    InstanceSweep.objects.filter(id=sweep_id).update(
+        finished_at=now(), error=f'{exc}'
+    )
+    cache.delete(SWEEP_LOCK_KEY)
+    return sweep_id
+
+
+@app.task(name='rollup_instance_probes')
+def rollup_instance_probes():
+    """Roll up the probes of last hour and purge the old probes.
+
+    The daily rollup of the last hour is rerun, so it is up to date.
+    """
+    last_hour = now() - timedelta(hours=1)
+    hour = InstanceUptime.period_start(InstanceUptime.HOUR, last_hour)
+    day = InstanceUptime.period_start(InstanceUptime.DAY, last_hour)
+    InstanceUptime.rollup(InstanceUptime.HOUR, hour)
+    InstanceUptime.rollup(InstanceUptime.DAY, day)
+    InstanceProbe.objects.filter(
+        probed_at__lt=now() - timedelta(
+            days=settings.INSTANCE_PROBE_RETENTION_DAYS
+        )
+    ).delete()
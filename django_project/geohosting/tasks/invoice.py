@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from core.celery import app
+from geohosting.models.sales_order import SalesOrder, SalesOrderStatus
+
+
+def _queued_key(order_id):
+    """Return cache key of queued invoice of the order."""
+    return f'sales-order-invoice-queued:{order_id}'
+
+
+def _slot_key(slot):
+    """Return cache key of a download slot."""
+    return f'sales-order-invoice-slot:{slot}'
+
+
+def _acquire_slot(order_id):
+    """Acquire a download slot, return None when all are taken."""
+    for slot in range(settings.INVOICE_MAX_CONCURRENCY):
+        if cache.add(
+                _slot_key(slot), order_id,
+                timeout=settings.INVOICE_SLOT_TIMEOUT
+        ):
+            return slot
+    return None
+
+
+def _queued_timeout():
+    """Return seconds of the retries of an invoice, when the worker dies."""
+    return (
+            settings.INVOICE_RETRY_BACKOFF *
+            (2 ** settings.INVOICE_MAX_RETRIES - 1) +
+            settings.INVOICE_SLOT_TIMEOUT
+    )
+
+
+def queue_sales_order_invoice(order_id):
+    """Queue invoice generation of the order, once until it is finished."""
+    if cache.add(
+            _queued_key(order_id), True, timeout=_queued_timeout()
+    ):
+        generate_sales_order_invoice.delay(order_id)
+
+
+@app.task(
+    bind=True, name='generate_sales_order_invoice',
+    max_retries=settings.INVOICE_MAX_RETRIES
+)
+def generate_sales_order_invoice(self, order_id):
+    """Download the invoice of the order from erpnext.
+
+    Downloads are bounded by the slots shared by the workers, the task is
+    retried with backoff when no slot is free or the download is failed.
+    The orders that are still pending afterwards are picked up by the
+    sweep, the order is queued once until the last attempt.
+    """
+    order = SalesOrder.objects.filter(id=order_id).first()
+    if not order or not order.invoice_pending:
+        cache.delete(_queued_key(order_id))
+        return None
+
+    slot = _acquire_slot(order_id)
+    invoice = None
+    if slot is not None:
+        try:
+            invoice = order.generate_invoice()
+        except Exception:
+            pass
+        finally:
+            cache.delete(_slot_key(slot))
+    if invoice:
+        cache.delete(_queued_key(order_id))
+        return invoice
+
+    if self.request.retries >= self.max_retries:
+        cache.delete(_queued_key(order_id))
+        return None
+    raise self.retry(
+        countdown=settings.INVOICE_RETRY_BACKOFF * 2 ** self.request.retries
+    )
+
+
+@app.task(name='generate_pending_invoices')
+def generate_pending_invoices():
+    """Queue the orders that are paid but have no invoice yet."""
+    ids = list(
+        SalesOrder.objects.exclude(
+            order_status=SalesOrderStatus.WAITING_PAYMENT.key
+        ).filter(
+            erpnext_code__isnull=False
+        ).exclude(
+            erpnext_code=''
+        ).filter(
+            Q(invoice='') | Q(invoice__isnull=True)
+        ).order_by('-date').values_list(
+            'id', flat=True
+        )[:settings.INVOICE_BATCH_SIZE]
+    )
+    for order_id in ids:
+        queue_sales_order_invoice(order_id)
+    return len(ids)
@@ -0,0 +1,71 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils.timezone import now
+
+from core.celery import app
+from geohosting.models.sales_order import SalesOrder, SalesOrderStatus
+
+
+@app.task(name='sales_order_payment_succeeded')
+def sales_order_payment_succeeded(payment_method, payment_id):
+    """Move the orders of a payment forward, from the gateway webhook.
+
+    The event is only a hint, the payment is verified with the gateway.
+    """
+    orders = SalesOrder.objects.filter(
+        payment_method=payment_method, payment_id=payment_id,
+        order_status=SalesOrderStatus.WAITING_PAYMENT.key
+    )
+    count = 0
+    for order in orders:
+        order.update_payment_status()
+        if not order.is_waiting_payment:
+            count += 1
+    return count
+
+
+def _payment_verification(order: SalesOrder) -> bool:
+    """Return if the payment of order is verified on the gateway."""
+    try:
+        return bool(order.payment_gateway.payment_verification())
+    except Exception:
+        return False
+
+
+@app.task(name='reconcile_sales_order_payments')
+def reconcile_sales_order_payments():
+    """Verify payments of the orders that are still waiting payment.
+
+    This is the fallback of the gateway webhooks, the newest orders are
+    checked first and the gateway is called concurrently.
+    """
+    orders = [
+        order for order in SalesOrder.objects.filter(
+            order_status=SalesOrderStatus.WAITING_PAYMENT.key,
+            payment_id__isnull=False,
+            date__gte=now() - timedelta(
+                days=settings.PAYMENT_RECONCILE_MAX_AGE_DAYS
+            )
+        ).exclude(payment_id='').order_by(
+            '-date'
+        )[:settings.PAYMENT_RECONCILE_BATCH_SIZE]
+        if order.payment_gateway
+    ]
+    if not orders:
+        return {'checked': 0, 'paid': 0}
+
+    with ThreadPoolExecutor(
+            max_workers=min(
+                settings.PAYMENT_RECONCILE_MAX_WORKERS, len(orders)
+            )
+    ) as executor:
+        verified = list(executor.map(_payment_verification, orders))
+
+    paid = 0
+    for order, is_paid in zip(orders, verified):
+        if is_paid:
+            order.payment_succeeded()
+            paid += 1
+    return {'checked': len(orders), 'paid': paid}
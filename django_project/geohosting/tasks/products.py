@@ -1,4 +1,8 @@
 from celery import shared_task
+from django.core.cache import cache
+
+from core.celery import app
+from geohosting.utils.product_catalogue import QUEUED_KEY, rebuild_catalogue
 
 
 @shared_task
@@ -6,3 +10,10 @@ def fetch_products_from_erpnext_task():
     from geohosting.views.products import fetch_products_from_erpnext
     products = fetch_products_from_erpnext()
     return len(products)
+
+
+@app.task(name='rebuild_product_catalogue')
+def rebuild_product_catalogue():
+    """Rebuild the cached product catalogue of every currency."""
+    cache.delete(QUEUED_KEY)
+    return rebuild_catalogue()
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import now
+
+from core.celery import app
+from geohosting.models.webhook import WebhookEvent
+
+
+def _queued_key(app_name):
+    """Return cache key of queued processing of the app."""
+    return f'webhook-events-queued:{app_name}'
+
+
+def _lock_key(app_name):
+    """Return cache key of the lock of processing the app."""
+    return f'webhook-events-lock:{app_name}'
+
+
+def queue_webhook_events(app_name):
+    """Queue processing of the events of the app.
+
+    Events that arrive within the batch delay are processed by one task.
+    """
+    if cache.add(
+            _queued_key(app_name), True,
+            timeout=settings.WEBHOOK_LOCK_TIMEOUT
+    ):
+        process_webhook_events.apply_async(
+            args=(app_name,), countdown=settings.WEBHOOK_BATCH_DELAY
+        )
+
+
+@app.task(name='process_webhook_events')
+def process_webhook_events(app_name):
+    """Process pending webhook events of an app in order.
+
+    One worker processes an app at a time, it is skipped when the app is
+    being processed and the events are picked up by that worker or by the
+    next sweep.
+    """
+    cache.delete(_queued_key(app_name))
+    if not cache.add(
+            _lock_key(app_name), True,
+            timeout=settings.WEBHOOK_LOCK_TIMEOUT
+    ):
+        return None
+    processed = 0
+    try:
+        while True:
+            events = list(
+                WebhookEvent.objects.filter(
+                    app_name=app_name, processed_at__isnull=True
+                ).order_by('id')[:settings.WEBHOOK_BATCH_SIZE]
+            )
+            if not events:
+                break
+            for event in events:
+                event.process()
+                processed += 1
+    finally:
+        cache.delete(_lock_key(app_name))
+    return processed
+
+
+@app.task(name='process_pending_webhook_events')
+def process_pending_webhook_events():
+    """Queue the apps that still have pending events, e.g. lost tasks."""
+    app_names = set(
+        WebhookEvent.objects.filter(
+            processed_at__isnull=True,
+            triggered_at__lte=now() - timedelta(
+                seconds=settings.WEBHOOK_BATCH_DELAY
+            )
+        ).values_list('app_name', flat=True)
+    )
+    for app_name in app_names:
+        queue_webhook_events(app_name)
+    return len(app_names)
@@ -0,0 +1,263 @@
+from unittest.mock import patch
+
+import requests_mock
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from geohosting.models.erp import ErpFile
+from geohosting.utils.erpnext import (
+    ErpNextClient, ErpNextFetchError, ErpNextPaginator, erpnext_client,
+    add_erp_next_comment, download_erp_file, fetch_erpnext_data
+)
+
+
+@override_settings(
+    ERPNEXT_BASE_URL='https://erp.example.com',
+    ERPNEXT_API_KEY='key',
+    ERPNEXT_API_SECRET='secret'
+)
+class ErpNextClientTest(TestCase):
+    """ERPNext client tests."""
+
+    def test_client_is_reused(self):
+        """Test client is reused in same process."""
+        self.assertEqual(erpnext_client(), erpnext_client())
+
+    def test_client_recreated_on_other_process(self):
+        """Test client is recreated on forked process."""
+        client = erpnext_client()
+        with patch('geohosting.utils.erpnext.os.getpid', return_value=-1):
+            self.assertNotEqual(client, erpnext_client())
+
+    def test_pool_size(self):
+        """Test pool size of the session."""
+        client = ErpNextClient(pool_size=3, timeout=5)
+        adapter = client.session.get_adapter('https://erp.example.com')
+        self.assertEqual(adapter._pool_maxsize, 3)
+        self.assertEqual(client.timeout, 5)
+
+    def test_headers_not_shared(self):
+        """Test headers of request is not shared."""
+        client = ErpNextClient()
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.post(
+                'https://erp.example.com/api/resource/Item',
+                json={}
+            )
+            requests_mocker.get(
+                'https://erp.example.com/api/resource/Item',
+                json={}
+            )
+            client.post(
+                '/api/resource/Item',
+                headers={"Content-Type": "application/json"}
+            )
+            client.get('/api/resource/Item')
+            post, get = requests_mocker.request_history
+            self.assertEqual(
+                post.headers['Authorization'], 'token key:secret'
+            )
+            self.assertEqual(
+                post.headers['Content-Type'], 'application/json'
+            )
+            self.assertEqual(
+                get.headers['Authorization'], 'token key:secret'
+            )
+            self.assertNotIn('Content-Type', get.headers)
+        self.assertNotIn('Content-Type', client.headers)
+
+    def test_add_comment(self):
+        """Test add comment through the client."""
+        user = type(
+            'User', (), {
+                'email': 'test@example.com',
+                'first_name': 'Test',
+                'last_name': 'User'
+            }
+        )
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.post(
+                'https://erp.example.com/api/method/'
+                'frappe.desk.form.utils.add_comment',
+                json={'data': {'name': 'comment'}}
+            )
+            result = add_erp_next_comment(
+                user, 'Sales Order', 'SO-1', 'Comment'
+            )
+            self.assertEqual(
+                result, {"status": "success", "data": {'name': 'comment'}}
+            )
+            self.assertEqual(
+                requests_mocker.last_request.json()['content'], 'Comment'
+            )
+
+
+@override_settings(ERPNEXT_BASE_URL='https://erp.example.com')
+class ErpNextPaginatorTest(TestCase):
+    """ERPNext paginator tests."""
+
+    count_url = (
+        'https://erp.example.com/api/method/frappe.client.get_count'
+    )
+    resource_url = 'https://erp.example.com/api/resource/Country'
+
+    def mock_rows(self, requests_mocker, rows, status_code=200):
+        """Mock ERPNext list of rows that respect the limit."""
+
+        def response(request, context):
+            context.status_code = status_code
+            start = int(request.qs['limit_start'][0])
+            length = int(request.qs['limit_page_length'][0])
+            return {'data': rows[start:start + length]}
+
+        requests_mocker.get(self.resource_url, json=response)
+
+    def test_fetch_all_rows(self):
+        """Test all rows are returned in order."""
+        rows = [{'name': f'Country {idx}'} for idx in range(45)]
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.get(self.count_url, json={'message': 45})
+            self.mock_rows(requests_mocker, rows)
+            self.assertEqual(
+                fetch_erpnext_data('Country', page_length=10), rows
+            )
+            # 1 count request and 5 page requests
+            self.assertEqual(requests_mocker.call_count, 6)
+
+    def test_rows_added_after_count(self):
+        """Test rows that are added after counting are returned."""
+        rows = [{'name': f'Country {idx}'} for idx in range(25)]
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.get(self.count_url, json={'message': 20})
+            self.mock_rows(requests_mocker, rows)
+            self.assertEqual(
+                ErpNextPaginator('Country', page_length=10).all(), rows
+            )
+
+    def test_ordered_and_unique(self):
+        """Test pages are ordered and the duplicated rows are dropped."""
+        rows = [{'name': f'Country {idx}'} for idx in range(20)]
+        # A row is returned on two pages, e.g. when a row was deleted
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.get(self.count_url, json={'message': 20})
+            self.mock_rows(requests_mocker, rows[:10] + rows[9:19])
+            paginator = ErpNextPaginator('Country', page_length=10)
+            self.assertEqual(paginator.all(), rows[:19])
+            # Streamed pages are not ordered
+            self.assertEqual(
+                sorted([row['name'] for row in paginator]),
+                sorted([row['name'] for row in rows[:19]])
+            )
+            for request in requests_mocker.request_history:
+                if request.path != '/api/resource/country':
+                    continue
+                self.assertEqual(
+                    request.qs['order_by'], ['creation asc, name asc']
+                )
+
+    def test_streaming(self):
+        """Test rows are streamed."""
+        rows = [{'name': f'Country {idx}'} for idx in range(15)]
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.get(self.count_url, json={'message': 15})
+            self.mock_rows(requests_mocker, rows)
+            paginator = ErpNextPaginator(
+                'Country', page_length=4, max_workers=2
+            )
+            self.assertEqual(
+                sorted([row['name'] for row in paginator]),
+                sorted([row['name'] for row in rows])
+            )
+
+    def test_error(self):
+        """Test error is raised instead of returning partial rows."""
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.get(self.count_url, json={'message': 15})
+            self.mock_rows(requests_mocker, [], status_code=500)
+            with self.assertRaises(ErpNextFetchError):
+                fetch_erpnext_data('Country', page_length=10)
+
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.get(self.count_url, status_code=403)
+            with self.assertRaises(ErpNextFetchError):
+                fetch_erpnext_data('Country')
+
+    @override_settings(ERPNEXT_BASE_URL='')
+    def test_no_base_url(self):
+        """Test error is raised when base url is not set."""
+        with self.assertRaises(ErpNextFetchError):
+            fetch_erpnext_data('Country')
+
+
+@override_settings(
+    ERPNEXT_BASE_URL='https://erp.example.com',
+    ERPNEXT_API_KEY='key',
+    ERPNEXT_API_SECRET='secret'
+)
+class DownloadErpFileTest(TestCase):
+    """Download erp file tests."""
+
+    url = 'https://erp.example.com/files/logo.png'
+
+    def tearDown(self):
+        """Clean up the downloaded files."""
+        for erp_file in ErpFile.objects.all():
+            default_storage.delete(erp_file.path)
+
+    def test_download_and_not_modified(self):
+        """Test file is not downloaded again when not modified."""
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.get(
+                self.url, content=b'logo', headers={'ETag': '"v1"'}
+            )
+            path = download_erp_file('/files/logo.png')
+            self.assertTrue(path.startswith('product_images/logo'))
+            with default_storage.open(path) as _file:
+                self.assertEqual(_file.read(), b'logo')
+
+            requests_mocker.get(self.url, status_code=304)
+            self.assertEqual(download_erp_file('/files/logo.png'), path)
+            self.assertEqual(
+                requests_mocker.last_request.headers['If-None-Match'],
+                '"v1"'
+            )
+        self.assertEqual(ErpFile.objects.count(), 1)
+
+    def test_same_content_is_reused(self):
+        """Test same content is not saved again."""
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.get(self.url, content=b'logo')
+            requests_mocker.get(
+                'https://erp.example.com/files/other.png', content=b'logo'
+            )
+            path = download_erp_file('/files/logo.png')
+            self.assertEqual(download_erp_file('/files/logo.png'), path)
+            self.assertEqual(download_erp_file('/files/other.png'), path)
+
+            # Changed content is saved as new file
+            requests_mocker.get(self.url, content=b'new logo')
+            new_path = download_erp_file('/files/logo.png')
+            self.assertNotEqual(new_path, path)
+            with default_storage.open(new_path) as _file:
+                self.assertEqual(_file.read(), b'new logo')
+
+    def test_file_removed_from_storage(self):
+        """Test file is downloaded again when removed from storage."""
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.get(
+                self.url, content=b'logo', headers={'ETag': '"v1"'}
+            )
+            path = download_erp_file('/files/logo.png')
+            default_storage.delete(path)
+            path = download_erp_file('/files/logo.png')
+            self.assertNotIn(
+                'If-None-Match', requests_mocker.last_request.headers
+            )
+            self.assertTrue(default_storage.exists(path))
+
+    def test_failed(self):
+        """Test failed download."""
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.get(self.url, status_code=404)
+            self.assertIsNone(download_erp_file('/files/logo.png'))
+        self.assertFalse(ErpFile.objects.exists())
@@ -1,8 +1,12 @@
+from unittest.mock import patch
+
 from django.contrib.auth.models import User
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from geohosting.models import Instance, Package, Cluster, Region, Product
+from geohosting.models import (
+    Instance, InstanceStatus, Package, Cluster, Region, Product
+)
 
 
 class InstanceViewSetTests(APITestCase):
@@ -74,3 +78,18 @@ class InstanceViewSetTests(APITestCase):
 
         response = self.client.get('/api/instances/my_instances/')
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @patch('geohosting.models.instance.get_credentials_many')
+    @patch.object(Instance, 'cancel_subscription')
+    def test_deleted_without_package_group(
+            self, cancel_subscription, get_credentials_many
+    ):
+        """Test instance without package group is deleted."""
+        self.assertIsNone(self.package.package_group)
+        Instance.prefetch_credentials([self.instance])
+        get_credentials_many.assert_called_once_with([])
+
+        self.instance.deleted()
+        self.instance.refresh_from_db()
+        self.assertEqual(self.instance.status, InstanceStatus.DELETED)
+        cancel_subscription.assert_called_once()
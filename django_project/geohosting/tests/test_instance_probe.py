@@ -0,0 +1,506 @@
+# coding=utf-8
+"""
+GeoHosting.
+
+.. note:: Instance health probe tests.
+"""
+
+import time
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import requests
+import requests_mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from geohosting.factories.package import PackageFactory
+from geohosting.models import (
+    Activity, ActivityType, Cluster, Instance, InstanceProbe,
+    InstanceStatus, InstanceSweep, InstanceUptime, LogTracker, Region,
+    WebhookEvent
+)
+from geohosting.tasks.instances import (
+    SWEEP_LOCK_KEY, check_instances, check_instances_shard,
+    fail_instance_sweep, rollup_instance_probes
+)
+from geohosting.utils.instance_probe import (
+    InstanceProber, next_probe_delay
+)
+from geohosting_controller.variables import ActivityTypeTerm
+
+User = get_user_model()
+
+
+class InstanceProbeTest(TestCase):
+    """Instance health probe tests."""
+
+    def setUp(self):
+        """To setup test."""
+        self.user = User.objects.create(
+            username='user', password='password'
+        )
+        self.cluster = Cluster.objects.create(
+            code='cluster', region=Region.objects.create(name='Region'),
+            domain='example.com'
+        )
+        self.package = PackageFactory()
+
+    def create_instance(self, name, status):
+        """Create instance."""
+        return Instance.objects.create(
+            name=name, price=self.package, cluster=self.cluster,
+            owner=self.user, status=status
+        )
+
+    def logs(self, instance):
+        """Return logs of instance."""
+        return LogTracker.objects.filter(object_id=instance.id)
+
+    def test_probe(self):
+        """Test probe of an instance."""
+        instance = self.create_instance('server-1', InstanceStatus.ONLINE)
+        prober = InstanceProber(max_workers=2, timeout=3)
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.head(instance.url, status_code=302)
+            result = prober.probe(instance)
+            self.assertTrue(result.is_online)
+            self.assertEqual(requests_mocker.last_request.timeout, 3)
+
+            requests_mocker.head(
+                instance.url, exc=requests.exceptions.ConnectTimeout
+            )
+            result = prober.probe(instance)
+            self.assertFalse(result.is_online)
+            self.assertIsNotNone(result.error)
+        self.assertEqual(
+            prober.session('example.com'), prober.session('example.com')
+        )
+        prober.close()
+
+    def test_sweep(self):
+        """Test only changed instances are saved."""
+        online = self.create_instance('online', InstanceStatus.ONLINE)
+        offline = self.create_instance('offline', InstanceStatus.OFFLINE)
+        down = self.create_instance('down', InstanceStatus.ONLINE)
+        error = self.create_instance('error', InstanceStatus.ONLINE)
+        deleted = self.create_instance('deleted', InstanceStatus.DELETED)
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.head(online.url, status_code=200)
+            requests_mocker.head(offline.url, status_code=503)
+            requests_mocker.head(down.url, status_code=503)
+            requests_mocker.head(
+                error.url, exc=requests.exceptions.ConnectionError
+            )
+            sweep = InstanceSweep.objects.get(id=check_instances())
+            self.assertEqual(requests_mocker.call_count, 4)
+        self.assertEqual(sweep.total, 4)
+        self.assertEqual(sweep.probed, 4)
+        self.assertEqual(sweep.changed, 2)
+        self.assertEqual(sweep.coverage, 1)
+        self.assertIsNotNone(sweep.duration)
+        self.assertEqual(InstanceProbe.objects.count(), 4)
+        self.assertEqual(
+            InstanceProbe.objects.filter(online=True).count(), 1
+        )
+
+        for instance in [online, offline, down, error, deleted]:
+            instance.refresh_from_db()
+        self.assertEqual(online.status, InstanceStatus.ONLINE)
+        self.assertEqual(offline.status, InstanceStatus.OFFLINE)
+        self.assertEqual(down.status, InstanceStatus.OFFLINE)
+        self.assertEqual(error.status, InstanceStatus.OFFLINE)
+        self.assertEqual(deleted.status, InstanceStatus.DELETED)
+
+        self.assertFalse(self.logs(online).exists())
+        self.assertFalse(self.logs(offline).exists())
+        self.assertEqual(self.logs(down).count(), 1)
+        self.assertIn('Server: Offline', self.logs(down).first().note)
+        self.assertEqual(self.logs(error).count(), 1)
+
+    def test_checking_server(self):
+        """Test checking single server."""
+        instance = self.create_instance('server', InstanceStatus.ONLINE)
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.head(instance.url, status_code=503)
+            instance.checking_server()
+        instance.refresh_from_db()
+        self.assertEqual(instance.status, InstanceStatus.OFFLINE)
+
+    @override_settings(INSTANCE_SWEEP_SHARD_SIZE=2)
+    def test_sharded_sweep(self):
+        """Test sweep is split into shards."""
+        instances = [
+            self.create_instance(f'server-{idx}', InstanceStatus.OFFLINE)
+            for idx in range(5)
+        ]
+        with requests_mock.Mocker() as requests_mocker:
+            for instance in instances:
+                requests_mocker.head(instance.url, status_code=200)
+            sweep = InstanceSweep.objects.get(id=check_instances())
+            self.assertEqual(requests_mocker.call_count, 5)
+        self.assertEqual(sweep.shards, 3)
+        self.assertEqual(sweep.probed, 5)
+        self.assertEqual(sweep.changed, 5)
+        self.assertEqual(
+            Instance.objects.filter(status=InstanceStatus.ONLINE).count(), 5
+        )
+
+    @override_settings(
+        CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+            }
+        }
+    )
+    def test_overlapping_sweep(self):
+        """Test sweep is skipped when other sweep is running."""
+        self.create_instance('server', InstanceStatus.ONLINE)
+        cache.set(SWEEP_LOCK_KEY, True)
+        with requests_mock.Mocker() as requests_mocker:
+            self.assertIsNone(check_instances())
+            self.assertEqual(requests_mocker.call_count, 0)
+        self.assertFalse(InstanceSweep.objects.exists())
+
+        # Lock is released when the sweep is finished
+        cache.delete(SWEEP_LOCK_KEY)
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.head(requests_mock.ANY, status_code=200)
+            self.assertIsNotNone(check_instances())
+            self.assertIsNotNone(check_instances())
+        self.assertEqual(InstanceSweep.objects.count(), 2)
+
+    @override_settings(
+        CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+            }
+        }
+    )
+    @patch('geohosting.tasks.instances.chord')
+    def test_failed_sweep(self, chord):
+        """Test failed sweep is finished and releases the lock."""
+        self.create_instance('server', InstanceStatus.ONLINE)
+        sweep_id = check_instances()
+        callback = chord.return_value.call_args[0][0]
+        errback = callback.options['link_error'][0]
+        self.assertEqual(errback.task, 'fail_instance_sweep')
+        self.assertTrue(cache.get(SWEEP_LOCK_KEY))
+
+        # Called by celery like the errback
+        errback(MagicMock(), Exception('Shard is failed'), None)
+        sweep = InstanceSweep.objects.get(id=sweep_id)
+        self.assertIsNotNone(sweep.finished_at)
+        self.assertEqual(sweep.error, 'Shard is failed')
+        self.assertIsNone(cache.get(SWEEP_LOCK_KEY))
+
+    def test_status_changed_while_probing(self):
+        """Test status that is changed while probing is kept."""
+        instance = self.create_instance('server', InstanceStatus.OFFLINE)
+        probe_all = InstanceProber.probe_all
+
+        def probe(prober, instances, deadline=None):
+            results = probe_all(prober, instances, deadline=deadline)
+            # The webhook deletes the instance meanwhile
+            Instance.objects.get(id=instance.id).deleting()
+            return results
+
+        with patch.object(InstanceProber, 'probe_all', probe), \
+                requests_mock.Mocker() as requests_mocker:
+            requests_mocker.head(instance.url, status_code=200)
+            sweep = InstanceSweep.objects.get(id=check_instances())
+        self.assertEqual(sweep.probed, 1)
+        self.assertEqual(sweep.changed, 0)
+        instance.refresh_from_db()
+        self.assertEqual(instance.status, InstanceStatus.DELETING)
+        self.assertIsNone(instance.next_probe_at)
+        self.assertFalse(
+            self.logs(instance).filter(note='Server: online').exists()
+        )
+
+    def test_credentials_sent_after_saved(self):
+        """Test credentials are only sent when online status is saved."""
+        instance = self.create_instance(
+            'server', InstanceStatus.STARTING_UP
+        )
+        other = self.create_instance('other', InstanceStatus.STARTING_UP)
+        probe_all = InstanceProber.probe_all
+        saved_statuses = []
+
+        def probe(prober, instances, deadline=None):
+            results = probe_all(prober, instances, deadline=deadline)
+            # The webhook deletes the other instance meanwhile
+            Instance.objects.get(id=other.id).deleting()
+            return results
+
+        def send_credentials(_instance):
+            saved_statuses.append(
+                Instance.objects.get(id=_instance.id).status
+            )
+
+        with patch.object(InstanceProber, 'probe_all', probe), \
+                patch.object(
+                    Instance, 'send_credentials', send_credentials
+                ), requests_mock.Mocker() as requests_mocker:
+            requests_mocker.head(requests_mock.ANY, status_code=200)
+            check_instances()
+            self.assertEqual(saved_statuses, [InstanceStatus.ONLINE])
+
+            # Online instance does not send it again
+            Instance.objects.update(next_probe_at=None)
+            check_instances()
+            self.assertEqual(len(saved_statuses), 1)
+
+    @override_settings(
+        CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+            }
+        }
+    )
+    def test_sweep_not_started(self):
+        """Test lock is released when the sweep can not be started."""
+        self.create_instance('server', InstanceStatus.ONLINE)
+        with patch.object(
+                InstanceSweep.objects, 'create',
+                side_effect=Exception('Database is down')
+        ):
+            with self.assertRaises(Exception):
+                check_instances()
+        self.assertIsNone(cache.get(SWEEP_LOCK_KEY))
+
+    def test_deleting_not_probed(self):
+        """Test deleting instances are only deleted by the webhook."""
+        deleting = self.create_instance('deleting', InstanceStatus.DELETING)
+        deleted = self.create_instance('deleted', InstanceStatus.DELETING)
+        activity = Activity.objects.create(
+            activity_type=ActivityType.objects.create(
+                identifier=ActivityTypeTerm.DELETE_INSTANCE.value,
+                product=self.package.product
+            ),
+            instance=deleted,
+            triggered_by=self.user,
+            client_data={'app_name': deleted.name}
+        )
+        WebhookEvent.objects.create(
+            activity=activity,
+            data={
+                'app_name': f'devops-{deleted.name}',
+                'Status': 'deleted', 'Source': 'ArgoCD'
+            }
+        )
+        with requests_mock.Mocker() as requests_mocker:
+            sweep = InstanceSweep.objects.get(id=check_instances())
+            self.assertEqual(requests_mocker.call_count, 0)
+        self.assertEqual(sweep.total, 0)
+        deleting.refresh_from_db()
+        self.assertEqual(deleting.status, InstanceStatus.DELETING)
+        deleted.refresh_from_db()
+        self.assertEqual(deleted.status, InstanceStatus.DELETED)
+
+        # Not reported as straggler
+        output = check_instances_shard(
+            deleting.id, deleted.id, time.time() - 1
+        )
+        self.assertEqual(output['stragglers'], [])
+
+    def test_shard_after_deadline(self):
+        """Test shard that starts after the deadline is not probed."""
+        instance = self.create_instance('server', InstanceStatus.ONLINE)
+        with requests_mock.Mocker() as requests_mocker:
+            output = check_instances_shard(
+                instance.id, instance.id, time.time() - 1
+            )
+            self.assertEqual(requests_mocker.call_count, 0)
+        self.assertEqual(output['stragglers'], [instance.id])
+
+    @override_settings(
+        INSTANCE_PROBE_MIN_INTERVAL=60,
+        INSTANCE_PROBE_MAX_INTERVAL=600,
+        INSTANCE_PROBE_OFFLINE_INTERVAL=300
+    )
+    def test_next_probe_delay(self):
+        """Test delay of the next probe."""
+        self.assertEqual(next_probe_delay(InstanceStatus.DEPLOYING, 5), 60)
+        self.assertEqual(next_probe_delay(InstanceStatus.STARTING_UP, 5), 60)
+        self.assertEqual(next_probe_delay(InstanceStatus.ONLINE, 0), 60)
+        self.assertEqual(next_probe_delay(InstanceStatus.ONLINE, 2), 240)
+        self.assertEqual(next_probe_delay(InstanceStatus.ONLINE, 100), 600)
+        for _ in range(10):
+            delay = next_probe_delay(InstanceStatus.OFFLINE, 0)
+            self.assertGreaterEqual(delay, 150)
+            self.assertLessEqual(delay, 450)
+
+    def test_adaptive_schedule(self):
+        """Test only instances that are due are probed."""
+        online = self.create_instance('online', InstanceStatus.ONLINE)
+        deploying = self.create_instance(
+            'deploying', InstanceStatus.DEPLOYING
+        )
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.head(online.url, status_code=200)
+            requests_mocker.head(deploying.url, status_code=503)
+            check_instances()
+            self.assertEqual(requests_mocker.call_count, 2)
+
+            # Nothing is due yet
+            sweep = InstanceSweep.objects.get(id=check_instances())
+            self.assertEqual(requests_mocker.call_count, 2)
+            self.assertEqual(sweep.total, 0)
+
+        online.refresh_from_db()
+        self.assertEqual(online.probe_streak, 1)
+        self.assertGreater(
+            online.next_probe_at, now() + timedelta(seconds=60)
+        )
+        deploying.refresh_from_db()
+        self.assertEqual(deploying.status, InstanceStatus.DEPLOYING)
+        self.assertEqual(
+            InstanceProbe.objects.get(instance=deploying).interval, 60
+        )
+        self.assertLessEqual(
+            deploying.next_probe_at, now() + timedelta(seconds=60)
+        )
+
+        # Changed status is checked on the next sweep
+        online.starting_up()
+        self.assertIsNone(online.next_probe_at)
+        self.assertIn(online, Instance.due_for_probe())
+
+    @override_settings(
+        INSTANCE_PROBE_MIN_INTERVAL=60,
+        INSTANCE_PROBE_SCHEDULE_SLACK=30
+    )
+    def test_consecutive_sweeps(self):
+        """Test deploying instance is probed on every sweep."""
+        deploying = self.create_instance(
+            'deploying', InstanceStatus.DEPLOYING
+        )
+        clock = [now()]
+
+        def probe(request, context):
+            # Probing takes a while
+            clock[0] += timedelta(seconds=5)
+            context.status_code = 503
+            return ''
+
+        with patch('django.utils.timezone.now', lambda: clock[0]), \
+                patch(
+                    'geohosting.utils.instance_probe.now', lambda: clock[0]
+                ), requests_mock.Mocker() as requests_mocker:
+            requests_mocker.head(deploying.url, text=probe)
+            start = clock[0]
+            check_instances()
+            self.assertEqual(requests_mocker.call_count, 1)
+
+            # The next sweep is one tick later, a bit early
+            clock[0] = start + timedelta(seconds=59)
+            check_instances()
+            self.assertEqual(requests_mocker.call_count, 2)
+
+    def test_uptime(self):
+        """Test rollups and the uptime of instance."""
+        instance = self.create_instance('server', InstanceStatus.ONLINE)
+        other = self.create_instance('other', InstanceStatus.ONLINE)
+        hour = InstanceUptime.period_start(
+            InstanceUptime.HOUR, now() - timedelta(hours=1)
+        )
+        for idx in range(20):
+            InstanceProbe.objects.create(
+                instance=instance,
+                probed_at=hour + timedelta(minutes=idx),
+                status_code=200 if idx else 503,
+                latency=(idx + 1) * 10,
+                online=bool(idx)
+            )
+        InstanceProbe.objects.create(
+            instance=other, probed_at=hour, online=True, latency=1
+        )
+        # Old probe is purged
+        InstanceProbe.objects.create(
+            instance=instance, probed_at=now() - timedelta(days=30)
+        )
+
+        rollup_instance_probes()
+        rollup_instance_probes()
+        self.assertEqual(InstanceProbe.objects.count(), 21)
+        uptime = InstanceUptime.objects.get(
+            instance=instance, period=InstanceUptime.HOUR
+        )
+        self.assertEqual(uptime.start, hour)
+        self.assertEqual(uptime.probes, 20)
+        self.assertEqual(uptime.uptime, 0.95)
+        self.assertEqual(uptime.latency_p95, 190)
+        self.assertEqual(
+            InstanceUptime.objects.filter(
+                instance=instance, period=InstanceUptime.DAY
+            ).count(), 1
+        )
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.get(
+            f'/api/instances/{instance.id}/uptime/', {
+                'from': (hour - timedelta(days=1)).date().isoformat(),
+                'to': hour.date().isoformat()
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['period'], InstanceUptime.HOUR)
+        self.assertEqual(response.data['probes'], 20)
+        self.assertEqual(response.data['uptime'], 0.95)
+        self.assertEqual(response.data['latency_p95'], 190)
+        self.assertEqual(len(response.data['series']), 1)
+
+        # Longer range is from daily rollups
+        response = client.get(f'/api/instances/{instance.id}/uptime/')
+        self.assertEqual(response.data['period'], InstanceUptime.DAY)
+        self.assertEqual(response.data['probes'], 20)
+
+        response = client.get(
+            f'/api/instances/{instance.id}/uptime/', {
+                'from': '2024-02-01', 'to': '2024-01-01'
+            }
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_uptime_weighted(self):
+        """Test uptime is weighted by the interval of the probes."""
+        instance = self.create_instance('server', InstanceStatus.ONLINE)
+        hour = InstanceUptime.period_start(
+            InstanceUptime.HOUR, now() - timedelta(hours=1)
+        )
+        # Stable for 50 minutes, then offline and probed every minute
+        for idx in range(5):
+            InstanceProbe.objects.create(
+                instance=instance,
+                probed_at=hour + timedelta(minutes=idx * 10),
+                online=True, latency=10, interval=600
+            )
+        for idx in range(10):
+            InstanceProbe.objects.create(
+                instance=instance,
+                probed_at=hour + timedelta(minutes=50 + idx),
+                online=False, interval=60
+            )
+        rollup_instance_probes()
+
+        uptime = InstanceUptime.objects.get(
+            instance=instance, period=InstanceUptime.HOUR
+        )
+        self.assertEqual(uptime.probes, 15)
+        self.assertEqual(uptime.observed_seconds, 3600)
+        self.assertAlmostEqual(uptime.uptime, 3000 / 3600)
+
+        summary = InstanceUptime.summary(
+            instance, hour, hour + timedelta(hours=1)
+        )
+        self.assertAlmostEqual(summary['uptime'], 3000 / 3600)
+        summary = InstanceUptime.summary(
+            instance, hour - timedelta(days=30), hour + timedelta(days=1)
+        )
+        self.assertEqual(summary['period'], InstanceUptime.DAY)
+        self.assertAlmostEqual(summary['uptime'], 3000 / 3600)
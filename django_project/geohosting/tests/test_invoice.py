@@ -0,0 +1,173 @@
+# coding=utf-8
+"""
+GeoHosting.
+
+.. note:: Invoice generation tests.
+"""
+
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core.celery import app
+from geohosting.factories import PackageFactory, SalesOrderFactory
+from geohosting.models import (
+    SalesOrder, SalesOrderPaymentMethod, SalesOrderStatus
+)
+from geohosting.tasks.invoice import (
+    _queued_key, _slot_key, generate_pending_invoices,
+    generate_sales_order_invoice, queue_sales_order_invoice
+)
+
+
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+        }
+    },
+    INVOICE_MAX_CONCURRENCY=1
+)
+@patch('geohosting.models.sales_order.add_erp_next_comment')
+@patch('geohosting.models.erp_model.put_to_erpnext')
+@patch('geohosting.models.erp_model.post_to_erpnext')
+class InvoiceTest(TestCase):
+    """Invoice generation tests."""
+
+    def setUp(self):
+        """To setup test."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='user', email='user@example.com', password='password'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.package = PackageFactory()
+
+        # Eager task is retried only when the retry is not propagated
+        self.eager_propagates = app.conf.task_eager_propagates
+        app.conf.CELERY_TASK_EAGER_PROPAGATES = False
+
+    def tearDown(self):
+        """Restore celery config."""
+        app.conf.CELERY_TASK_EAGER_PROPAGATES = self.eager_propagates
+
+    def create_order(self, mock_post, mock_put):
+        """Create order waiting payment."""
+        mock_post.return_value = {'status': 'success', 'id': 'erpnext_1'}
+        mock_put.return_value = {'status': 'success', 'data': {}}
+        return SalesOrderFactory(
+            package=self.package, customer=self.user,
+            payment_method=SalesOrderPaymentMethod.PAYSTACK,
+            payment_id='ref'
+        )
+
+    @patch('geohosting.models.sales_order.download_erp_file')
+    def test_generated_when_paid(
+            self, download, mock_post, mock_put, mock_comment
+    ):
+        """Test invoice is generated on background when it is paid."""
+        download.return_value = 'invoices/erpnext_1.pdf'
+        order = self.create_order(mock_post, mock_put)
+        response = self.client.get(f'/api/orders/{order.id}/')
+        self.assertIsNone(response.data['invoice_url'])
+        self.assertIsNone(response.data['invoice_status'])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            order.payment_succeeded()
+        response = self.client.get(f'/api/orders/{order.id}/')
+        self.assertIsNone(response.data['invoice_url'])
+        self.assertEqual(response.data['invoice_status'], 'pending')
+        download.assert_not_called()
+
+        # The job does not push the order again
+        saves = mock_put.call_count
+        for callback in callbacks:
+            callback()
+        self.assertEqual(download.call_count, 1)
+        self.assertEqual(mock_put.call_count, saves)
+        response = self.client.get('/api/orders/')
+        order_data = response.data['results'][0]
+        self.assertEqual(order_data['invoice_status'], 'ready')
+        self.assertIn('erpnext_1.pdf', order_data['invoice_url'])
+
+        # Generated once
+        self.assertEqual(generate_pending_invoices(), 0)
+        generate_sales_order_invoice(order.id)
+        self.assertEqual(download.call_count, 1)
+
+    @patch.object(generate_sales_order_invoice, 'max_retries', 2)
+    @patch('geohosting.models.sales_order.download_erp_file')
+    def test_retry(self, download, mock_post, mock_put, mock_comment):
+        """Test failed invoice is retried and picked up by the sweep."""
+        download.side_effect = [Exception('Timeout'), None, None, None]
+        order = self.create_order(mock_post, mock_put)
+        SalesOrder.objects.filter(id=order.id).update(
+            order_status=SalesOrderStatus.WAITING_DEPLOYMENT.key
+        )
+        self.assertEqual(generate_pending_invoices(), 1)
+        self.assertEqual(download.call_count, 3)
+        self.assertFalse(SalesOrder.objects.get(id=order.id).invoice)
+
+        download.side_effect = None
+        download.return_value = 'invoices/erpnext_1.pdf'
+        self.assertEqual(generate_pending_invoices(), 1)
+        self.assertEqual(
+            SalesOrder.objects.get(id=order.id).invoice.name,
+            'invoices/erpnext_1.pdf'
+        )
+
+    @patch.object(generate_sales_order_invoice, 'max_retries', 1)
+    @patch('geohosting.models.sales_order.download_erp_file')
+    def test_concurrency(self, download, mock_post, mock_put, mock_comment):
+        """Test invoice waits for a free download slot."""
+        order = self.create_order(mock_post, mock_put)
+        SalesOrder.objects.filter(id=order.id).update(
+            order_status=SalesOrderStatus.WAITING_DEPLOYMENT.key
+        )
+        cache.set(_slot_key(0), 0)
+        generate_sales_order_invoice.delay(order.id)
+        download.assert_not_called()
+
+    @patch('geohosting.models.sales_order.download_erp_file')
+    def test_without_erpnext_code(
+            self, download, mock_post, mock_put, mock_comment
+    ):
+        """Test order that is not in erpnext has no pending invoice."""
+        order = self.create_order(mock_post, mock_put)
+        SalesOrder.objects.filter(id=order.id).update(
+            order_status=SalesOrderStatus.WAITING_DEPLOYMENT.key,
+            erpnext_code=''
+        )
+        order.refresh_from_db()
+        self.assertFalse(order.invoice_pending)
+        response = self.client.get(f'/api/orders/{order.id}/')
+        self.assertIsNone(response.data['invoice_status'])
+
+        self.assertIsNone(generate_sales_order_invoice.delay(order.id).get())
+        self.assertEqual(generate_pending_invoices(), 0)
+        download.assert_not_called()
+
+    @patch.object(generate_sales_order_invoice, 'max_retries', 1)
+    @patch('geohosting.models.sales_order.download_erp_file')
+    def test_queued_until_finished(
+            self, download, mock_post, mock_put, mock_comment
+    ):
+        """Test order is not queued again while the task is retried."""
+        order = self.create_order(mock_post, mock_put)
+        SalesOrder.objects.filter(id=order.id).update(
+            order_status=SalesOrderStatus.WAITING_DEPLOYMENT.key
+        )
+        queued = []
+
+        def download_file(*args, **kwargs):
+            queued.append(cache.get(_queued_key(order.id)))
+            raise Exception('Timeout')
+
+        download.side_effect = download_file
+        queue_sales_order_invoice(order.id)
+        self.assertEqual(queued, [True, True])
+        self.assertIsNone(cache.get(_queued_key(order.id)))
@@ -0,0 +1,75 @@
+# coding=utf-8
+"""
+GeoHosting.
+
+.. note:: Activity type mapping tests.
+"""
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from geohosting.factories.package import ProductFactory
+from geohosting.models import ActivityType, ActivityTypeMapping
+from geohosting.models.activity import _mappings
+
+
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+        }
+    }
+)
+class ActivityTypeMappingTest(TestCase):
+    """Activity type mapping tests."""
+
+    def setUp(self):
+        """To setup test."""
+        cache.clear()
+        self.activity_type = ActivityType.objects.create(
+            identifier='test', product=ProductFactory(name='Test'),
+            jenkins_url='https://jenkins/job/test'
+        )
+        for key in ['app_name', 'cluster']:
+            ActivityTypeMapping.objects.create(
+                activity_type=self.activity_type,
+                geohosting_key=key, jenkins_key=key.upper()
+            )
+
+    def test_mapping_data(self):
+        """Test mapping data without query after it is compiled."""
+        data = {'app_name': 'server', 'cluster': 'ktz', 'other': 1}
+        expected = {'APP_NAME': 'server', 'CLUSTER': 'ktz'}
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                self.activity_type.mapping_data(data), expected
+            )
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.activity_type.mapping_data(data), expected
+            )
+            # Other process uses the shared cache
+            _mappings.clear()
+            self.assertEqual(
+                ActivityType(id=self.activity_type.id).mapping,
+                {'app_name': 'APP_NAME', 'cluster': 'CLUSTER'}
+            )
+
+    def test_invalidate(self):
+        """Test mapping is invalidated when it is changed."""
+        self.assertEqual(
+            self.activity_type.mapping_data({'app_name': 'a'}),
+            {'APP_NAME': 'a'}
+        )
+        mapping = ActivityTypeMapping.objects.get(geohosting_key='app_name')
+        mapping.jenkins_key = 'k8s_app_name'
+        mapping.save()
+        self.assertEqual(
+            self.activity_type.mapping_data({'app_name': 'a'}),
+            {'k8s_app_name': 'a'}
+        )
+
+        mapping.delete()
+        self.assertEqual(
+            self.activity_type.mapping_data({'app_name': 'a'}), {}
+        )
@@ -0,0 +1,107 @@
+# coding=utf-8
+"""
+GeoHosting.
+
+.. note:: App name availability tests.
+"""
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from geohosting.factories.package import PackageFactory
+from geohosting.models import (
+    Activity, ActivityStatus, ActivityType, AppName, Cluster, Instance,
+    InstanceStatus, Region
+)
+from geohosting.validators import (
+    app_name_hold_validator, app_name_validator
+)
+
+User = get_user_model()
+
+
+class AppNameTest(TestCase):
+    """App name availability tests."""
+
+    def setUp(self):
+        """To setup test."""
+        self.user = User.objects.create(username='user', password='password')
+        self.other = User.objects.create(
+            username='other', password='password'
+        )
+        self.package = PackageFactory()
+
+    def create_instance(self, name):
+        """Create instance."""
+        return Instance.objects.create(
+            name=name, price=self.package, owner=self.user,
+            cluster=Cluster.objects.create(
+                code=name, region=Region.objects.create(name=name)
+            )
+        )
+
+    def test_instance(self):
+        """Test name is taken by instance until it is deleted."""
+        instance = self.create_instance('server')
+        with self.assertNumQueries(1):
+            self.assertFalse(AppName.is_available('server'))
+        with self.assertRaises(ValidationError):
+            app_name_validator('server')
+        with self.assertRaises(ValidationError):
+            app_name_hold_validator('server', self.user)
+
+        instance.status = InstanceStatus.DELETED
+        instance.save()
+        self.assertTrue(AppName.is_available('server'))
+
+    def test_activity(self):
+        """Test name is taken by running activity."""
+        activity = Activity.objects.create(
+            activity_type=ActivityType.objects.create(
+                identifier='test', product=self.package.product
+            ),
+            triggered_by=self.user,
+            client_data={'app_name': 'server'}
+        )
+        self.assertFalse(AppName.is_available('server'))
+        activity.status = ActivityStatus.ERROR
+        activity.save()
+        self.assertTrue(AppName.is_available('server'))
+
+    def test_hold(self):
+        """Test name is held for the user during checkout."""
+        self.assertTrue(AppName.hold('server', self.user))
+        self.assertFalse(AppName.hold('server', self.other))
+        self.assertTrue(AppName.hold('server', self.user))
+        self.assertTrue(AppName.is_available('server', self.user))
+        self.assertFalse(AppName.is_available('server', self.other))
+        # Validator of the models does not check the holds
+        app_name_validator('server')
+
+        client = APIClient()
+        client.force_authenticate(user=self.other)
+        response = client.post(
+            '/api/test-app-name/', {'app_name': 'server'}
+        )
+        self.assertEqual(response.status_code, 400)
+        client.force_authenticate(user=self.user)
+        response = client.post(
+            '/api/test-app-name/', {'app_name': 'server'}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        # Expired hold
+        AppName.objects.update(expires_at=timezone.now() - timedelta(1))
+        self.assertTrue(AppName.is_available('server', self.other))
+        self.assertTrue(AppName.hold('server', self.other))
+        self.assertEqual(AppName.objects.get().held_by, self.other)
+
+        # Instance takes the name
+        self.create_instance('server')
+        self.assertIsNone(AppName.objects.get().expires_at)
+        self.assertFalse(AppName.hold('server', self.other))
@@ -0,0 +1,181 @@
+# coding=utf-8
+"""
+GeoHosting.
+
+.. note:: Test GeoHosting.
+"""
+
+import json
+from datetime import timedelta
+
+import requests_mock
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+
+from geohosting.models.country import Country
+from geohosting.models.erp import ErpSyncState
+from geohosting.models.reconcile import BulkReconciler
+
+
+@override_settings(ERPNEXT_BASE_URL='https://erp.example.com')
+class ErpModelSyncTest(TestCase):
+    """Incremental sync of ErpModel test case."""
+
+    count_url = (
+        'https://erp.example.com/api/method/frappe.client.get_count'
+    )
+    resource_url = 'https://erp.example.com/api/resource/Country'
+
+    def sync(self, rows, full=False):
+        """Sync countries with the rows from erp."""
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.get(self.count_url, json={'message': len(rows)})
+            requests_mocker.get(self.resource_url, json={'data': rows})
+            Country.sync_data(full=full)
+            return requests_mocker.request_history
+
+    def test_incremental_sync(self):
+        """Test only the modified rows are fetched after first sync."""
+        self.sync(
+            [
+                {
+                    'name': 'Indonesia', 'code': 'id',
+                    'modified': '2024-01-01 00:00:00.000000'
+                },
+                {
+                    'name': 'South Africa', 'code': 'za',
+                    'modified': '2024-01-02 00:00:00.000000'
+                }
+            ]
+        )
+        self.assertEqual(Country.objects.count(), 2)
+        state = ErpSyncState.for_model(Country)
+        self.assertEqual(state.last_modified, '2024-01-02 00:00:00.000000')
+        self.assertIsNotNone(state.last_full_synced_at)
+
+        history = self.sync(
+            [
+                {
+                    'name': 'South Africa', 'code': 'zaf',
+                    'modified': '2024-01-03 00:00:00.000000'
+                }
+            ]
+        )
+        self.assertEqual(
+            json.loads(history[0].qs['filters'][0]),
+            [['modified', '>=', '2024-01-02 00:00:00.000000']]
+        )
+        # Incremental sync does not remove rows
+        self.assertEqual(Country.objects.count(), 2)
+        self.assertEqual(
+            Country.objects.get(erpnext_code='South Africa').code, 'zaf'
+        )
+        state.refresh_from_db()
+        self.assertEqual(state.last_modified, '2024-01-03 00:00:00.000000')
+
+    def test_full_sync_removes_deleted_rows(self):
+        """Test full sync removes the rows deleted on erp."""
+        Country.objects.create(name='Old', erpnext_code='Old')
+        Country.objects.create(name='Local')
+        history = self.sync(
+            [
+                {
+                    'name': 'Indonesia', 'code': 'id',
+                    'modified': '2024-01-01 00:00:00.000000'
+                }
+            ]
+        )
+        self.assertNotIn('filters', history[0].qs)
+        self.assertFalse(Country.objects.filter(erpnext_code='Old').exists())
+        self.assertTrue(Country.objects.filter(name='Local').exists())
+        self.assertTrue(
+            Country.objects.filter(erpnext_code='Indonesia').exists()
+        )
+
+    def test_incomplete_full_sync_keeps_rows(self):
+        """Test rows are not removed when rows may be missed."""
+        Country.objects.create(name='Old', erpnext_code='Old')
+        with requests_mock.Mocker() as requests_mocker:
+            # A row is deleted on erp while fetching
+            requests_mocker.get(self.count_url, json={'message': 2})
+            requests_mocker.get(
+                self.resource_url, json={
+                    'data': [
+                        {
+                            'name': 'Indonesia', 'code': 'id',
+                            'modified': '2024-01-01 00:00:00.000000'
+                        }
+                    ]
+                }
+            )
+            Country.sync_data(full=True)
+        self.assertTrue(Country.objects.filter(erpnext_code='Old').exists())
+        self.assertTrue(
+            Country.objects.filter(erpnext_code='Indonesia').exists()
+        )
+        # Full sync is retried
+        state = ErpSyncState.for_model(Country)
+        self.assertIsNotNone(state.last_synced_at)
+        self.assertTrue(state.is_full_sync_due)
+
+    def test_full_sync_is_due(self):
+        """Test full sync is due periodically."""
+        state = ErpSyncState.for_model(Country)
+        self.assertTrue(state.is_full_sync_due)
+        state.synced('2024-01-01 00:00:00.000000', full=True)
+        self.assertFalse(state.is_full_sync_due)
+        state.last_full_synced_at = now() - timedelta(days=2)
+        self.assertTrue(state.is_full_sync_due)
+
+    def test_failed_sync_keeps_state(self):
+        """Test the state is not moved when sync is failed."""
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.get(self.count_url, status_code=500)
+            Country.sync_data()
+        state = ErpSyncState.for_model(Country)
+        self.assertIsNone(state.last_synced_at)
+
+
+class BulkReconcilerTest(TestCase):
+    """Bulk reconciler test case."""
+
+    def test_reconcile(self):
+        """Test rows are inserted, updated, unchanged and deleted."""
+        Country.objects.create(
+            name='Indonesia', code='id', erpnext_code='Indonesia'
+        )
+        Country.objects.create(
+            name='South Africa', code='za', erpnext_code='South Africa'
+        )
+        Country.objects.create(
+            name='Old', code='old', erpnext_code='Old'
+        )
+        rows = {
+            'Indonesia': {'name': 'Indonesia', 'code': 'id'},
+            'South Africa': {'name': 'South Africa', 'code': 'zaf'},
+            'Kenya': {'name': 'Kenya', 'code': 'ke'},
+        }
+        reconciler = BulkReconciler(Country.objects.all())
+        with self.assertNumQueries(9):
+            # select, savepoints, 1 insert, 1 update and the deletion
+            # that also nullifies the billing information countries
+            result = reconciler.reconcile(rows, delete_missing=True)
+        self.assertEqual(
+            result.as_dict(),
+            {'inserted': 1, 'updated': 1, 'unchanged': 1, 'deleted': 1}
+        )
+        self.assertEqual(
+            list(
+                Country.objects.order_by('name').values_list(
+                    'erpnext_code', 'code'
+                )
+            ),
+            [('Indonesia', 'id'), ('Kenya', 'ke'), ('South Africa', 'zaf')]
+        )
+
+        # Second reconcile has nothing to do
+        result = reconciler.reconcile(rows)
+        self.assertEqual(
+            result.as_dict(),
+            {'inserted': 0, 'updated': 0, 'unchanged': 3, 'deleted': 0}
+        )
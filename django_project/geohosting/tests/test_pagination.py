@@ -0,0 +1,110 @@
+# coding=utf-8
+"""
+GeoHosting.
+
+.. note:: Cursor pagination tests.
+"""
+
+import base64
+import json
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from geohosting.factories import PackageFactory, SalesOrderFactory
+from geohosting.models import SalesOrder
+
+
+@patch('geohosting.models.erp_model.put_to_erpnext')
+@patch('geohosting.models.erp_model.post_to_erpnext')
+class CursorPaginationTest(TestCase):
+    """Cursor pagination tests."""
+
+    url = '/api/orders/'
+
+    def setUp(self):
+        """To setup test."""
+        self.user = User.objects.create_user(
+            username='user', email='user@example.com', password='password'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_orders(self, mock_post, mock_put):
+        """Create orders, some of them on the same date."""
+        mock_post.return_value = {'status': 'success', 'id': 'erpnext_1'}
+        mock_put.return_value = {'status': 'success', 'data': {}}
+        package = PackageFactory()
+        date = now()
+        for idx in range(7):
+            SalesOrderFactory(
+                package=package, customer=self.user, date=date
+            )
+        ids = list(
+            SalesOrder.objects.order_by('-date', 'id').values_list(
+                'id', flat=True
+            )
+        )
+        self.assertEqual(len(ids), 7)
+        return ids
+
+    def get(self, url):
+        """Return data and query count of url."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(context.captured_queries)
+
+    def test_cursor(self, mock_post, mock_put):
+        """Test paging forward and backward by cursor."""
+        ids = self.create_orders(mock_post, mock_put)
+        data, queries = self.get(f'{self.url}?cursor=&page_size=3')
+        self.assertIsNone(data['count'])
+        self.assertIsNone(data['previous'])
+        self.assertEqual(data['page_size'], 3)
+        pages = [[row['id'] for row in data['results']]]
+        while data['next']:
+            data, next_queries = self.get(data['next'])
+            self.assertEqual(next_queries, queries)
+            pages.append([row['id'] for row in data['results']])
+        self.assertEqual(pages, [ids[:3], ids[3:6], ids[6:]])
+
+        # Backward
+        data, _ = self.get(data['previous'])
+        self.assertEqual([row['id'] for row in data['results']], ids[3:6])
+        data, _ = self.get(data['previous'])
+        self.assertEqual([row['id'] for row in data['results']], ids[:3])
+        self.assertIsNone(data['previous'])
+        self.assertIsNotNone(data['next'])
+
+    def test_count(self, mock_post, mock_put):
+        """Test count is returned when it is requested."""
+        self.create_orders(mock_post, mock_put)
+        data, _ = self.get(f'{self.url}?cursor=&page_size=3&count=true')
+        self.assertEqual(data['count'], 7)
+        self.assertEqual(data['total_page'], 3)
+
+        # Page number is still the default
+        data, _ = self.get(f'{self.url}?page=2&page_size=3')
+        self.assertEqual(data['page'], 2)
+        self.assertEqual(data['count'], 7)
+
+    def test_invalid_cursor(self, mock_post, mock_put):
+        """Test invalid cursor."""
+        response = self.client.get(f'{self.url}?cursor=invalid')
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor(self, mock_post, mock_put):
+        """Test cursor with invalid position values."""
+        self.create_orders(mock_post, mock_put)
+        for position in [['not-a-date', 1], [now().isoformat(), 'id']]:
+            cursor = base64.urlsafe_b64encode(
+                json.dumps({'p': position, 'r': False}).encode()
+            ).decode()
+            response = self.client.get(f'{self.url}?cursor={cursor}')
+            self.assertEqual(response.status_code, 404)
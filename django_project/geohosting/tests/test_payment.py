@@ -0,0 +1,237 @@
+# coding=utf-8
+"""
+GeoHosting.
+
+.. note:: Payment reconciliation tests.
+"""
+
+import hashlib
+import hmac
+import json
+import time
+from unittest.mock import patch
+
+import stripe
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from geohosting.factories import PackageFactory, SalesOrderFactory
+from geohosting.models import (
+    SalesOrder, SalesOrderPaymentMethod, SalesOrderStatus
+)
+from geohosting.tasks.payment import reconcile_sales_order_payments
+
+
+@override_settings(
+    STRIPE_WEBHOOK_SECRET='whsec_test', PAYSTACK_SECRET_KEY='sk_test'
+)
+@patch('geohosting.models.sales_order.add_erp_next_comment')
+@patch('geohosting.models.erp_model.put_to_erpnext')
+@patch('geohosting.models.erp_model.post_to_erpnext')
+class PaymentTest(TestCase):
+    """Payment reconciliation tests."""
+
+    def setUp(self):
+        """To setup test."""
+        self.user = User.objects.create_user(
+            username='user', email='user@example.com', password='password'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.package = PackageFactory()
+
+    def create_order(self, payment_method, payment_id):
+        """Create order waiting payment."""
+        return SalesOrderFactory(
+            package=self.package, customer=self.user,
+            payment_method=payment_method, payment_id=payment_id
+        )
+
+    def mock_erp(self, mock_post, mock_put):
+        """Mock erp calls."""
+        mock_post.return_value = {'status': 'success', 'id': 'erpnext_1'}
+        mock_put.return_value = {'status': 'success', 'data': {}}
+
+    def status(self, order):
+        """Return status of order from database."""
+        return SalesOrder.objects.get(id=order.id).order_status
+
+    @patch(
+        'geohosting.utils.payment.'
+        'PaystackPaymentGateway.payment_verification'
+    )
+    def test_read_does_not_call_gateway(
+            self, verification, mock_post, mock_put, mock_comment
+    ):
+        """Test list and detail do not call the gateway."""
+        self.mock_erp(mock_post, mock_put)
+        order = self.create_order(SalesOrderPaymentMethod.PAYSTACK, 'ref')
+        response = self.client.get('/api/orders/')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(f'/api/orders/{order.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data['order_status'],
+            SalesOrderStatus.WAITING_PAYMENT.key
+        )
+        verification.assert_not_called()
+
+    @patch(
+        'geohosting.utils.payment.'
+        'PaystackPaymentGateway.payment_verification',
+        autospec=True
+    )
+    def test_reconcile(self, verification, mock_post, mock_put, mock_comment):
+        """Test orders waiting payment are reconciled."""
+        self.mock_erp(mock_post, mock_put)
+        paid = self.create_order(SalesOrderPaymentMethod.PAYSTACK, 'paid')
+        unpaid = self.create_order(SalesOrderPaymentMethod.PAYSTACK, 'no')
+        self.create_order(SalesOrderPaymentMethod.PAYSTACK, None)
+        verification.side_effect = (
+            lambda gateway: gateway.payment_id == 'paid'
+        )
+
+        self.assertEqual(
+            reconcile_sales_order_payments(), {'checked': 2, 'paid': 1}
+        )
+        self.assertEqual(
+            reconcile_sales_order_payments(), {'checked': 1, 'paid': 0}
+        )
+        self.assertEqual(
+            self.status(paid), SalesOrderStatus.WAITING_CONFIGURATION.key
+        )
+        self.assertEqual(
+            self.status(unpaid), SalesOrderStatus.WAITING_PAYMENT.key
+        )
+
+    @patch(
+        'geohosting.utils.payment.'
+        'StripePaymentGateway.payment_verification'
+    )
+    def test_stripe_webhook(
+            self, verification, mock_post, mock_put, mock_comment
+    ):
+        """Test stripe webhook."""
+        verification.return_value = True
+        self.mock_erp(mock_post, mock_put)
+        order = self.create_order(SalesOrderPaymentMethod.STRIPE, 'cs_1')
+        payload = json.dumps({
+            'id': 'evt_1',
+            'object': 'event',
+            'type': 'checkout.session.completed',
+            'data': {
+                'object': {'id': 'cs_1', 'payment_status': 'paid'}
+            }
+        })
+        timestamp = int(time.time())
+        signature = stripe.WebhookSignature._compute_signature(
+            f'{timestamp}.{payload}', 'whsec_test'
+        )
+        url = '/api/payment/stripe/webhook/'
+        response = self.client.post(
+            url, payload, content_type='application/json',
+            HTTP_STRIPE_SIGNATURE=f't={timestamp},v1=invalid'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            self.status(order), SalesOrderStatus.WAITING_PAYMENT.key
+        )
+
+        response = self.client.post(
+            url, payload, content_type='application/json',
+            HTTP_STRIPE_SIGNATURE=f't={timestamp},v1={signature}'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.status(order), SalesOrderStatus.WAITING_CONFIGURATION.key
+        )
+        verification.assert_called_once()
+
+    @patch(
+        'geohosting.utils.payment.'
+        'PaystackPaymentGateway.payment_verification'
+    )
+    def test_paystack_webhook(
+            self, verification, mock_post, mock_put, mock_comment
+    ):
+        """Test paystack webhook."""
+        verification.return_value = True
+        self.mock_erp(mock_post, mock_put)
+        order = self.create_order(SalesOrderPaymentMethod.PAYSTACK, 'ref_1')
+        other = self.create_order(SalesOrderPaymentMethod.STRIPE, 'ref_1')
+        payload = json.dumps(
+            {'event': 'charge.success', 'data': {'reference': 'ref_1'}}
+        ).encode()
+        url = '/api/payment/paystack/webhook/'
+        response = self.client.post(
+            url, payload, content_type='application/json',
+            HTTP_X_PAYSTACK_SIGNATURE='invalid'
+        )
+        self.assertEqual(response.status_code, 400)
+
+        signature = hmac.new(b'sk_test', payload, hashlib.sha512).hexdigest()
+        response = self.client.post(
+            url, payload, content_type='application/json',
+            HTTP_X_PAYSTACK_SIGNATURE=signature
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.status(order), SalesOrderStatus.WAITING_CONFIGURATION.key
+        )
+        self.assertEqual(
+            self.status(other), SalesOrderStatus.WAITING_PAYMENT.key
+        )
+
+    @patch(
+        'geohosting.utils.payment.'
+        'PaystackPaymentGateway.payment_verification'
+    )
+    def test_webhook_not_verified(
+            self, verification, mock_post, mock_put, mock_comment
+    ):
+        """Test signed event of unpaid order does not move it forward."""
+        verification.return_value = False
+        self.mock_erp(mock_post, mock_put)
+        order = self.create_order(SalesOrderPaymentMethod.PAYSTACK, 'ref_1')
+        payload = json.dumps(
+            {'event': 'charge.success', 'data': {'reference': 'ref_1'}}
+        ).encode()
+        signature = hmac.new(b'sk_test', payload, hashlib.sha512).hexdigest()
+        response = self.client.post(
+            '/api/payment/paystack/webhook/', payload,
+            content_type='application/json',
+            HTTP_X_PAYSTACK_SIGNATURE=signature
+        )
+        self.assertEqual(response.status_code, 200)
+        verification.assert_called_once()
+        self.assertEqual(
+            self.status(order), SalesOrderStatus.WAITING_PAYMENT.key
+        )
+
+    @override_settings(STRIPE_WEBHOOK_SECRET='', PAYSTACK_SECRET_KEY='')
+    def test_webhook_without_secret(
+            self, mock_post, mock_put, mock_comment
+    ):
+        """Test webhooks are not available without the secret."""
+        self.mock_erp(mock_post, mock_put)
+        order = self.create_order(SalesOrderPaymentMethod.PAYSTACK, 'ref_1')
+        payload = json.dumps(
+            {'event': 'charge.success', 'data': {'reference': 'ref_1'}}
+        ).encode()
+        # Signed with the empty key
+        signature = hmac.new(b'', payload, hashlib.sha512).hexdigest()
+        response = self.client.post(
+            '/api/payment/paystack/webhook/', payload,
+            content_type='application/json',
+            HTTP_X_PAYSTACK_SIGNATURE=signature
+        )
+        self.assertEqual(response.status_code, 503)
+        response = self.client.post(
+            '/api/payment/stripe/webhook/', '{}',
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(
+            self.status(order), SalesOrderStatus.WAITING_PAYMENT.key
+        )
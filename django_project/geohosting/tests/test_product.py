@@ -3,7 +3,7 @@ from unittest.mock import patch, MagicMock
 
 from django.contrib.auth.models import User
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import RequestFactory
+from django.test import RequestFactory, TestCase as DjangoTestCase
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.authtoken.models import Token
@@ -119,7 +119,7 @@ class FetchProductsTestCase(TestCase):
         self.url = reverse('fetch_products')
 
     @patch('geohosting.views.products.fetch_erpnext_data')
-    @patch('geohosting.utils.erpnext.requests.get')
+    @patch('geohosting.utils.erpnext.ErpNextClient.get')
     def test_fetch_products_success(self, mock_get, mock_fetch_erpnext_data):
         # Mocking the ERPNext data fetch
         mock_fetch_erpnext_data.side_effect = [
@@ -161,6 +161,8 @@ class FetchProductsTestCase(TestCase):
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.content = b'fake image content'
+        mock_response.iter_content.return_value = [b'fake image content']
+        mock_response.headers = {}
         mock_get.return_value = mock_response
 
         self.client.force_authenticate(user=self.user)
@@ -194,7 +196,7 @@ class FetchProductsTestCase(TestCase):
         self.assertFalse(product2.available)
 
     @patch('geohosting.views.products.fetch_erpnext_data')
-    @patch('geohosting.utils.erpnext.requests.get')
+    @patch('geohosting.utils.erpnext.ErpNextClient.get')
     def test_fetch_products_image_download_fail(self, mock_get,
                                                 mock_fetch_erpnext_data):
         # Mocking the ERPNext data fetch
@@ -345,6 +347,102 @@ class ProductViewSetTestCase(APITestCase):
                          serializer.data['product_meta'])
 
 
+class FetchProductsPipelineTestCase(DjangoTestCase):
+
+    def setUp(self):
+        Product.objects.all().delete()
+        description = (
+            '<div><p><strong>short description</strong></p>'
+            '<p>Description.</p><p><br>'
+        )
+        self.items = [
+            {
+                'name': 'GeoNode', 'item_name': 'GeoNode',
+                'description': description, 'image': ''
+            },
+            {
+                'name': 'GeoNode-Small-DO', 'item_name': 'GeoNode-Small-DO',
+            },
+            {
+                'name': 'G3W', 'item_name': 'G3W',
+                'description': description, 'image': ''
+            },
+            {
+                'name': 'G3W-Small-DO', 'item_name': 'G3W-Small-DO',
+            }
+        ]
+        self.details = {
+            'Item/GeoNode': {
+                'attributes': [{'attribute': 'Host Specifications'}]
+            },
+            'Item/G3W': {
+                'attributes': [{'attribute': 'Host Specifications'}]
+            },
+            'Item/GeoNode-Small-DO': {'variant_of': 'GeoNode'},
+            'Item/G3W-Small-DO': {'variant_of': 'G3W'},
+            'Item Attribute/Host Specifications': {
+                'item_attribute_values': [
+                    {'abbr': 'Small', 'attribute_value': '2 CPU; 4 GB'}
+                ]
+            }
+        }
+
+    def detail(self, doctype, filters=None):
+        if doctype == 'Item Price':
+            return [
+                {
+                    'name': f'price-{filters["item_code"]}-{currency}',
+                    'item_name': filters['item_code'],
+                    'item_code': filters['item_code'],
+                    'currency': currency,
+                    'price_list_rate': 10.5,
+                    'price_list': 'Standard Selling'
+                }
+                for currency in ['USD', 'ZAR']
+            ]
+        return self.details[doctype]
+
+    @patch('geohosting.views.products.download_erp_file')
+    @patch('geohosting.views.products.fetch_erpnext_detail_data')
+    @patch('geohosting.views.products.fetch_erpnext_data')
+    def test_fetch_products(
+            self, mock_fetch_erpnext_data, mock_fetch_detail,
+            mock_download
+    ):
+        from geohosting.views.products import fetch_products_from_erpnext
+        mock_fetch_erpnext_data.return_value = self.items
+        mock_fetch_detail.side_effect = self.detail
+        mock_download.return_value = None
+
+        products = fetch_products_from_erpnext()
+        self.assertEqual(len(products), 2)
+
+        # Shared attribute is fetched once in the run
+        attribute_calls = [
+            call for call in mock_fetch_detail.call_args_list
+            if call.args[0].startswith('Item Attribute/')
+        ]
+        self.assertEqual(len(attribute_calls), 1)
+
+        for name in ['GeoNode', 'G3W']:
+            product = Product.objects.get(upstream_id=name)
+            packages = product.packages.order_by('currency')
+            self.assertEqual(
+                list(packages.values_list('currency', flat=True)),
+                ['USD', 'ZAR']
+            )
+            self.assertEqual(
+                packages.first().feature_list, {'spec': ['2 CPU', '4 GB']}
+            )
+            self.assertEqual(
+                packages.first().package_group.name, f'{name}-Small-DO'
+            )
+
+        # Run again does not duplicate packages
+        fetch_products_from_erpnext()
+        self.assertEqual(Package.objects.count(), 4)
+
+
 class DeleteOldImageSignalTest(TestCase):
 
     def setUp(self):
@@ -0,0 +1,163 @@
+# coding=utf-8
+"""
+GeoHosting.
+
+.. note:: Product catalogue cache tests.
+"""
+
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from geohosting.factories.package import PackageFactory
+from geohosting.models import Package, ProductMetadata
+from geohosting.utils.product_catalogue import (
+    _snapshot_key, catalogue_version, get_snapshot, rebuild_catalogue
+)
+from geohosting.views.products import save_packages
+
+
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+        }
+    }
+)
+class ProductCatalogueTest(TestCase):
+    """Product catalogue cache tests."""
+
+    def setUp(self):
+        """To setup test."""
+        cache.clear()
+        self.client = APIClient()
+        self.package = PackageFactory(currency='USD')
+        self.product = self.package.product
+        PackageFactory(
+            product=self.product, name=self.package.name, currency='ZAR',
+            price=2000
+        )
+
+    def test_list(self):
+        """Test list is served from cache with etag."""
+        response = self.client.get('/api/products/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/products/')
+            self.assertEqual(response['ETag'], etag)
+            response = self.client.get(
+                '/api/products/', HTTP_IF_NONE_MATCH=etag
+            )
+            self.assertEqual(response.status_code, 304)
+
+        # Changed product is served with new etag
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'New name'
+            self.product.save()
+        response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['results'][0]['name'], 'New name')
+
+    def test_retrieve(self):
+        """Test detail is served from cache by id, name and currency."""
+        response = self.client.get(f'/api/products/{self.product.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['packages'][0]['currency'], 'USD')
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                f'/api/products/{self.product.name.upper()}/'
+            )
+            self.assertEqual(response.data['id'], self.product.id)
+
+            # Unknown currency is the default catalogue
+            response = self.client.get(
+                f'/api/products/{self.product.id}/?currency=XYZ'
+            )
+            self.assertEqual(response.data['packages'][0]['currency'], 'USD')
+
+        response = self.client.get('/api/products/999/')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(
+            f'/api/products/{self.product.id}/?currency=ZAR'
+        )
+        self.assertEqual(response.data['packages'][0]['currency'], 'ZAR')
+
+        # Changed metadata is rebuilt
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductMetadata.objects.create(
+                product=self.product, key='key', value='value'
+            )
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/api/products/{self.product.id}/')
+        self.assertEqual(
+            response.data['product_meta'], [{'key': 'key', 'value': 'value'}]
+        )
+
+    def price(self):
+        """Return price of the served package."""
+        response = self.client.get(f'/api/products/{self.product.id}/')
+        return response.data['packages'][0]['price']
+
+    def test_rebuild(self):
+        """Test rebuild does not reuse the cached snapshot."""
+        self.assertEqual(float(self.price()), 100)
+        Package.objects.filter(id=self.package.id).update(price=150)
+        self.assertEqual(float(self.price()), 100)
+        self.assertEqual(rebuild_catalogue(), 3)
+        self.assertEqual(float(self.price()), 150)
+
+    def test_bulk_packages(self):
+        """Test packages saved in bulk invalidate the catalogue."""
+        Package.objects.filter(id=self.package.id).update(
+            erpnext_code='price-1'
+        )
+        self.assertEqual(float(self.price()), 100)
+        with self.captureOnCommitCallbacks(execute=True):
+            save_packages(
+                'package', self.product, {}, [
+                    {
+                        'name': 'price-1',
+                        'item_name': self.package.name,
+                        'item_code': 'item-1',
+                        'price_list': 'Standard Selling',
+                        'price_list_rate': 200,
+                        'currency': 'USD'
+                    }
+                ]
+            )
+        self.assertEqual(float(self.price()), 200)
+
+    @patch(
+        'geohosting.tasks.products.rebuild_product_catalogue.apply_async'
+    )
+    def test_served_until_rebuilt(self, apply_async):
+        """Test previous catalogue is served until it is rebuilt."""
+        self.assertEqual(float(self.price()), 100)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.package.price = 150
+            self.package.save()
+        apply_async.assert_called_once()
+        with self.assertNumQueries(0):
+            self.assertEqual(float(self.price()), 100)
+        rebuild_catalogue()
+        self.assertEqual(float(self.price()), 150)
+
+    def test_missing_snapshot_is_built_once(self):
+        """Test request waits for the snapshot that is being built."""
+        key = _snapshot_key(catalogue_version(), '')
+        cache.add(f'{key}:lock', True)
+
+        def sleep(seconds):
+            # The other request stores the snapshot meanwhile
+            cache.set(key, {'currencies': [], 'built': True})
+
+        with patch(
+                'geohosting.utils.product_catalogue.time.sleep', sleep
+        ), self.assertNumQueries(0):
+            self.assertTrue(get_snapshot()['built'])
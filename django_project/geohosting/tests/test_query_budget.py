@@ -0,0 +1,127 @@
+# coding=utf-8
+"""
+GeoHosting.
+
+.. note:: Query budget tests of the list and detail endpoints.
+"""
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from geohosting.factories import PackageFactory, SalesOrderFactory
+from geohosting.models import (
+    Cluster, Instance, ProductCluster, ProductMetadata, Region
+)
+
+User = get_user_model()
+
+
+@patch('geohosting.models.erp_model.put_to_erpnext')
+@patch('geohosting.models.erp_model.post_to_erpnext')
+class QueryBudgetTest(TestCase):
+    """Query count of the endpoints is constant in the page size."""
+
+    # Maximum queries of each endpoint
+    budget = {
+        'instance-list': 7,
+        'instance-detail': 6,
+        'order-list': 2,
+        'order-detail': 11
+    }
+
+    def setUp(self):
+        """To setup test."""
+        self.user = User.objects.create(
+            username='user', password='password'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.cluster = Cluster.objects.create(
+            code='cluster', region=Region.default_region(),
+            domain='example.com'
+        )
+        self.count = 0
+
+    def create_rows(self, total):
+        """Create instances and orders, each with its own product."""
+        rows = []
+        for _ in range(total):
+            self.count += 1
+            package = PackageFactory(currency='USD')
+            PackageFactory(product=package.product, currency='EUR')
+            ProductMetadata.objects.create(
+                product=package.product, key='key', value='value'
+            )
+            ProductCluster.objects.create(
+                product=package.product, cluster=self.cluster
+            )
+            name = f'server-{self.count}'
+            instance = Instance.objects.create(
+                name=name, price=package, cluster=self.cluster,
+                owner=self.user
+            )
+            order = SalesOrderFactory(
+                package=package, customer=self.user, app_name=name
+            )
+            rows.append((instance, order))
+        return rows
+
+    def queries(self, url):
+        """Return number of queries of the request."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assert_budget(self, key, url):
+        """Assert the queries of url is constant and in the budget."""
+        self.create_rows(1)
+        queries = self.queries(url)
+        self.create_rows(5)
+        self.assertEqual(self.queries(url), queries, key)
+        self.assertLessEqual(queries, self.budget[key], key)
+
+    def mock_erp(self, mock_post, mock_put):
+        """Mock erp calls."""
+        mock_post.return_value = {'status': 'success', 'id': 'erpnext_1'}
+        mock_put.return_value = {'status': 'success', 'data': {}}
+
+    def test_instance_list(self, mock_post, mock_put):
+        """Test instance list."""
+        self.mock_erp(mock_post, mock_put)
+        self.assert_budget('instance-list', '/api/instances/')
+        response = self.client.get('/api/instances/')
+        self.assertEqual(response.data['count'], 6)
+        product = response.data['results'][0]['product']
+        self.assertEqual(product['domain'], 'example.com')
+        self.assertEqual(len(product['packages']), 2)
+        self.assertEqual(
+            product['product_meta'], [{'key': 'key', 'value': 'value'}]
+        )
+
+    def test_order_list(self, mock_post, mock_put):
+        """Test sales order list."""
+        self.mock_erp(mock_post, mock_put)
+        self.assert_budget('order-list', '/api/orders/')
+
+    def test_details(self, mock_post, mock_put):
+        """Test instance and sales order detail."""
+        self.mock_erp(mock_post, mock_put)
+        instance, order = self.create_rows(1)[0]
+        instance_queries = self.queries(f'/api/instances/{instance.id}/')
+        order_queries = self.queries(f'/api/orders/{order.id}/')
+        self.assertLessEqual(
+            instance_queries, self.budget['instance-detail']
+        )
+        self.assertLessEqual(order_queries, self.budget['order-detail'])
+
+        response = self.client.get(f'/api/orders/{order.id}/')
+        self.assertEqual(response.data['instance']['id'], instance.id)
+        self.assertEqual(
+            response.data['instance']['product'], response.data['product']
+        )
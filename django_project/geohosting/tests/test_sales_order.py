@@ -13,6 +13,7 @@ from geohosting.models import (
     SalesOrderStatus, SalesOrderPaymentMethod, ActivityType, Cluster,
     Region, ProductCluster, Instance, InstanceStatus
 )
+from geohosting_controller.connection import jenkins_client
 from geohosting_controller.variables import ActivityTypeTerm
 
 
@@ -180,6 +181,7 @@ class SalesOrderTests(TestCase):
 
             # Create cluster but no PROXY API KEY
             os.environ['PROXY_API_KEY'] = ''
+            jenkins_client().invalidate()
             cluster = Cluster.objects.create(
                 code='test',
                 region=Region.default_region()
@@ -189,7 +191,8 @@ class SalesOrderTests(TestCase):
                 product=self.package.product,
                 environment='test'
             )
-            sales_order.auto_deploy()
+            with self.captureOnCommitCallbacks(execute=True):
+                sales_order.auto_deploy()
             self.assertTrue(sales_order.activity_set.all().count())
             mock_add_erp_next_comment.assert_has_calls([
                 call(
@@ -202,7 +205,8 @@ class SalesOrderTests(TestCase):
             # Has PROXY API KEY
             mock_add_erp_next_comment.reset_mock()
             os.environ['PROXY_API_KEY'] = 'token'
-            sales_order.auto_deploy()
+            with self.captureOnCommitCallbacks(execute=True):
+                sales_order.auto_deploy()
             self.assertTrue(sales_order.activity_set.all().count())
             mock_add_erp_next_comment.assert_has_calls([
                 call(
@@ -0,0 +1,196 @@
+# coding=utf-8
+"""
+GeoHosting.
+
+.. note:: Vault client tests.
+"""
+
+import os
+from unittest.mock import patch
+
+import requests_mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from geohosting.utils.vault import (
+    VaultClient, get_credentials, get_credentials_many,
+    invalidate_credentials, vault_client
+)
+
+VAULT_URL = 'https://vault.example.com'
+LOGIN_URL = f'{VAULT_URL}/v1/auth/kartoza-apps/login'
+RENEW_URL = f'{VAULT_URL}/v1/auth/token/renew-self'
+SECRET_URL = f'{VAULT_URL}/v1/secret/data/'
+
+
+def auth(token, lease_duration=3600, renewable=True):
+    """Return auth response."""
+    return {
+        'auth': {
+            'client_token': token,
+            'lease_duration': lease_duration,
+            'renewable': renewable
+        }
+    }
+
+
+@patch.dict(
+    os.environ, {
+        'VAULT_BASE_URL': VAULT_URL,
+        'VAULT_ROLE_ID': 'role',
+        'VAULT_SECRET_ID': 'secret'
+    }
+)
+class VaultClientTest(TestCase):
+    """Vault client tests."""
+
+    def test_token_is_cached(self):
+        """Test token is reused until it needs renewal."""
+        client = VaultClient()
+        with requests_mock.Mocker() as requests_mocker:
+            login = requests_mocker.post(LOGIN_URL, json=auth('token-1'))
+            self.assertEqual(client.token, 'token-1')
+            self.assertEqual(client.token, 'token-1')
+            self.assertEqual(login.call_count, 1)
+
+    def test_token_is_renewed(self):
+        """Test token is renewed before it expires."""
+        client = VaultClient()
+        with requests_mock.Mocker() as requests_mocker:
+            login = requests_mocker.post(LOGIN_URL, json=auth('token-1'))
+            renew = requests_mocker.post(RENEW_URL, json=auth('token-2'))
+            client.token
+            client._renew_at = 0
+            self.assertEqual(client.token, 'token-2')
+            self.assertEqual(
+                renew.last_request.headers['X-Vault-Token'], 'token-1'
+            )
+            self.assertEqual(login.call_count, 1)
+
+            # Login again when renew is failed
+            client._renew_at = 0
+            requests_mocker.post(RENEW_URL, status_code=403)
+            requests_mocker.post(LOGIN_URL, json=auth('token-3'))
+            self.assertEqual(client.token, 'token-3')
+
+            # Login again when it is not renewable
+            requests_mocker.post(
+                LOGIN_URL, json=auth('token-4', renewable=False)
+            )
+            client._renew_at = 0
+            client.token
+            client._renew_at = 0
+            self.assertEqual(client.token, 'token-4')
+
+    def test_get_credentials(self):
+        """Test get credentials with cached token."""
+        with requests_mock.Mocker() as requests_mocker:
+            login = requests_mocker.post(LOGIN_URL, json=auth('token'))
+            requests_mocker.get(
+                f'{SECRET_URL}app',
+                json={'data': {'data': {'ADMIN_PASSWORD': 'pass', 'a': 1}}}
+            )
+            vault_client().invalidate()
+            for _ in range(3):
+                self.assertEqual(
+                    get_credentials(SECRET_URL, 'app'),
+                    {'ADMIN_PASSWORD': 'pass'}
+                )
+            self.assertEqual(login.call_count, 1)
+
+            # Revoked token
+            requests_mocker.get(
+                f'{SECRET_URL}app', [
+                    {'status_code': 403},
+                    {'json': {'data': {'data': {'PASSWORD': 'pass'}}}}
+                ]
+            )
+            self.assertEqual(
+                get_credentials(SECRET_URL, 'app'), {'PASSWORD': 'pass'}
+            )
+            self.assertEqual(login.call_count, 2)
+
+
+@patch.dict(
+    os.environ, {
+        'VAULT_BASE_URL': VAULT_URL,
+        'VAULT_ROLE_ID': 'role',
+        'VAULT_SECRET_ID': 'secret'
+    }
+)
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+        }
+    },
+    VAULT_CREDENTIAL_CACHE_TTL=60
+)
+class CredentialCacheTest(TestCase):
+    """Credential cache tests."""
+
+    def setUp(self):
+        """To setup test."""
+        cache.clear()
+        vault_client().invalidate()
+
+    def mock_secret(self, requests_mocker, app, password):
+        """Mock secret of app."""
+        return requests_mocker.get(
+            f'{SECRET_URL}{app}',
+            json={'data': {'data': {'ADMIN_PASSWORD': password}}}
+        )
+
+    def test_cached_and_encrypted(self):
+        """Test credentials are cached encrypted."""
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.post(LOGIN_URL, json=auth('token'))
+            secret = self.mock_secret(requests_mocker, 'app', 'secret-pass')
+            for _ in range(3):
+                self.assertEqual(
+                    get_credentials(SECRET_URL, 'app'),
+                    {'ADMIN_PASSWORD': 'secret-pass'}
+                )
+            self.assertEqual(secret.call_count, 1)
+            for value in cache._cache.values():
+                self.assertNotIn(b'secret-pass', value)
+
+            # Invalidated
+            self.mock_secret(requests_mocker, 'app', 'rotated')
+            invalidate_credentials(SECRET_URL, 'app')
+            self.assertEqual(
+                get_credentials(SECRET_URL, 'app'),
+                {'ADMIN_PASSWORD': 'rotated'}
+            )
+
+    @override_settings(VAULT_CREDENTIAL_CACHE_TTL=0)
+    def test_cache_disabled(self):
+        """Test credentials are not cached when ttl is 0."""
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.post(LOGIN_URL, json=auth('token'))
+            secret = self.mock_secret(requests_mocker, 'app', 'pass')
+            get_credentials(SECRET_URL, 'app')
+            get_credentials(SECRET_URL, 'app')
+            self.assertEqual(secret.call_count, 2)
+
+    def test_prefetch(self):
+        """Test credentials are fetched in batch."""
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.post(LOGIN_URL, json=auth('token'))
+            secrets = [
+                self.mock_secret(requests_mocker, f'app-{idx}', f'{idx}')
+                for idx in range(5)
+            ]
+            requests_mocker.get(f'{SECRET_URL}error', status_code=500)
+            output = get_credentials_many(
+                [(SECRET_URL, f'app-{idx}') for idx in range(5)] +
+                [(SECRET_URL, 'error')]
+            )
+            self.assertEqual(len(output), 5)
+            self.assertEqual(
+                output[(SECRET_URL, 'app-3')], {'ADMIN_PASSWORD': '3'}
+            )
+            for idx in range(5):
+                get_credentials(SECRET_URL, f'app-{idx}')
+            for secret in secrets:
+                self.assertEqual(secret.call_count, 1)
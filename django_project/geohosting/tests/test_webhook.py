@@ -0,0 +1,258 @@
+# coding=utf-8
+"""
+GeoHosting.
+
+.. note:: Webhook ingestion tests.
+"""
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from geohosting.admin.webhook import WebhookEventAdmin, replay_webhook_event
+from geohosting.factories.package import PackageFactory
+from geohosting.models import (
+    Activity, ActivityStatus, ActivityType, Cluster, Instance,
+    InstanceStatus, Region, WebhookEvent
+)
+from geohosting.tasks.webhook import (
+    process_pending_webhook_events, process_webhook_events
+)
+from geohosting_controller.variables import ActivityTypeTerm
+
+User = get_user_model()
+
+
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+        }
+    }
+)
+class WebhookTest(TestCase):
+    """Webhook ingestion tests."""
+
+    app_name = 'server'
+
+    def setUp(self):
+        """To setup test."""
+        cache.clear()
+        self.admin = User.objects.create(
+            username='admin', password='password',
+            is_superuser=True, is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        package = PackageFactory()
+        self.instance = Instance.objects.create(
+            name=self.app_name, price=package,
+            cluster=Cluster.objects.create(
+                code='cluster', region=Region.objects.create(name='Region')
+            ),
+            owner=self.admin, status=InstanceStatus.DEPLOYING
+        )
+        activity = Activity.objects.create(
+            activity_type=ActivityType.objects.create(
+                identifier=ActivityTypeTerm.CREATE_INSTANCE.value,
+                product=package.product
+            ),
+            instance=self.instance,
+            triggered_by=self.admin,
+            client_data={'app_name': self.app_name}
+        )
+        Activity.objects.filter(id=activity.id).update(
+            status=ActivityStatus.BUILD_ARGO
+        )
+        self.activity = activity
+
+    def post(self, status, source='ArgoCD', app_name=None):
+        """Post webhook event."""
+        return self.client.post(
+            '/api/webhook/', {
+                'app_name': app_name or f'devops-{self.app_name}',
+                'Status': status,
+                'Source': source
+            }
+        )
+
+    def test_invalid(self):
+        """Test invalid event is recorded."""
+        response = self.client.post('/api/webhook/', {'app_name': 'a'})
+        self.assertEqual(response.status_code, 400)
+        event = WebhookEvent.objects.get()
+        self.assertIsNotNone(event.processed_at)
+        self.assertIn('Status', event.note)
+
+    @patch('geohosting.tasks.webhook.process_webhook_events.apply_async')
+    def test_ingestion_is_batched(self, apply_async):
+        """Test events are saved and the app is queued once."""
+        self.assertEqual(self.post('running').status_code, 200)
+        self.assertEqual(self.post('failed').status_code, 200)
+        self.assertEqual(self.post('synced').status_code, 200)
+        self.assertEqual(self.post('synced', 'other').status_code, 200)
+        apply_async.assert_called_once()
+        self.assertEqual(apply_async.call_args.kwargs['args'], ('server',))
+
+        # Nothing is processed yet
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.status, ActivityStatus.BUILD_ARGO)
+        self.assertEqual(
+            WebhookEvent.objects.filter(processed_at__isnull=True).count(), 2
+        )
+
+        # Processed in order
+        self.assertEqual(process_webhook_events('server'), 2)
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.status, ActivityStatus.SUCCESS)
+        self.assertFalse(
+            WebhookEvent.objects.filter(processed_at__isnull=True).exists()
+        )
+        self.assertEqual(
+            WebhookEvent.objects.filter(activity=self.activity).count(), 2
+        )
+
+        # Duplicated event is not saved
+        count = WebhookEvent.objects.count()
+        self.assertEqual(self.post('synced').status_code, 200)
+        self.assertEqual(WebhookEvent.objects.count(), count)
+        self.assertEqual(apply_async.call_count, 1)
+
+        # Next event is queued again
+        self.client.post(
+            '/api/webhook/', {
+                'app_name': self.app_name, 'Status': 'synced',
+                'Source': 'ArgoCD', 'revision': 'abc'
+            }
+        )
+        self.assertEqual(WebhookEvent.objects.count(), count + 1)
+        self.assertEqual(apply_async.call_count, 2)
+
+    @override_settings(WEBHOOK_DEDUP_WINDOW=0)
+    def test_dedup_disabled(self):
+        """Test duplicated events are saved when dedup is disabled."""
+        self.post('failed')
+        self.post('failed')
+        self.assertEqual(WebhookEvent.objects.count(), 2)
+        # Activity error is applied once
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.status, ActivityStatus.ERROR)
+
+    def test_failed_save(self):
+        """Test event that is not saved can be received again."""
+        with patch.object(
+                WebhookEvent, 'save', side_effect=DatabaseError('Down')
+        ):
+            with self.assertRaises(DatabaseError):
+                self.post('failed')
+        self.assertEqual(WebhookEvent.objects.count(), 0)
+
+        # The retried notification is not dropped as duplicate
+        self.post('failed')
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.status, ActivityStatus.ERROR)
+
+    def test_replay(self):
+        """Test failed events are replayed from the data."""
+        self.instance.name = 'other'
+        self.instance.save()
+        self.post('synced')
+        event = WebhookEvent.objects.get()
+        self.assertIsNotNone(event.note)
+
+        self.instance.name = self.app_name
+        self.instance.save()
+        request = RequestFactory().post('/')
+        request.user = self.admin
+        replay_webhook_event(
+            WebhookEventAdmin, request, WebhookEvent.objects.all()
+        )
+        event.refresh_from_db()
+        self.assertIsNone(event.note)
+        self.assertIsNotNone(event.processed_at)
+        self.assertEqual(event.activity, self.activity)
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.status, ActivityStatus.SUCCESS)
+
+        # Replaying processed event does nothing
+        replay_webhook_event(
+            WebhookEventAdmin, request, WebhookEvent.objects.all()
+        )
+        event.refresh_from_db()
+        self.assertIsNone(event.note)
+
+    def test_replay_other_activity(self):
+        """Test replayed event does not change a newer activity."""
+        self.post('synced')
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.activity, self.activity)
+        newer = Activity.objects.create(
+            activity_type=self.activity.activity_type,
+            instance=self.instance,
+            triggered_by=self.admin,
+            client_data={'app_name': self.app_name}
+        )
+        Activity.objects.filter(id=newer.id).update(
+            status=ActivityStatus.ERROR
+        )
+
+        event.replay()
+        process_webhook_events(self.app_name)
+        event.refresh_from_db()
+        self.assertIsNotNone(event.processed_at)
+        self.assertEqual(event.activity, self.activity)
+        newer.refresh_from_db()
+        self.assertEqual(newer.status, ActivityStatus.ERROR)
+
+    @patch('geohosting.tasks.webhook.process_webhook_events.apply_async')
+    def test_locked_app(self, apply_async):
+        """Test app that is being processed is skipped."""
+        self.post('failed')
+        cache.set('webhook-events-lock:server', True)
+        self.assertIsNone(process_webhook_events('server'))
+        cache.delete('webhook-events-lock:server')
+
+        # Picked up by the sweep
+        WebhookEvent.objects.update(
+            triggered_at=WebhookEvent.objects.get().triggered_at.replace(
+                year=2020
+            )
+        )
+        apply_async.reset_mock()
+        self.assertEqual(process_pending_webhook_events(), 1)
+        apply_async.assert_called_once()
+
+    def test_unknown_app(self):
+        """Test event of unknown app."""
+        self.post('synced', app_name='gsh-unknown')
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.app_name, 'unknown')
+        self.assertEqual(event.status, 'synced')
+        self.assertIsNotNone(event.processed_at)
+        self.assertIn('does not exist', event.note)
+        self.assertIsNone(event.activity)
+
+    def test_lookup_columns(self):
+        """Test lookup columns are kept in sync."""
+        self.assertEqual(self.activity.app_name, self.app_name)
+        self.assertEqual(
+            list(Activity.running_activities(self.app_name)), [self.activity]
+        )
+        self.activity.client_data = {'app_name': 'renamed'}
+        self.activity.save()
+        self.assertFalse(Activity.running_activities(self.app_name).exists())
+
+        self.instance.status = InstanceStatus.DELETING
+        self.instance.save()
+        WebhookEvent.objects.create(
+            data={'Status': 'Deleted', 'Source': 'ArgoCD'},
+            activity=self.activity
+        )
+        self.instance.checking_server()
+        self.instance.refresh_from_db()
+        self.assertEqual(self.instance.status, InstanceStatus.DELETED)
@@ -15,6 +15,7 @@ from geohosting.api.company import CompanyViewSet
 from geohosting.api.country import CountryViewSet
 from geohosting.api.erp import ERPApiView
 from geohosting.api.instance import InstanceViewSet
+from geohosting.api.payment import PaystackWebhookView, StripeWebhookView
 from geohosting.api.product import ProductViewSet
 from geohosting.api.sales_order import (
     SalesOrderSetView, SalesOrderPaymentStripeSessionAPI,
@@ -100,6 +101,14 @@ order_payment = [
 
 api = [
     path('webhook/', WebhookView.as_view(), name='webhook-api'),
+    path(
+        'payment/stripe/webhook/', StripeWebhookView.as_view(),
+        name='stripe-webhook'
+    ),
+    path(
+        'payment/paystack/webhook/', PaystackWebhookView.as_view(),
+        name='paystack-webhook'
+    ),
     path(
         'sync-erp-data/', ERPApiView.as_view(), name='sync-with-erp'
     ),
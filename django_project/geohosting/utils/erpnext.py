@@ -1,25 +1,123 @@
+import hashlib
 import json
 import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import requests
 from django.conf import settings
-from django.core.files.base import ContentFile
+from django.core.files.base import File
 from django.core.files.storage import default_storage
+from requests.adapters import HTTPAdapter
 
-from geohosting.models.erp import ErpRequestLog, RequestMethod
+from geohosting.models.erp import ErpFile, ErpRequestLog, RequestMethod
 
-headers = {
-    "Authorization": (
-        f"token {settings.ERPNEXT_API_KEY}:"
-        f"{settings.ERPNEXT_API_SECRET}"
-    ),
-}
+# Size of chunk when streaming file from ERPNext.
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Downloaded file bigger than this is spooled to disk.
+DOWNLOAD_MEMORY_SIZE = 5 * 1024 * 1024
+
+
+class ErpNextClient:
+    """Client of ERPNext API.
+
+    It keeps a pooled keep-alive session, so the connection to ERPNext
+    is reused between calls instead of doing new handshake every time.
+    The headers are built per request, so it is safe to share
+    the client between threads.
+    """
+
+    def __init__(self, pool_size: int = None, timeout: int = None):
+        """Initialize client."""
+        self.pool_size = pool_size or settings.ERPNEXT_POOL_SIZE
+        self.timeout = timeout or settings.ERPNEXT_TIMEOUT
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    @property
+    def base_url(self):
+        """Return base url of ERPNext."""
+        return settings.ERPNEXT_BASE_URL
+
+    @property
+    def headers(self) -> dict:
+        """Return new headers for a request."""
+        return {
+            "Authorization": (
+                f"token {settings.ERPNEXT_API_KEY}:"
+                f"{settings.ERPNEXT_API_SECRET}"
+            ),
+        }
+
+    def request(
+            self, method: str, path: str, headers: dict = None,
+            timeout: int = None, **kwargs
+    ) -> requests.Response:
+        """Do request to ERPNext.
+
+        Parameters:
+            method (str): The request method.
+            path (str): Path of url after the base url.
+            headers (dict, optional): Extra headers for this request.
+            timeout (int, optional): Timeout of this request in seconds.
+        """
+        _headers = self.headers
+        if headers:
+            _headers.update(headers)
+        return self.session.request(
+            method, f'{self.base_url}{path}', headers=_headers,
+            timeout=timeout or self.timeout, **kwargs
+        )
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        """Do get request to ERPNext."""
+        return self.request(RequestMethod.GET, path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        """Do post request to ERPNext."""
+        return self.request(RequestMethod.POST, path, **kwargs)
+
+    def put(self, path: str, **kwargs) -> requests.Response:
+        """Do put request to ERPNext."""
+        return self.request(RequestMethod.PUT, path, **kwargs)
+
+    def close(self):
+        """Close the session of client."""
+        self.session.close()
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def erpnext_client() -> ErpNextClient:
+    """Return ERPNext client of current process.
+
+    The client is recreated on forked process (e.g. celery worker),
+    so the connections of pool are not shared between processes.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = ErpNextClient()
+                _client_pid = pid
+    return _client
 
 
 def test_connection():
     """Test erpnext connection."""
-    url = f"{settings.ERPNEXT_BASE_URL}/api/resource/Item?limit=1"
-    return requests.get(url, headers=headers)
+    return erpnext_client().get(
+        '/api/resource/Item', params={'limit': 1}
+    )
 
 
 def fetch_erpnext_detail_data(doctype, filters=None):
@@ -29,7 +127,7 @@ def fetch_erpnext_detail_data(doctype, filters=None):
             "status": "error",
             "message": 'ERPNEXT_BASE_URL is not set.'
         }
-    url = f"{settings.ERPNEXT_BASE_URL}/api/resource/{doctype}"
+    path = f"/api/resource/{doctype}"
     params = {
         'fields': '["*"]'
     }
@@ -38,7 +136,7 @@ def fetch_erpnext_detail_data(doctype, filters=None):
         params['filters'] = json.dumps(filters)
 
     try:
-        response = requests.get(url, headers=headers, params=params)
+        response = erpnext_client().get(path, params=params)
 
         if response.status_code == 200:
             data = response.json()
@@ -55,8 +153,152 @@ def fetch_erpnext_detail_data(doctype, filters=None):
         return f"Exception occurred: {str(e)}"
 
 
+class ErpNextFetchError(Exception):
+    """Error when fetching data from ERPNext."""
+
+    def __init__(self, message, response=None):  # noqa
+        super().__init__(message)
+        self.response = response
+
+
+class ErpNextPaginator:
+    """Fetch all rows of a doctype from ERPNext.
+
+    It asks the total count first, then fetches the pages concurrently
+    with bounded number of workers.
+    The pages are ordered by creation and name, so the rows that are
+    modified meanwhile do not move between pages and the new rows are at
+    the end. A row that is still returned twice is only yielded once.
+    It returns every row or raises ErpNextFetchError.
+    """
+
+    order_by = 'creation asc, name asc'
+
+    def __init__(
+            self, doctype, filters: list = None, fields: list = None,
+            page_length: int = None, max_workers: int = None
+    ):
+        """Initialize paginator."""
+        self.doctype = doctype
+        self.filters = filters
+        self.fields = fields if fields else ["*"]
+        self.total = None
+        self.page_length = page_length or settings.ERPNEXT_PAGE_LENGTH
+        self.max_workers = max_workers or settings.ERPNEXT_MAX_WORKERS
+
+    def _check_response(self, response):
+        """Raise error if the response is not ok."""
+        if response.status_code != 200:
+            raise ErpNextFetchError(
+                f"Error: Unable to fetch data. Status code: "
+                f"{response.status_code}, "
+                f"Message: {response.text}",
+                response=response
+            )
+
+    def count(self) -> int:
+        """Return total count of rows of doctype."""
+        if not settings.ERPNEXT_BASE_URL:
+            raise ErpNextFetchError('ERPNEXT_BASE_URL is not set.')
+        params = {'doctype': self.doctype}
+        if self.filters:
+            params['filters'] = json.dumps(self.filters)
+        response = erpnext_client().get(
+            '/api/method/frappe.client.get_count', params=params
+        )
+        self._check_response(response)
+        try:
+            return int(response.json()['message'])
+        except (KeyError, TypeError, ValueError):
+            raise ErpNextFetchError(
+                f'Count of {self.doctype} is not found.', response=response
+            )
+
+    def fetch_page(self, page: int) -> list:
+        """Return rows of the page, page is started from 0."""
+        params = {
+            'fields': json.dumps(self.fields),
+            'limit_start': page * self.page_length,
+            'limit_page_length': self.page_length,
+            'order_by': self.order_by
+        }
+        if self.filters:
+            params['filters'] = json.dumps(self.filters)
+        response = erpnext_client().get(
+            f"/api/resource/{self.doctype}", params=params
+        )
+        self._check_response(response)
+        try:
+            return response.json()['data']
+        except KeyError:
+            raise ErpNextFetchError(
+                f'Data of {self.doctype} is not found.', response=response
+            )
+
+    def pages(self):
+        """Yield (page, rows) as soon as each page is arrived.
+
+        The pages are not ordered.
+        """
+        total = self.total = self.count()
+        total_page = -(-total // self.page_length)
+        last_page = None
+        last_rows = []
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = {
+                executor.submit(self.fetch_page, page): page
+                for page in range(total_page)
+            }
+            for future in as_completed(futures):
+                page = futures[future]
+                rows = future.result()
+                if last_page is None or page > last_page:
+                    last_page, last_rows = page, rows
+                yield page, rows
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        # When rows are added after counting, the last page is full.
+        # Continue fetching until the page is not full.
+        page = total_page
+        while len(last_rows) >= self.page_length:
+            last_rows = self.fetch_page(page)
+            if last_rows:
+                yield page, last_rows
+            page += 1
+
+    @staticmethod
+    def _unique(rows):
+        """Yield rows, the rows with a name that is yielded are dropped."""
+        names = set()
+        for row in rows:
+            name = row.get('name')
+            if name is not None:
+                if name in names:
+                    continue
+                names.add(name)
+            yield row
+
+    def __iter__(self):
+        """Yield rows while the later pages are still arriving."""
+        yield from self._unique(
+            row for page, rows in self.pages() for row in rows
+        )
+
+    def all(self) -> list:
+        """Return all rows ordered by page."""
+        pages = dict(self.pages())
+        return list(
+            self._unique(
+                row for page in sorted(pages) for row in pages[page]
+            )
+        )
+
+
 def fetch_erpnext_data(
-        doctype, filters: list = None, fields: list = None
+        doctype, filters: list = None, fields: list = None,
+        page_length: int = None
 ):
     """
     Fetch data from ERPNext.
@@ -64,62 +306,18 @@ def fetch_erpnext_data(
     Parameters:
         doctype (str): The document type to fetch the data from.
         filters (dict): Filters for the search
+        fields (list): Fields that will be returned.
+        page_length (int): Length of a page for each request.
 
     Returns:
-        response (dict): The response from the ERPNext API.
-    """
-    if not settings.ERPNEXT_BASE_URL:
-        return {
-            "status": "error",
-            "message": 'ERPNEXT_BASE_URL is not set.'
-        }
+        response (list): All rows from the ERPNext API.
 
-    url = f"{settings.ERPNEXT_BASE_URL}/api/resource/{doctype}"
-
-    if not fields:
-        fields = ["*"]
-    params = {
-        'fields': json.dumps(fields)
-    }
-
-    if filters:
-        params['filters'] = json.dumps(filters)
-
-    all_data = []
-    page = 1
-    page_length = 20
-    max_try = 10
-    current_try = 1
-
-    try:
-        while True:
-            current_try += 1
-            if current_try > max_try:
-                break
-
-            params['limit_start'] = (page - 1) * page_length
-            params['limit_page_length'] = page_length
-
-            response = requests.get(url, headers=headers, params=params)
-
-            if response.status_code == 200:
-                data = response.json()
-                if 'data' in data:
-                    all_data.extend(data['data'])
-                    if len(data['data']) < page_length:
-                        break  # Exit loop if this is the last page
-                    page += 1
-                else:
-                    break  # Exit loop if no data found in response
-            else:
-                return (
-                    f"Error: Unable to fetch data. Status code: "
-                    f"{response.status_code}, "
-                    f"Message: {response.text}"
-                )
-        return all_data
-    except Exception as e:
-        return f"Exception occurred: {str(e)}"
+    Raises:
+        ErpNextFetchError: When one of the request is failed.
+    """
+    return ErpNextPaginator(
+        doctype, filters=filters, fields=fields, page_length=page_length
+    ).all()
 
 
 def post_to_erpnext(data, doctype, file=None):
@@ -139,26 +337,24 @@ def post_to_erpnext(data, doctype, file=None):
             "message": 'ERPNEXT_BASE_URL is not set.'
         }
 
-    url = f"{settings.ERPNEXT_BASE_URL}/api/resource/{doctype}"
+    path = f"/api/resource/{doctype}"
 
     files = {'file': file} if file else None
 
     log = ErpRequestLog.objects.create(
-        url=url,
+        url=f"{settings.ERPNEXT_BASE_URL}{path}",
         method=RequestMethod.POST,
         data=data,
     )
 
     try:
         if files:
-            response = requests.post(
-                url, headers=headers,
-                data=data, files=files
+            response = erpnext_client().post(
+                path, data=data, files=files
             )
         else:
-            headers["Content-Type"] = "application/json"
-            response = requests.post(
-                url, headers=headers,
+            response = erpnext_client().post(
+                path, headers={"Content-Type": "application/json"},
                 data=json.dumps(data)
             )
 
@@ -200,26 +396,24 @@ def put_to_erpnext(data, doctype, id, file=None):
             "message": 'ERPNEXT_BASE_URL is not set.'
         }
 
-    url = f"{settings.ERPNEXT_BASE_URL}/api/resource/{doctype}/{id}"
+    path = f"/api/resource/{doctype}/{id}"
 
     files = {'file': file} if file else None
 
     log = ErpRequestLog.objects.create(
-        url=url,
+        url=f"{settings.ERPNEXT_BASE_URL}{path}",
         method=RequestMethod.PUT,
         data=data,
     )
 
     try:
         if files:
-            response = requests.put(
-                url, headers=headers,
-                data=data, files=files
+            response = erpnext_client().put(
+                path, data=data, files=files
             )
         else:
-            headers["Content-Type"] = "application/json"
-            response = requests.put(
-                url, headers=headers,
+            response = erpnext_client().put(
+                path, headers={"Content-Type": "application/json"},
                 data=json.dumps(data)
             )
 
@@ -248,10 +442,7 @@ def add_erp_next_comment(user, doctype: str, id: str, comment: str):
             "message": 'ERPNEXT_BASE_URL is not set.'
         }
 
-    url = (
-        f"{settings.ERPNEXT_BASE_URL}/api/method/"
-        f"frappe.desk.form.utils.add_comment"
-    )
+    path = "/api/method/frappe.desk.form.utils.add_comment"
     data = {
         "reference_doctype": doctype,
         "reference_name": id,
@@ -260,9 +451,9 @@ def add_erp_next_comment(user, doctype: str, id: str, comment: str):
         "comment_by": f"{user.first_name} {user.last_name}"
     }
     try:
-        headers["Content-Type"] = "application/json"
-        response = requests.post(
-            url, headers=headers, data=json.dumps(data)
+        response = erpnext_client().post(
+            path, headers={"Content-Type": "application/json"},
+            data=json.dumps(data)
         )
 
         response.raise_for_status()
@@ -273,22 +464,83 @@ def add_erp_next_comment(user, doctype: str, id: str, comment: str):
         return {"status": "error", "message": str(err)}
 
 
+def _stored_file(erp_file: ErpFile):
+    """Return erp file if the file is still on the storage."""
+    if erp_file and erp_file.path and default_storage.exists(erp_file.path):
+        return erp_file
+    return None
+
+
 def download_erp_file(image_path, folder='product_images', filename=None):
-    """Download file from erpnext."""
+    """Download file from erpnext.
+
+    The file is cached by the source path and the content hash.
+    The request is conditional when the file was downloaded before,
+    the body is streamed to the storage in chunks and it is not saved
+    again when the same content is already on the storage.
+    """
     url = f"{settings.ERPNEXT_BASE_URL}{image_path}"
-    response = requests.get(url, headers=headers)
+    cache = _stored_file(
+        ErpFile.objects.filter(source_path=image_path).first()
+    )
+    headers = {}
+    if cache:
+        if cache.etag:
+            headers['If-None-Match'] = cache.etag
+        if cache.last_modified:
+            headers['If-Modified-Since'] = cache.last_modified
+
+    response = erpnext_client().get(
+        image_path, headers=headers, stream=True
+    )
+    try:
+        if cache and response.status_code == 304:
+            return cache.path
+        if response.status_code != 200:
+            print(f"Failed to download image: {url}")
+            return None
 
-    if response.status_code == 200:
         if not filename:
             filename = os.path.basename(image_path)
-        content = ContentFile(response.content)
-        saved_path = (
-            default_storage.save(
-                f'{folder}/{filename}',
-                content
-            )
-        )
-        return saved_path
-    else:
-        print(f"Failed to download image: {url}")
-        return None
+        content_hash = hashlib.sha256()
+        with tempfile.SpooledTemporaryFile(
+                max_size=DOWNLOAD_MEMORY_SIZE
+        ) as content:
+            for chunk in response.iter_content(
+                    chunk_size=DOWNLOAD_CHUNK_SIZE
+            ):
+                content_hash.update(chunk)
+                content.write(chunk)
+            content_hash = content_hash.hexdigest()
+
+            # Reuse the file with same content
+            if cache and cache.content_hash == content_hash:
+                saved_path = cache.path
+            else:
+                same_file = _stored_file(
+                    ErpFile.objects.filter(
+                        content_hash=content_hash,
+                        path__startswith=f'{folder}/'
+                    ).first()
+                )
+                if same_file:
+                    saved_path = same_file.path
+                else:
+                    content.seek(0)
+                    saved_path = default_storage.save(
+                        f'{folder}/{filename}',
+                        File(content, name=filename)
+                    )
+    finally:
+        response.close()
+
+    ErpFile.objects.update_or_create(
+        source_path=image_path,
+        defaults={
+            'path': saved_path,
+            'content_hash': content_hash,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+    )
+    return saved_path
@@ -0,0 +1,302 @@
+# coding=utf-8
+"""
+GeoHosting.
+
+.. note:: Concurrent health probe of instances.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+from requests.adapters import HTTPAdapter
+
+
+class ProbeResult:
+    """Result of probing an instance."""
+
+    def __init__(self, instance, status_code=None, error=None, latency=None):
+        """Initiate ProbeResult.
+
+        Parameters:
+            instance (Instance): Instance that is probed.
+            status_code (int): Status code of the response.
+            error (Exception): Error when there is no response.
+            latency (float): Latency of the probe in seconds.
+        """
+        self.instance = instance
+        self.status_code = status_code
+        self.error = error
+        self.latency = latency
+
+    @property
+    def is_online(self):
+        """Return if the server is online."""
+        return self.status_code in [200, 302]
+
+    def __str__(self):
+        """Return string of result."""
+        if self.error is not None:
+            return f'Server - {self.instance.url}: {self.error}'
+        return f'Server - {self.instance.url}: {self.status_code}'
+
+
+def next_probe_delay(status, streak) -> float:
+    """Return seconds until the next probe of an instance.
+
+    Deploying and starting up instances are probed on every sweep,
+    online instances back off exponentially by the number of probes with
+    the same status and offline instances are retried with jitter.
+
+    Parameters:
+        status (str): Status of the instance.
+        streak (int): Number of probes since the status changed.
+    """
+    from geohosting.models.instance import InstanceStatus
+    min_interval = settings.INSTANCE_PROBE_MIN_INTERVAL
+    if status == InstanceStatus.ONLINE:
+        return min(
+            min_interval * 2 ** min(streak, 32),
+            settings.INSTANCE_PROBE_MAX_INTERVAL
+        )
+    if status == InstanceStatus.OFFLINE:
+        interval = settings.INSTANCE_PROBE_OFFLINE_INTERVAL
+        return interval * random.uniform(0.5, 1.5)
+    return min_interval
+
+
+def finish_deleting(instances) -> int:
+    """Make deleting instances deleted when argo reported the deletion.
+
+    Deleting instances are not probed, only their webhooks are checked.
+
+    Parameters:
+        instances (list): Deleting instances.
+    """
+    from geohosting.models.webhook import WebhookEvent, WebhookStatus
+    instances = list(instances)
+    if not instances:
+        return 0
+    deleted_ids = set(
+        WebhookEvent.objects.filter(
+            activity__instance__in=instances,
+            status=WebhookStatus.DELETED
+        ).values_list('activity__instance_id', flat=True)
+    )
+    for instance in instances:
+        if instance.id in deleted_ids:
+            instance.deleted()
+    return len(deleted_ids)
+
+
+class InstanceProber:
+    """Probe instances concurrently.
+
+    Every probe has a timeout, the number of probes that run at the same
+    time is bounded and the connections are reused per cluster domain.
+    """
+
+    def __init__(self, max_workers=None, timeout=None):
+        """Initiate prober.
+
+        Parameters:
+            max_workers (int): Number of concurrent probes.
+            timeout (int): Timeout in seconds of each probe.
+        """
+        self.max_workers = (
+            max_workers or settings.INSTANCE_PROBE_MAX_WORKERS
+        )
+        self.timeout = timeout or settings.INSTANCE_PROBE_TIMEOUT
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def session(self, domain) -> requests.Session:
+        """Return session of the cluster domain."""
+        with self._lock:
+            session = self._sessions.get(domain)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=self.max_workers,
+                    pool_maxsize=self.max_workers
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[domain] = session
+            return session
+
+    def close(self):
+        """Close the sessions."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+
+    def probe(self, instance) -> ProbeResult:
+        """Probe an instance."""
+        session = self.session(instance.cluster.domain)
+        start = time.monotonic()
+        try:
+            response = session.head(instance.url, timeout=self.timeout)
+            return ProbeResult(
+                instance, status_code=response.status_code,
+                latency=time.monotonic() - start
+            )
+        except requests.exceptions.RequestException as e:
+            return ProbeResult(
+                instance, error=e, latency=time.monotonic() - start
+            )
+
+    def probe_all(self, instances, deadline=None) -> list:
+        """Probe instances concurrently, in the same order.
+
+        Probes that are not finished by the deadline are left out.
+
+        Parameters:
+            instances (list): Instances to be probed.
+            deadline (float): Epoch time when probing should stop.
+        """
+        if not instances:
+            return []
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = [
+                executor.submit(self.probe, instance)
+                for instance in instances
+            ]
+            timeout = None
+            if deadline is not None:
+                timeout = max(deadline - time.time(), 0)
+            done, _ = wait(futures, timeout=timeout)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return [future.result() for future in futures if future in done]
+
+    def sweep(self, instances, deadline=None) -> dict:
+        """Probe instances and save the changed status in one batch.
+
+        Only the instances whose status is changed are saved and
+        get a log. Instances whose status is changed while they are
+        probed are not overwritten.
+
+        Parameters:
+            instances (list): Instances to be checked.
+            deadline (float): Epoch time when probing should stop,
+                the instances that are not probed are the stragglers.
+        """
+        from geohosting.models.instance import Instance, InstanceStatus
+        from geohosting.models.instance_uptime import InstanceProbe
+        from geohosting.models.log import LogTracker
+
+        instances = list(instances)
+
+        # For deleting, we just check the webhook
+        deleting = [
+            instance for instance in instances
+            if instance.status == InstanceStatus.DELETING
+        ]
+        finish_deleting(deleting)
+
+        to_probe = [
+            instance for instance in instances
+            if instance.status not in [
+                InstanceStatus.DELETING, InstanceStatus.DELETED
+            ]
+        ]
+        probed_at = now()
+        results = self.probe_all(to_probe, deadline=deadline)
+        probed = {result.instance.id for result in results}
+        changed = []
+        logs = {}
+        intervals = {}
+        previous = {}
+        for result in results:
+            instance = result.instance
+            status = instance.status
+            previous[instance.id] = status
+            instance.apply_probe(result, commit=False)
+            if instance.status == status:
+                instance.probe_streak += 1
+            else:
+                instance.probe_streak = 0
+            interval = next_probe_delay(
+                instance.status, instance.probe_streak
+            )
+            intervals[instance.id] = interval
+            # From the start of the sweep, so the next sweep one interval
+            # later is not missed by the time the probes took
+            instance.next_probe_at = probed_at + timedelta(seconds=interval)
+            if instance.status == status:
+                continue
+            note = f'Server: {instance.status}'
+            if not result.is_online:
+                note = f'{note} ({result})'
+            instance.modified_at = now()
+            changed.append(instance)
+            logs[instance.id] = LogTracker.build(
+                instance, LogTracker.ERROR, note
+            )
+
+        with transaction.atomic():
+            # Instances that are changed meanwhile, e.g. by a webhook,
+            # keep that status and schedule
+            current = dict(
+                Instance.objects.select_for_update().filter(
+                    id__in=previous.keys()
+                ).values_list('id', 'status')
+            )
+            stale = {
+                _id for _id, status in previous.items()
+                if current.get(_id) != status
+            }
+            changed = [
+                instance for instance in changed if instance.id not in stale
+            ]
+            Instance.objects.bulk_update(changed, ['status', 'modified_at'])
+            Instance.objects.bulk_update(
+                [
+                    result.instance for result in results
+                    if result.instance.id not in stale
+                ],
+                ['next_probe_at', 'probe_streak']
+            )
+            LogTracker.objects.bulk_create(
+                [logs[instance.id] for instance in changed]
+            )
+            InstanceProbe.objects.bulk_create(
+                [
+                    InstanceProbe(
+                        instance=result.instance,
+                        probed_at=probed_at,
+                        status_code=result.status_code,
+                        latency=result.latency * 1000,
+                        online=result.is_online,
+                        interval=intervals[result.instance.id]
+                    ) for result in results
+                ]
+            )
+
+        # Credentials are sent when the status is saved
+        for instance in changed:
+            if not instance.credentials_pending:
+                continue
+            try:
+                instance.send_credentials()
+            except Exception as e:
+                LogTracker.error(instance, f'Send credentials : {e}')
+
+        return {
+            'probed': len(results),
+            'changed': len(changed),
+            'deleting': len(deleting),
+            'stragglers': [
+                instance.id for instance in to_probe
+                if instance.id not in probed
+            ]
+        }
@@ -0,0 +1,131 @@
+# coding=utf-8
+"""
+GeoHosting.
+
+.. note:: Poller of jenkins queue items and builds of activities.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils.timezone import now
+
+from geohosting_controller.connection import jenkins_client
+
+# Build results that fail the activity
+FAILED_RESULTS = ['FAILURE', 'ABORTED', 'NOT_BUILT']
+CANCELLED = 'CANCELLED'
+
+
+def api_url(url):
+    """Return json api url of jenkins url."""
+    return url.strip().rstrip('/') + '/api/json'
+
+
+class PollResult:
+    """Result of polling an activity on jenkins."""
+
+    def __init__(self, activity, build_url=None, result=None, error=None):
+        """Initiate PollResult.
+
+        Parameters:
+            activity (Activity): Activity that is polled.
+            build_url (str): Url of the build, when it is started.
+            result (str): Result of the build, when it is finished.
+            error (Exception): Error when jenkins can not be polled.
+        """
+        self.activity = activity
+        self.build_url = build_url
+        self.result = result
+        self.error = error
+
+    @property
+    def is_finished(self):
+        """Return if the queue item or the build is finished."""
+        return self.result is not None
+
+    @property
+    def is_failed(self):
+        """Return if the build is failed or the item is cancelled."""
+        return self.result in FAILED_RESULTS + [CANCELLED]
+
+    @property
+    def note(self):
+        """Return note of the failed build."""
+        if self.result == CANCELLED:
+            return 'Jenkins queue item is cancelled.'
+        return f'Jenkins build {self.build_url} is {self.result}.'
+
+
+def next_poll_delay(result: PollResult, polls: int) -> float:
+    """Return seconds until the next poll of an activity.
+
+    Queue items are polled often as they start quickly, running builds
+    and failed polls back off exponentially by the number of polls.
+    """
+    if not result.build_url and result.error is None:
+        return settings.JENKINS_POLL_QUEUE_INTERVAL
+    return min(
+        settings.JENKINS_POLL_BUILD_INTERVAL * 2 ** max(polls - 1, 0),
+        settings.JENKINS_POLL_MAX_INTERVAL
+    )
+
+
+def poll(activity) -> PollResult:
+    """Poll the queue item and then the build of the activity."""
+    client = jenkins_client()
+    build_url = activity.jenkins_build_url
+    try:
+        if not build_url:
+            response = client.get(api_url(activity.jenkins_queue_url))
+            response.raise_for_status()
+            data = response.json()
+            if data.get('cancelled'):
+                return PollResult(activity, result=CANCELLED)
+            build_url = (data.get('executable') or {}).get('url')
+            if not build_url:
+                return PollResult(activity)
+            build_url = build_url.strip()
+
+        response = client.get(api_url(build_url))
+        response.raise_for_status()
+        data = response.json()
+        if data.get('building') or data.get('inProgress'):
+            return PollResult(activity, build_url=build_url)
+        return PollResult(
+            activity, build_url=build_url, result=data.get('result')
+        )
+    except Exception as e:
+        return PollResult(activity, build_url=build_url, error=e)
+
+
+def poll_all(activities: list) -> list:
+    """Poll activities concurrently on the pooled jenkins connections.
+
+    The polling state of the activities is updated, but not saved.
+    """
+    if not activities:
+        return []
+    client = jenkins_client()
+    with ThreadPoolExecutor(
+            max_workers=min(client.pool_size, len(activities))
+    ) as executor:
+        results = list(executor.map(poll, activities))
+
+    current_time = now()
+    for result in results:
+        activity = result.activity
+        if result.build_url != activity.jenkins_build_url:
+            # Build is started, the back off starts again
+            activity.polls = 0
+        activity.polls += 1
+        activity.jenkins_build_url = result.build_url
+        activity.jenkins_result = result.result
+        if result.is_finished:
+            activity.next_poll_at = None
+        else:
+            activity.next_poll_at = current_time + timedelta(
+                seconds=next_poll_delay(result, activity.polls)
+            )
+    return results
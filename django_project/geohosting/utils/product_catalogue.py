@@ -0,0 +1,171 @@
+# coding=utf-8
+"""
+GeoHosting.
+
+.. note:: Versioned snapshots of the product catalogue.
+"""
+
+import hashlib
+import json
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+VERSION_KEY = 'product-catalogue-version'
+QUEUED_KEY = 'product-catalogue-queued'
+# Seconds that a missing snapshot is built by one request, the others wait
+# for it up to BUILD_WAIT seconds.
+BUILD_LOCK_TIMEOUT = 30
+BUILD_WAIT = 5
+
+
+def _snapshot_key(version, currency):
+    """Return cache key of the snapshot of a currency."""
+    return f'product-catalogue:{version}:{currency}'
+
+
+def catalogue_version():
+    """Return version of the catalogue, a new one when it is missing.
+
+    The version is random, so snapshots of an evicted version are never
+    served again.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def build_snapshot(currency=''):
+    """Build catalogue of a currency from the database.
+
+    Returns:
+        dict: Product list, product details by id, product id by the
+        lower case name, the currencies of the packages and the etag.
+    """
+    from geohosting.models import Package, Product
+    from geohosting.serializer.product import (
+        ProductDetailSerializer, ProductListSerializer, product_prefetches
+    )
+    products = list(
+        Product.objects.order_by('-available', 'name').prefetch_related(
+            *product_prefetches()
+        )
+    )
+    context = {}
+    snapshot = {
+        'list': ProductListSerializer(products, many=True).data,
+        'products': {
+            str(product.id): ProductDetailSerializer(
+                product, currency=currency, context=context
+            ).data
+            for product in products
+        },
+        'names': {
+            product.name.lower(): str(product.id) for product in products
+        },
+        'currencies': sorted(
+            set(
+                Package.objects.exclude(currency='').values_list(
+                    'currency', flat=True
+                )
+            )
+        )
+    }
+    snapshot = json.loads(json.dumps(snapshot, cls=DjangoJSONEncoder))
+    snapshot['etag'] = '"{}"'.format(
+        hashlib.sha256(
+            json.dumps(snapshot, sort_keys=True).encode()
+        ).hexdigest()
+    )
+    return snapshot
+
+
+def _cached_snapshot(version, currency):
+    """Return snapshot of a currency on a version, it is built when missing.
+
+    Only one request builds the missing snapshot, the others wait for it.
+    """
+    key = _snapshot_key(version, currency)
+    snapshot = cache.get(key)
+    if snapshot is not None:
+        return snapshot
+
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, True, timeout=BUILD_LOCK_TIMEOUT):
+        waited = 0
+        while waited < BUILD_WAIT:
+            time.sleep(0.1)
+            waited += 0.1
+            snapshot = cache.get(key)
+            if snapshot is not None:
+                return snapshot
+    try:
+        snapshot = build_snapshot(currency)
+        _store_snapshot(version, currency, snapshot)
+    finally:
+        cache.delete(lock_key)
+    return snapshot
+
+
+def get_snapshot(currency=''):
+    """Return cached catalogue of a currency, it is built when missing.
+
+    Currencies without packages return the default catalogue, as the
+    packages are the same.
+    """
+    version = catalogue_version()
+    snapshot = _cached_snapshot(version, '')
+    if not currency or currency not in snapshot['currencies']:
+        return snapshot
+    return _cached_snapshot(version, currency)
+
+
+def _store_snapshot(version, currency, snapshot):
+    """Store snapshot of a currency on a version."""
+    cache.set(
+        _snapshot_key(version, currency), snapshot,
+        timeout=settings.PRODUCT_CATALOGUE_CACHE_TIMEOUT
+    )
+
+
+def rebuild_catalogue():
+    """Build the snapshots of all currencies on a new version.
+
+    Cached snapshots are not reused, they may be built while the rows were
+    written without signals, e.g. by the bulk reconciler. The previous
+    version is served until the new one is complete.
+    """
+    version = uuid.uuid4().hex
+    snapshot = build_snapshot()
+    _store_snapshot(version, '', snapshot)
+    for currency in snapshot['currencies']:
+        _store_snapshot(version, currency, build_snapshot(currency))
+    cache.set(VERSION_KEY, version, timeout=None)
+    return len(snapshot['currencies']) + 1
+
+
+def _invalidate():
+    """Queue the rebuild, the current version is served until then."""
+    from geohosting.tasks.products import rebuild_product_catalogue
+    if cache.add(
+            QUEUED_KEY, True,
+            timeout=settings.PRODUCT_CATALOGUE_REBUILD_DELAY
+    ):
+        rebuild_product_catalogue.apply_async(
+            countdown=settings.PRODUCT_CATALOGUE_REBUILD_DELAY
+        )
+
+
+def invalidate_catalogue():
+    """Invalidate the catalogue when the change is committed.
+
+    A sync from erpnext saves many rows, they are rebuilt by one task.
+    Changes are served when the rebuild is published.
+    """
+    transaction.on_commit(_invalidate)
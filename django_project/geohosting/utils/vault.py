@@ -1,48 +1,277 @@
+import base64
+import hashlib
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import requests
+from cryptography.fernet import Fernet, InvalidToken
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+
+CREDENTIAL_CACHE_PREFIX = 'vault-credentials'
+
+
+class VaultClient:
+    """Client of vault.
+
+    The session keeps the connections alive and the client token is
+    cached until shortly before the lease expires. It is renewed when it
+    is renewable, otherwise it logs in again.
+    """
+
+    # Fraction of the lease after which the token is renewed.
+    RENEW_AFTER = 0.75
+
+    def __init__(self, pool_size=None, timeout=None):
+        """Initialize client.
+
+        Parameters:
+            pool_size (int): Number of connections kept alive.
+            timeout (int): Timeout in seconds of each request.
+        """
+        pool_size = pool_size or settings.VAULT_POOL_SIZE
+        self.timeout = timeout or settings.VAULT_TIMEOUT
+        self.session = requests.Session()
+        self.session.verify = False
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._lock = threading.Lock()
+        self._token = None
+        self._renewable = False
+        self._renew_at = 0
+        self._expires_at = 0
+
+    @property
+    def base_url(self):
+        """Return base url of vault."""
+        base_url = os.environ.get('VAULT_BASE_URL', '')
+        if not base_url:
+            raise Exception('VAULT_BASE_URL environment variable not set')
+        return base_url
+
+    def _set_token(self, auth: dict):
+        """Set token from auth response."""
+        now = time.monotonic()
+        lease_duration = auth.get('lease_duration') or 0
+        self._token = auth['client_token']
+        self._renewable = auth.get('renewable', False)
+        if lease_duration:
+            self._renew_at = now + lease_duration * self.RENEW_AFTER
+            self._expires_at = now + lease_duration
+        else:
+            # Token without lease does not expire
+            self._renew_at = self._expires_at = float('inf')
+
+    def login(self):
+        """Login with app role and return the token."""
+        role_id = os.environ.get('VAULT_ROLE_ID', '')
+        secret_id = os.environ.get('VAULT_SECRET_ID', '')
+        base_url = self.base_url
+        if not role_id:
+            raise Exception('VAULT_ROLE_ID environment variable not set')
+        if not secret_id:
+            raise Exception('VAULT_SECRET_ID environment variable not set')
+
+        response = self.session.post(
+            f"{base_url}/v1/auth/kartoza-apps/login",
+            data={
+                "role_id": role_id,
+                "secret_id": secret_id
+            },
+            timeout=self.timeout
+        )
+        if response.status_code != 200:
+            raise Exception(response.text)
+        self._set_token(response.json()['auth'])
+        return self._token
+
+    def renew(self):
+        """Renew the token, return None when it can not be renewed."""
+        try:
+            response = self.session.post(
+                f"{self.base_url}/v1/auth/token/renew-self",
+                headers={'X-Vault-Token': self._token},
+                timeout=self.timeout
+            )
+        except requests.exceptions.RequestException:
+            return None
+        if response.status_code != 200:
+            return None
+        self._set_token(response.json()['auth'])
+        return self._token
+
+    @property
+    def token(self):
+        """Return valid token, renew or login when needed."""
+        with self._lock:
+            now = time.monotonic()
+            if self._token and now < self._renew_at:
+                return self._token
+            if self._token and self._renewable and now < self._expires_at:
+                if self.renew():
+                    return self._token
+            return self.login()
+
+    def invalidate(self):
+        """Forget the token, e.g. when it is revoked."""
+        with self._lock:
+            self._token = None
+
+    def get(self, url, params=None):
+        """Get url with the token, login again when it is rejected."""
+        response = None
+        for _ in range(2):
+            response = self.session.get(
+                url,
+                params=params if params else {},
+                headers={'X-Vault-Token': self.token},
+                timeout=self.timeout
+            )
+            if response.status_code != 403:
+                break
+            self.invalidate()
+        return response
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def vault_client() -> VaultClient:
+    """Return vault client of the process."""
+    global _client, _client_pid
+    pid = os.getpid()
+    with _client_lock:
+        if _client is None or _client_pid != pid:
+            _client = VaultClient()
+            _client_pid = pid
+        return _client
 
 
 def get_token():
     """Get token of vault."""
-    VAULT_BASE_URL = os.environ.get('VAULT_BASE_URL', '')
-    VAULT_ROLE_ID = os.environ.get('VAULT_ROLE_ID', '')
-    VAULT_SECRET_ID = os.environ.get('VAULT_SECRET_ID', '')
-    if not VAULT_BASE_URL:
-        raise Exception('VAULT_BASE_URL environment variable not set')
-    if not VAULT_ROLE_ID:
-        raise Exception('VAULT_ROLE_ID environment variable not set')
-    if not VAULT_SECRET_ID:
-        raise Exception('VAULT_SECRET_ID environment variable not set')
-
-    url = f"{VAULT_BASE_URL}/v1/auth/kartoza-apps/login"
-    response = requests.post(
-        url,
-        data={
-            "role_id": VAULT_ROLE_ID,
-            "secret_id": VAULT_SECRET_ID
-        },
-        verify=False
-    )
-    if response.status_code != 200:
-        raise Exception(response.text)
-    return response.json()['auth']['client_token']
+    return vault_client().token
 
 
-def get_credentials(url, appname: str, params=None):
-    """Return credentials on vault."""
-    token = get_token()
-    response = requests.get(
-        url + appname,
-        params=params if params else {},
-        headers={
-            'X-Vault-Token': token
-        },
-        verify=False
-    )
+def test_connection():
+    """Test connection to vault by logging in."""
+    return vault_client().login()
+
+
+def fetch_credentials(url, appname: str, params=None):
+    """Return credentials on vault, without the cache."""
+    response = vault_client().get(url + appname, params=params)
     if response.status_code != 200:
         raise Exception(f'{response.status_code} - {response.text}')
     return {
         key: value for key, value in response.json()['data']['data'].items()
         if 'pass' in key.lower()
     }
+
+
+def _credential_fernet() -> Fernet:
+    """Return fernet to encrypt the cached credentials."""
+    key = hashlib.sha256(
+        f'{CREDENTIAL_CACHE_PREFIX}:{settings.SECRET_KEY}'.encode()
+    ).digest()
+    return Fernet(base64.urlsafe_b64encode(key))
+
+
+def _credential_cache_key(url, appname: str):
+    """Return cache key of credentials."""
+    digest = hashlib.sha256(f'{url}{appname}'.encode()).hexdigest()
+    return f'{CREDENTIAL_CACHE_PREFIX}:{digest}'
+
+
+def _get_cached_credentials(keys: list) -> dict:
+    """Return cached credentials by cache key."""
+    if settings.VAULT_CREDENTIAL_CACHE_TTL <= 0:
+        return {}
+    fernet = _credential_fernet()
+    output = {}
+    for key, value in cache.get_many(keys).items():
+        try:
+            output[key] = json.loads(fernet.decrypt(value))
+        except (InvalidToken, TypeError, ValueError):
+            pass
+    return output
+
+
+def _set_cached_credentials(credentials: dict):
+    """Cache the credentials by cache key, encrypted."""
+    if settings.VAULT_CREDENTIAL_CACHE_TTL <= 0 or not credentials:
+        return
+    fernet = _credential_fernet()
+    cache.set_many(
+        {
+            key: fernet.encrypt(json.dumps(value).encode())
+            for key, value in credentials.items()
+        },
+        timeout=settings.VAULT_CREDENTIAL_CACHE_TTL
+    )
+
+
+def get_credentials(url, appname: str, params=None):
+    """Return credentials on vault.
+
+    The credentials are cached for a short time, except when there are
+    params.
+    """
+    if params:
+        return fetch_credentials(url, appname, params)
+    key = _credential_cache_key(url, appname)
+    credentials = _get_cached_credentials([key]).get(key)
+    if credentials is None:
+        credentials = fetch_credentials(url, appname)
+        _set_cached_credentials({key: credentials})
+    return credentials
+
+
+def get_credentials_many(items: list) -> dict:
+    """Return credentials of many apps, fetching the missing concurrently.
+
+    Parameters:
+        items (list): List of (url, appname).
+
+    Returns:
+        dict: Credentials by (url, appname), failed ones are left out.
+    """
+    keys = {item: _credential_cache_key(*item) for item in set(items)}
+    cached = _get_cached_credentials(list(keys.values()))
+    output = {
+        item: cached[key] for item, key in keys.items() if key in cached
+    }
+    missing = [item for item in keys if item not in output]
+    if not missing:
+        return output
+
+    fetched = {}
+    with ThreadPoolExecutor(
+            max_workers=min(settings.VAULT_POOL_SIZE, len(missing))
+    ) as executor:
+        futures = {
+            executor.submit(fetch_credentials, *item): item
+            for item in missing
+        }
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                output[item] = fetched[keys[item]] = future.result()
+            except Exception:
+                pass
+    _set_cached_credentials(fetched)
+    return output
+
+
+def invalidate_credentials(url, appname: str):
+    """Remove credentials from the cache, e.g. when rotated."""
+    cache.delete(_credential_cache_key(url, appname))
@@ -4,18 +4,21 @@ from django.core.validators import RegexValidator
 app_name_exist_error_message = 'App name is already taken.'
 
 
-def app_name_validator(app_name):
-    """App name validator."""
-    from geohosting.models.activity import Activity
-    from geohosting.models.instance import Instance, InstanceStatus
-    if app_name:
-        if Instance.objects.filter(
-                name=app_name
-        ).exclude(status=InstanceStatus.DELETED).count():
-            raise ValidationError(app_name_exist_error_message)
-
-        if Activity.running_activities(app_name).count():
-            raise ValidationError(app_name_exist_error_message)
+def app_name_validator(app_name, user=None):
+    """App name validator.
+
+    Holds of other users are only checked when the user is given.
+    """
+    from geohosting.models.app_name import AppName
+    if app_name and not AppName.is_available(app_name, user):
+        raise ValidationError(app_name_exist_error_message)
+
+
+def app_name_hold_validator(app_name, user):
+    """Hold app name for the user, e.g. during checkout."""
+    from geohosting.models.app_name import AppName
+    if not AppName.hold(app_name, user):
+        raise ValidationError(app_name_exist_error_message)
 
 
 regex_name = r'^[a-z0-9-]*$'
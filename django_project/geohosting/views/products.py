@@ -1,5 +1,8 @@
 import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 
+from django.conf import settings
 from django.contrib import messages
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
@@ -10,12 +13,14 @@ from geohosting.models.package import Package, PackageGroup
 from geohosting.models.product import (
     Product, ProductMetadata, ProductMedia
 )
+from geohosting.models.reconcile import BulkReconciler
 from geohosting.tasks.products import (
     fetch_products_from_erpnext_task
 )
 from geohosting.utils.erpnext import (
     fetch_erpnext_data, fetch_erpnext_detail_data, download_erp_file
 )
+from geohosting.utils.product_catalogue import invalidate_catalogue
 from geohosting_controller.default_data import (
     generate_regions, generate_cluster
 )
@@ -58,8 +63,155 @@ def save_product_image(
         pass
 
 
+class ErpDocumentCache:
+    """Cache of erpnext documents for one import run.
+
+    The document is fetched once even when it is requested
+    by several threads at the same time.
+    """
+
+    def __init__(self):
+        """Initialize cache."""
+        self._lock = threading.Lock()
+        self._futures = {}
+
+    def get(self, path: str):
+        """Return document of the path."""
+        with self._lock:
+            future = self._futures.get(path)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._futures[path] = future
+        if is_owner:
+            try:
+                future.set_result(fetch_erpnext_detail_data(path))
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+
+def fetch_host_attributes(name: str, attribute_cache: ErpDocumentCache):
+    """Return host specifications of an item."""
+    product_detail = fetch_erpnext_detail_data(f'Item/{name}')
+    if not isinstance(product_detail, dict):
+        return {}
+    host_attributes = {}
+    for attribute in product_detail.get('attributes', []):
+        if 'host specifications' in attribute.get('attribute').lower():
+            attribute_detail = attribute_cache.get(
+                f'Item Attribute/{attribute["attribute"]}'
+            )
+            if isinstance(attribute_detail, dict):
+                for value in attribute_detail['item_attribute_values']:
+                    host_attributes[value['abbr'].lower()] = value[
+                        'attribute_value'
+                    ]
+    return host_attributes
+
+
+def fetch_package_detail(name: str):
+    """Return detail and pricing list of a package item."""
+    package_detail = fetch_erpnext_detail_data(f'Item/{name}')
+    if not isinstance(package_detail, dict) or not package_detail:
+        return None, []
+    pricing_list = fetch_erpnext_detail_data(
+        'Item Price', {
+            'item_code': name
+        }
+    )
+    if not isinstance(pricing_list, list):
+        pricing_list = []
+    return package_detail, pricing_list
+
+
+def save_product(product_detail: dict, desc: dict) -> Product:
+    """Save product, images and metadata from the erpnext item."""
+    name = product_detail.get('item_name', '')
+    upstream_id = product_detail.get('name', '')
+    description = desc.get('short_description', '')
+    image_path = product_detail.get('image', '')
+    available = product_detail.get(
+        'available_in_geohosting', 0) == 1
+
+    defaults = {
+        'name': name,
+        'description': description,
+        'available': available
+    }
+    if image_path:
+        defaults['image'] = download_erp_file(image_path)
+    product_obj, created = Product.objects.update_or_create(
+        upstream_id=upstream_id,
+        defaults=defaults
+    )
+    save_product_image(
+        product_obj, desc, 'overview_header',
+        'overview_description',
+        f'/assets/geohosting/images/Product_Images/{name}/main.png'
+    )
+    save_product_image(
+        product_obj, desc, 'overview_continuation_header',
+        'overview_continuation',
+        f'/assets/geohosting/images/Product_Images/{name}/'
+        f'secondary.png'
+    )
+
+    # Save all description to product metadata
+    BulkReconciler(
+        ProductMetadata.objects.filter(product=product_obj),
+        key_field='key',
+        defaults={'product': product_obj}
+    ).reconcile(
+        {key: {'value': value} for key, value in desc.items()}
+    )
+    # Bulk writes send no signals
+    invalidate_catalogue()
+    return product_obj
+
+
+def save_packages(
+        name: str, product: Product, product_detail: dict,
+        pricing_list: list
+):
+    """Save packages of product from the pricing list."""
+    spec = {}
+    for key, value in product_detail.get(
+            'host_attributes', {}
+    ).items():
+        if key in name.lower():
+            spec = {
+                'spec': [spec.strip() for spec in value.split(';')]
+            }
+    package_group, _ = PackageGroup.objects.update_or_create(
+        name=name
+    )
+    rows = {}
+    for item_price in pricing_list:
+        print(f'Price: {item_price.get("name")}')
+        rows[item_price.get('name')] = {
+            'feature_list': spec,
+            'price': item_price.get('price_list_rate', 0),
+            'currency': item_price.get('currency', 'USD'),
+            'name': item_price.get('item_name'),
+            'erpnext_item_code': item_price.get('item_code'),
+            'package_group': package_group,
+            'price_list': item_price.get('price_list')
+        }
+    BulkReconciler(
+        Package.objects.filter(product=product),
+        defaults={'product': product}
+    ).reconcile(rows)
+    # Bulk writes send no signals
+    invalidate_catalogue()
+
+
 def fetch_products_from_erpnext():
-    """Fetch products from ERPNEXT API."""
+    """Fetch products from ERPNEXT API.
+
+    Details of items, attributes and prices are fetched concurrently,
+    while the database is written in this thread.
+    """
     generate_regions()
     generate_cluster()
 
@@ -71,8 +223,8 @@ def fetch_products_from_erpnext():
             'item_group': 'GeoHosting'
         }
     )
-    products = []
-    packages = []
+    product_items = []
+    package_items = []
 
     for product_detail in product_list:
         name = product_detail.get('item_name', '')
@@ -80,132 +232,64 @@ def fetch_products_from_erpnext():
 
         # Currently we focus on DO
         if name.endswith('DO'):
-            packages.append(product_detail)
+            package_items.append(product_detail)
 
         description = product_detail.get('description', None)
         if description:
             desc = parse_description(description)
             if not desc.get('short_description'):
                 continue
+            product_items.append((product_detail, desc))
 
-            # -----------------------
-            # Extract attributes
-            _product_detail = fetch_erpnext_detail_data(
-                f'{doctype}/{name}'
+    attribute_cache = ErpDocumentCache()
+    with ThreadPoolExecutor(
+            max_workers=settings.ERPNEXT_MAX_WORKERS
+    ) as executor:
+        host_attributes_futures = [
+            executor.submit(
+                fetch_host_attributes,
+                product_detail.get('item_name', ''), attribute_cache
             )
-            attributes = _product_detail.get('attributes', [])
-            host_attributes = {}
-            for attribute in attributes:
-                if 'host specifications' in attribute.get('attribute').lower():
-                    attribute_detail = fetch_erpnext_detail_data(
-                        f'Item Attribute/{attribute["attribute"]}'
-                    )
-                    if attribute_detail:
-                        for value in attribute_detail[
-                            'item_attribute_values'
-                        ]:
-                            host_attributes[value['abbr'].lower()] = value[
-                                'attribute_value'
-                            ]
-            product_detail['host_attributes'] = host_attributes
-            # -----------------------
-            products.append(product_detail)
-
-            # Extracting data from the product_detail dictionary
-            upstream_id = product_detail.get('name', '')
-            description = desc.get('short_description', '')
-            image_path = product_detail.get('image', '')
-            available = product_detail.get(
-                'available_in_geohosting', 0) == 1
-
-            defaults = {
-                'name': name,
-                'description': description,
-                'available': available
-            }
-            if image_path:
-                defaults['image'] = download_erp_file(image_path)
-            product_obj, created = Product.objects.update_or_create(
-                upstream_id=upstream_id,
-                defaults=defaults
-            )
-            save_product_image(
-                product_obj, desc, 'overview_header',
-                'overview_description',
-                f'/assets/geohosting/images/Product_Images/{name}/main.png'
-            )
-            save_product_image(
-                product_obj, desc, 'overview_continuation_header',
-                'overview_continuation',
-                f'/assets/geohosting/images/Product_Images/{name}/'
-                f'secondary.png'
-            )
-
-            # Save all description to product metadata
-            for key, value in desc.items():
-                metadata, _ = ProductMetadata.objects.update_or_create(
-                    product=product_obj,
-                    key=key,
-                    defaults={
-                        'value': value,
-                    }
+            for product_detail, desc in product_items
+        ]
+        package_futures = [
+            (
+                package_detail.get('name', ''),
+                executor.submit(
+                    fetch_package_detail, package_detail.get('name', '')
                 )
-
-    # Get pricing
-    for package_detail in packages:
-        name = package_detail.get("name", "")
-        print(f'Getting product detail: {name}')
-        package_detail = fetch_erpnext_detail_data(f'{doctype}/{name}')
-        product_name = package_detail.get('variant_of', '')
-        try:
-            product_detail = [
-                product
-                for product in products if product['name'] == product_name
-            ][0]
-        except IndexError:
-            continue
-
-        if package_detail:
-            spec = {}
-            for key, value in product_detail.get(
-                    'host_attributes', {}
-            ).items():
-                if key in name.lower():
-                    spec = {
-                        'spec': [spec.strip() for spec in value.split(';')]
-                    }
-            pricing_list = fetch_erpnext_detail_data(
-                'Item Price', {
-                    'item_code': name
-                }
             )
-            product = Product.objects.get(
-                upstream_id=product_name
+            for package_detail in package_items
+        ]
+
+        # Save products while packages are still fetched
+        products = {}
+        product_objs = {}
+        for (product_detail, desc), future in zip(
+                product_items, host_attributes_futures
+        ):
+            product_detail['host_attributes'] = future.result()
+            products[product_detail['name']] = product_detail
+            product_objs[product_detail['name']] = save_product(
+                product_detail, desc
             )
-            package_group, _ = PackageGroup.objects.update_or_create(
-                name=name
+
+        # Get pricing
+        for name, future in package_futures:
+            print(f'Getting product detail: {name}')
+            package_detail, pricing_list = future.result()
+            if not package_detail:
+                continue
+            product_name = package_detail.get('variant_of', '')
+            try:
+                product_detail = products[product_name]
+            except KeyError:
+                continue
+            save_packages(
+                name, product_objs[product_name], product_detail,
+                pricing_list
             )
-            for item_price in pricing_list:
-                print(f'Price: {item_price.get("name")}')
-                currency = item_price.get('currency', 'USD')
-                price = item_price.get('price_list_rate', 0)
-                try:
-                    Package.objects.update_or_create(
-                        product=product,
-                        erpnext_code=item_price.get('name'),
-                        defaults={
-                            'feature_list': spec,
-                            'price': price,
-                            'currency': currency,
-                            'name': item_price.get('item_name'),
-                            'erpnext_item_code': item_price.get('item_code'),
-                            'package_group': package_group,
-                            'price_list': item_price.get('price_list')
-                        }
-                    )
-                except Product.DoesNotExist:
-                    continue
-    return products
+    return list(products.values())
 
 
 @api_view(['GET'])
@@ -5,9 +5,13 @@ GeoHosting Controller.
 .. note:: Connection to API
 """
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 
 import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
 
 from geohosting_controller.exceptions import NoProxyApiKeyException
 
@@ -20,38 +24,168 @@ def return_api_key():
     return api_key
 
 
+def jenkins_host(url):
+    """Return host of the url."""
+    parsed_uri = urlparse(url)
+    return '{uri.scheme}://{uri.netloc}/'.format(uri=parsed_uri)
+
+
+class JenkinsClient:
+    """Client of jenkins through the proxy.
+
+    The session keeps the connections alive, the api key is read once and
+    the crumb of each host is cached until jenkins rejects it.
+    """
+
+    CRUMB_HEADER = 'Jenkins-Crumb'
+
+    def __init__(self, pool_size=None, timeout=None):
+        """Initialize client.
+
+        Parameters:
+            pool_size (int): Number of connections kept alive.
+            timeout (tuple): Connect and read timeout in seconds.
+        """
+        self.pool_size = pool_size or settings.JENKINS_POOL_SIZE
+        self.timeout = timeout or (
+            settings.JENKINS_CONNECT_TIMEOUT, settings.JENKINS_READ_TIMEOUT
+        )
+        self.session = requests.Session()
+        self.session.verify = False
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size, pool_maxsize=self.pool_size
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._lock = threading.Lock()
+        self._api_key = None
+        self._crumbs = {}
+
+    @property
+    def api_key(self):
+        """Return proxy api key, it is read once."""
+        if not self._api_key:
+            self._api_key = return_api_key()
+        return self._api_key
+
+    def invalidate(self):
+        """Forget the api key and the crumbs."""
+        with self._lock:
+            self._api_key = None
+            self._crumbs = {}
+
+    def fetch_crumb(self, url):
+        """Fetch crumb of the host of url.
+
+        Returns:
+            tuple: Header name and the crumb.
+        """
+        response = self.session.get(
+            f'{jenkins_host(url)}jenkins/crumbIssuer/api/json',
+            headers={
+                'apikey': self.api_key
+            },
+            timeout=self.timeout
+        )
+        data = response.json()
+        return (
+            data.get('crumbRequestField', self.CRUMB_HEADER), data['crumb']
+        )
+
+    def crumb(self, url, refresh=False):
+        """Return cached crumb header of the host of url.
+
+        The crumb is best effort, when it can not be fetched, e.g. the
+        crumb issuer is disabled, no header is cached until it is
+        refreshed.
+        """
+        host = jenkins_host(url)
+        with self._lock:
+            if not refresh and host in self._crumbs:
+                return self._crumbs[host]
+        try:
+            field, crumb = self.fetch_crumb(url)
+            header = {field: crumb}
+        except Exception:
+            header = {}
+        with self._lock:
+            self._crumbs[host] = header
+        return header
+
+    def get(self, url: str, params: dict = None):
+        """Get url."""
+        return self.session.get(
+            url, params=params if params else {},
+            headers={
+                'apikey': self.api_key
+            },
+            timeout=self.timeout
+        )
+
+    def post(self, url: str, data: dict):
+        """Post to url with the crumb, refresh it when it is rejected."""
+        response = None
+        for refresh in (False, True):
+            headers = {'apikey': self.api_key}
+            headers.update(self.crumb(url, refresh=refresh))
+            response = self.session.post(
+                url, params=data, headers=headers, timeout=self.timeout
+            )
+            if response.status_code != 403:
+                break
+        return response
+
+    def trigger_many(self, items: list) -> list:
+        """Trigger many jobs concurrently on the pooled connections.
+
+        Parameters:
+            items (list): List of (url, data).
+
+        Returns:
+            list: Response or the exception of each item, in order.
+        """
+        if not items:
+            return []
+
+        def trigger(item):
+            try:
+                return self.post(*item)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(
+                max_workers=min(self.pool_size, len(items))
+        ) as executor:
+            return list(executor.map(trigger, items))
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def jenkins_client() -> JenkinsClient:
+    """Return jenkins client of the process."""
+    global _client, _client_pid
+    pid = os.getpid()
+    with _client_lock:
+        if _client is None or _client_pid != pid:
+            _client = JenkinsClient()
+            _client_pid = pid
+        return _client
+
+
 def get_jenkins_crumb(url):
     """Return crumb."""
-    parsed_uri = urlparse(url)
-    host = '{uri.scheme}://{uri.netloc}/'.format(uri=parsed_uri)
-    response = requests.get(
-        f'{host}jenkins/crumbIssuer/api/json',
-        headers={
-            'apikey': return_api_key()
-        },
-        verify=False
-    )
-    return response.json()['crumb']
+    return jenkins_client().fetch_crumb(url)[1]
 
 
 def request_get(url: str, params: dict = None):
     """Handle get connection."""
-    return requests.get(
-        url, params=params if params else {},
-        headers={
-            'apikey': return_api_key()
-        },
-        verify=False
-    )
+    return jenkins_client().get(url, params)
 
 
 def request_post(url: str, data: dict):
     """Handle post connection."""
-    return requests.post(
-        url,
-        params=data,
-        headers={
-            'apikey': return_api_key()
-        },
-        verify=False
-    )
+    return jenkins_client().post(url, data)
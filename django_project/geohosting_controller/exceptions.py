@@ -27,6 +27,13 @@ class ActivityException(Exception):
         super().__init__(message)
 
 
+class ActivityRetryException(Exception):
+    """Activity failed temporarily and can be retried."""
+
+    def __init__(self, message):  # noqa
+        super().__init__(message)
+
+
 class ConnectionErrorException(Exception):
     """Connection error."""
 
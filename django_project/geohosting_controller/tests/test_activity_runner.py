@@ -0,0 +1,297 @@
+# coding=utf-8
+"""GeoHosting Controller."""
+
+import os
+from unittest.mock import patch
+
+import requests
+import requests_mock
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test.testcases import TestCase
+from django.utils.timezone import now
+
+from core.celery import app
+from geohosting.factories.package import (
+    PackageFactory, PackageGroupFactory, ProductFactory
+)
+from geohosting.forms.activity import CreateInstanceForm
+from geohosting.models import Activity, ActivityStatus, Instance, Region
+from geohosting.tasks.activity import poll_jenkins_activities, run_activity
+from geohosting_controller.default_data import (
+    generate_cluster, generate_regions
+)
+from geohosting_controller.exceptions import ActivityException
+
+User = get_user_model()
+
+JENKINS_URL = (
+    'https://api.do.kartoza.com/jenkins/job/kartoza/job/devops/'
+    'job/geohosting/job/geonode_create/buildWithParameters'
+)
+QUEUE_URL = 'https://api.do.kartoza.com/queue/item/1/'
+BUILD_URL = 'https://api.do.kartoza.com/job/geonode_create/1/'
+
+
+class ActivityRunnerTest(TestCase):
+    """Test activity that is run on background."""
+
+    app_name = 'server-test'
+
+    def setUp(self):
+        """To setup test."""
+        call_command(
+            'loaddata', '01.initiate.json'
+        )
+        generate_regions()
+        generate_cluster()
+        self.admin = User.objects.create(
+            username='admin', password='password',
+            is_superuser=True,
+            is_staff=True
+        )
+        self.package = PackageFactory(
+            package_group=PackageGroupFactory(
+                package_code='dev-1'
+            ),
+            product=ProductFactory(
+                name='GeoNode'
+            )
+        )
+        os.environ['PROXY_API_KEY'] = 'Token'
+
+        # Eager task is retried only when the retry is not propagated
+        self.eager_propagates = app.conf.task_eager_propagates
+        app.conf.CELERY_TASK_EAGER_PROPAGATES = False
+
+    def tearDown(self):
+        """Restore celery config."""
+        app.conf.CELERY_TASK_EAGER_PROPAGATES = self.eager_propagates
+
+    def create_activity(self) -> Activity:
+        """Create activity and run it."""
+        form = CreateInstanceForm(
+            {
+                'app_name': self.app_name,
+                'package': self.package,
+                'region': Region.objects.get(code='global')
+            }
+        )
+        form.user = self.admin
+        if not form.is_valid():
+            raise ActivityException(f'{form.errors}')
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            form.save()
+        self.assertEqual(len(callbacks), 1)
+        form.instance.refresh_from_db()
+        return form.instance
+
+    def test_not_run_in_save(self):
+        """Test activity is not run until it is committed."""
+        with requests_mock.Mocker() as requests_mocker:
+            form = CreateInstanceForm(
+                {
+                    'app_name': self.app_name,
+                    'package': self.package,
+                    'region': Region.objects.get(code='global')
+                }
+            )
+            form.user = self.admin
+            self.assertTrue(form.is_valid())
+            activity = form.save()
+            self.assertEqual(requests_mocker.call_count, 0)
+        activity.refresh_from_db()
+        self.assertEqual(activity.status, ActivityStatus.RUNNING)
+
+    def test_retry(self):
+        """Test activity is retried when jenkins is not reachable."""
+        with requests_mock.Mocker() as requests_mocker:
+            post = requests_mocker.post(
+                JENKINS_URL, [
+                    {'exc': requests.exceptions.ConnectTimeout},
+                    {'status_code': 503},
+                    {
+                        'status_code': 201,
+                        'headers': {'Location': 'https://queue/item/1/'}
+                    }
+                ]
+            )
+            activity = self.create_activity()
+            self.assertEqual(post.call_count, 3)
+        self.assertEqual(activity.status, ActivityStatus.BUILD_ARGO)
+        self.assertEqual(activity.attempts, 3)
+        self.assertEqual(activity.jenkins_queue_url, 'https://queue/item/1/')
+        self.assertTrue(
+            Instance.objects.filter(name=self.app_name).exists()
+        )
+
+        # Duplicated task does not post again
+        with requests_mock.Mocker() as requests_mocker:
+            self.assertEqual(
+                run_activity(activity.id, str(activity.idempotency_key)),
+                ActivityStatus.BUILD_ARGO
+            )
+            self.assertEqual(requests_mocker.call_count, 0)
+
+    @patch.object(run_activity, 'max_retries', 1)
+    def test_retry_exhausted(self):
+        """Test activity is error when the retries are exhausted."""
+        with requests_mock.Mocker() as requests_mocker:
+            post = requests_mocker.post(JENKINS_URL, status_code=502)
+            activity = self.create_activity()
+            self.assertEqual(post.call_count, 2)
+        self.assertEqual(activity.status, ActivityStatus.ERROR)
+        self.assertIn('502', activity.note)
+
+    def test_claimed_before_post(self):
+        """Test the claim is saved before jenkins is called."""
+        claims = []
+
+        def post(request, context):
+            activity = Activity.objects.get(app_name=self.app_name)
+            claims.append((activity.attempts, activity.posting_at))
+            context.status_code = 201
+            context.headers['Location'] = QUEUE_URL
+            return ''
+
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.post(JENKINS_URL, text=post)
+            activity = self.create_activity()
+        self.assertEqual(claims[0][0], 1)
+        self.assertIsNotNone(claims[0][1])
+        self.assertIsNone(activity.posting_at)
+        self.assertEqual(activity.status, ActivityStatus.BUILD_ARGO)
+
+    def test_interrupted_post(self):
+        """Test redelivered task does not post an interrupted claim."""
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.post(JENKINS_URL, status_code=503)
+            with patch.object(run_activity, 'max_retries', 0):
+                activity = self.create_activity()
+        self.assertEqual(activity.status, ActivityStatus.ERROR)
+
+        # Claimed by a worker that is lost after the post
+        activity = Activity.objects.get(id=activity.id)
+        Activity.objects.filter(id=activity.id).update(
+            status=ActivityStatus.RUNNING, posting_at=now()
+        )
+        with requests_mock.Mocker() as requests_mocker:
+            self.assertEqual(
+                run_activity(activity.id, str(activity.idempotency_key)),
+                ActivityStatus.ERROR
+            )
+            self.assertEqual(requests_mocker.call_count, 0)
+        activity.refresh_from_db()
+        self.assertIn('interrupted', activity.note)
+
+    def test_not_retried_on_client_error(self):
+        """Test activity is error directly when jenkins rejects it."""
+        with requests_mock.Mocker() as requests_mocker:
+            post = requests_mocker.post(
+                JENKINS_URL, status_code=400, text='Bad request'
+            )
+            activity = self.create_activity()
+            self.assertEqual(post.call_count, 1)
+        self.assertEqual(activity.status, ActivityStatus.ERROR)
+
+    def test_transition(self):
+        """Test the transition of status."""
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.post(JENKINS_URL, status_code=400)
+            activity = self.create_activity()
+        with self.assertRaises(ActivityException):
+            activity.transition(ActivityStatus.SUCCESS)
+
+    def poll(self, activity):
+        """Poll the activity now."""
+        Activity.objects.update(next_poll_at=None)
+        output = poll_jenkins_activities()
+        activity.refresh_from_db()
+        return output
+
+    def test_poll_failed_build(self):
+        """Test failed jenkins build is polled to error."""
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.post(
+                JENKINS_URL, status_code=201,
+                headers={'Location': f' {QUEUE_URL}'}
+            )
+            activity = self.create_activity()
+            queue = requests_mocker.get(
+                f'{QUEUE_URL}api/json', json={'id': 1, 'why': 'Waiting'}
+            )
+
+            # Waiting on the queue
+            self.assertEqual(self.poll(activity), {'polled': 1, 'failed': 0})
+            self.assertEqual(activity.status, ActivityStatus.BUILD_ARGO)
+            self.assertIsNone(activity.jenkins_build_url)
+            self.assertIsNotNone(activity.next_poll_at)
+
+            # Not due yet
+            self.assertEqual(
+                poll_jenkins_activities(), {'polled': 0, 'failed': 0}
+            )
+            self.assertEqual(queue.call_count, 1)
+
+            # Building
+            queue = requests_mocker.get(
+                f'{QUEUE_URL}api/json',
+                json={'id': 1, 'executable': {'url': BUILD_URL}}
+            )
+            build = requests_mocker.get(
+                f'{BUILD_URL}api/json', json={'building': True, 'result': None}
+            )
+            self.poll(activity)
+            self.assertEqual(activity.jenkins_build_url, BUILD_URL)
+            self.assertEqual(activity.polls, 1)
+
+            # Failed, the queue is not polled again
+            build = requests_mocker.get(
+                f'{BUILD_URL}api/json',
+                json={'building': False, 'result': 'FAILURE'}
+            )
+            self.assertEqual(self.poll(activity), {'polled': 1, 'failed': 1})
+            self.assertEqual(queue.call_count, 1)
+            self.assertEqual(build.call_count, 1)
+        self.assertEqual(activity.status, ActivityStatus.ERROR)
+        self.assertEqual(activity.jenkins_result, 'FAILURE')
+        self.assertIn(BUILD_URL, activity.note)
+        self.assertIsNone(activity.next_poll_at)
+
+    def test_poll_successful_build(self):
+        """Test successful build is left for the webhook."""
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.post(
+                JENKINS_URL, status_code=201,
+                headers={'Location': QUEUE_URL}
+            )
+            activity = self.create_activity()
+            requests_mocker.get(
+                f'{QUEUE_URL}api/json',
+                json={'id': 1, 'executable': {'url': BUILD_URL}}
+            )
+            requests_mocker.get(
+                f'{BUILD_URL}api/json',
+                json={'building': False, 'result': 'SUCCESS'}
+            )
+            self.assertEqual(self.poll(activity), {'polled': 1, 'failed': 0})
+            self.assertEqual(activity.status, ActivityStatus.BUILD_ARGO)
+            self.assertEqual(activity.jenkins_result, 'SUCCESS')
+
+            # Finished build is not polled again
+            self.assertEqual(self.poll(activity), {'polled': 0, 'failed': 0})
+
+    def test_poll_cancelled(self):
+        """Test cancelled queue item is polled to error."""
+        with requests_mock.Mocker() as requests_mocker:
+            requests_mocker.post(
+                JENKINS_URL, status_code=201,
+                headers={'Location': QUEUE_URL}
+            )
+            activity = self.create_activity()
+            requests_mocker.get(
+                f'{QUEUE_URL}api/json', json={'id': 1, 'cancelled': True}
+            )
+            self.poll(activity)
+        self.assertEqual(activity.status, ActivityStatus.ERROR)
+        self.assertEqual(activity.note, 'Jenkins queue item is cancelled.')
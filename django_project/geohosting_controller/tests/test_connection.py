@@ -0,0 +1,94 @@
+# coding=utf-8
+"""GeoHosting Controller."""
+
+import os
+from unittest.mock import patch
+
+import requests
+import requests_mock
+from django.test import TestCase
+
+from geohosting_controller.connection import JenkinsClient
+from geohosting_controller.exceptions import NoProxyApiKeyException
+
+JENKINS_URL = 'https://api.do.kartoza.com/jenkins/'
+CRUMB_URL = f'{JENKINS_URL}crumbIssuer/api/json'
+JOB_URL = f'{JENKINS_URL}job/test/buildWithParameters'
+
+
+@patch.dict(os.environ, {'PROXY_API_KEY': 'Token'})
+class JenkinsClientTest(TestCase):
+    """Jenkins client tests."""
+
+    def test_crumb_is_cached(self):
+        """Test crumb is reused and refreshed when it is rejected."""
+        client = JenkinsClient(pool_size=2, timeout=(1, 2))
+        with requests_mock.Mocker() as requests_mocker:
+            crumb = requests_mocker.get(
+                CRUMB_URL, [
+                    {'json': {'crumb': 'crumb-1'}},
+                    {'json': {'crumb': 'crumb-2'}}
+                ]
+            )
+            post = requests_mocker.post(JOB_URL, status_code=201)
+            client.post(JOB_URL, {'a': 1})
+            client.post(JOB_URL, {'a': 2})
+            self.assertEqual(crumb.call_count, 1)
+            self.assertEqual(post.call_count, 2)
+            self.assertEqual(
+                post.last_request.headers['Jenkins-Crumb'], 'crumb-1'
+            )
+            self.assertEqual(post.last_request.headers['apikey'], 'Token')
+            self.assertEqual(post.last_request.timeout, (1, 2))
+
+            # Expired crumb
+            post = requests_mocker.post(
+                JOB_URL, [{'status_code': 403}, {'status_code': 201}]
+            )
+            self.assertEqual(client.post(JOB_URL, {}).status_code, 201)
+            self.assertEqual(crumb.call_count, 2)
+            self.assertEqual(
+                post.last_request.headers['Jenkins-Crumb'], 'crumb-2'
+            )
+
+    def test_without_crumb(self):
+        """Test post without crumb when the issuer is not available."""
+        client = JenkinsClient()
+        with requests_mock.Mocker() as requests_mocker:
+            crumb = requests_mocker.get(CRUMB_URL, status_code=404)
+            post = requests_mocker.post(JOB_URL, status_code=201)
+            client.post(JOB_URL, {})
+            client.post(JOB_URL, {})
+            self.assertEqual(crumb.call_count, 1)
+            self.assertNotIn('Jenkins-Crumb', post.last_request.headers)
+
+    def test_no_api_key(self):
+        """Test api key is required."""
+        client = JenkinsClient()
+        with patch.dict(os.environ, {'PROXY_API_KEY': ''}):
+            with self.assertRaises(NoProxyApiKeyException):
+                client.post(JOB_URL, {})
+
+    def test_trigger_many(self):
+        """Test triggering many jobs."""
+        client = JenkinsClient(pool_size=3)
+        with requests_mock.Mocker() as requests_mocker:
+            crumb = requests_mocker.get(CRUMB_URL, json={'crumb': 'crumb'})
+            post = requests_mocker.post(JOB_URL, status_code=201)
+            error_url = f'{JENKINS_URL}job/error/buildWithParameters'
+            requests_mocker.post(
+                error_url, exc=requests.exceptions.ConnectTimeout
+            )
+            responses = client.trigger_many(
+                [(JOB_URL, {'app': idx}) for idx in range(5)] +
+                [(error_url, {})]
+            )
+            self.assertEqual(post.call_count, 5)
+            self.assertLessEqual(crumb.call_count, 3)
+        self.assertEqual(len(responses), 6)
+        for response in responses[:5]:
+            self.assertEqual(response.status_code, 201)
+        self.assertIsInstance(
+            responses[5], requests.exceptions.ConnectTimeout
+        )
+        self.assertEqual(client.trigger_many([]), [])
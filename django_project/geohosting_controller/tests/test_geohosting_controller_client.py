@@ -18,6 +18,7 @@ from geohosting.forms.activity import CreateInstanceForm
 from geohosting.models import (
     Activity, Instance, Region, WebhookEvent, ActivityStatus, InstanceStatus
 )
+from geohosting_controller.connection import jenkins_client
 from geohosting_controller.default_data import (
     generate_cluster, generate_regions
 )
@@ -75,9 +76,12 @@ class ControllerTest(TestCase):
         )
         form.user = self.admin
         if form.is_valid():
-            form.save()
+            # Activity is run on background after it is committed
+            with self.captureOnCommitCallbacks(execute=True):
+                form.save()
         else:
             raise ActivityException(f'{form.errors}')
+        form.instance.refresh_from_db()
         return form.instance
 
     @patch('django.core.mail.EmailMessage.send')
@@ -137,6 +141,7 @@ class ControllerTest(TestCase):
             )
 
             os.environ['PROXY_API_KEY'] = ''
+            jenkins_client().invalidate()
             self.assertEqual(
                 self.create_function('error-app').note,
                 NoProxyApiKeyException().__str__()
@@ -188,7 +193,7 @@ class ControllerTest(TestCase):
                 )
                 self.assertEqual(response.status_code, 403)
 
-                # If not admin but no app name
+                # If admin but no app, it is recorded on the event
                 response = client.post(
                     '/api/webhook/',
                     data={
@@ -198,10 +203,16 @@ class ControllerTest(TestCase):
                     },
                     headers={'Authorization': f'Token {self.admin_token}'}
                 )
-                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.status_code, 200)
                 self.assertEqual(
                     WebhookEvent.objects.first().app_name, 'test'
                 )
+                self.assertIsNotNone(
+                    WebhookEvent.objects.first().processed_at
+                )
+                self.assertIn(
+                    'does not exist', WebhookEvent.objects.first().note
+                )
                 self.assertEqual(
                     WebhookEvent.objects.first().activity, None
                 )
@@ -19,6 +19,7 @@ from geohosting.forms.activity.delete_instance import (
 from geohosting.models import (
     Activity, Instance, Region, ActivityStatus, InstanceStatus
 )
+from geohosting_controller.connection import jenkins_client
 from geohosting_controller.default_data import (
     generate_cluster, generate_regions
 )
@@ -80,9 +81,12 @@ class ControllerDeletingTest(TestCase):
         )
         form.user = user
         if form.is_valid():
-            form.save()
+            # Activity is run on background after it is committed
+            with self.captureOnCommitCallbacks(execute=True):
+                form.save()
         else:
             raise ActivityException(f'{form.errors}')
+        form.instance.refresh_from_db()
         return form.instance
 
     def test_deleting(self):
@@ -105,6 +109,7 @@ class ControllerDeletingTest(TestCase):
             )
 
             os.environ['PROXY_API_KEY'] = ''
+            jenkins_client().invalidate()
             self.assertEqual(
                 self.delete_function(self.admin).note,
                 NoProxyApiKeyException().__str__()